@@ -1,6 +1,6 @@
 # elyx_1_visual_themed_creative.py
 
-import os, re, glob
+import os, re
 from datetime import datetime, timedelta
 
 import numpy as np
@@ -9,6 +9,9 @@ import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 
+from elyx_corpus import CorpusLoader, extract_refs
+from elyx_store import AnalyticsStore, PAGE_SIZE
+
 # --------------------------
 # Config & Styling
 # --------------------------
@@ -21,126 +24,35 @@ if 'page' not in st.session_state:
 # --------------------------
 # Utilities
 # --------------------------
-REF_PATTERN = re.compile(r"\[(\d+)\]")
+# Shard parse pool size; ELYX_LOAD_WORKERS=1 loads serially
+LOAD_WORKERS = int(os.environ.get("ELYX_LOAD_WORKERS", "0")) or None
 
-def extract_refs(text: str) -> list[int]:
-    if not isinstance(text, str): return []
-    return [int(m.group(1)) for m in REF_PATTERN.finditer(text)]
+@st.cache_resource(show_spinner=False)
+def corpus_loader(folder: str) -> CorpusLoader:
+    # One loader per folder shared by every session; each rerun only stats
+    # the shards and re-parses what changed since the last one
+    return CorpusLoader(folder, workers=LOAD_WORKERS)
 
-@st.cache_data(show_spinner=False)
-def parse_dt(value):
-    if pd.isna(value):
-        return pd.NaT
-    if isinstance(value, (pd.Timestamp, datetime)):
-        return pd.to_datetime(value)
-    s = str(value).strip()
-    m = re.match(r"^\[([^\]]+)\]", s)
-    if m: s = m.group(1)
-    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M",
-                "%d/%m/%Y %H:%M", "%d-%m-%Y %H:%M",
-                "%m/%d/%y, %I:%M %p", "%m/%d/%y %I:%M %p"):
-        try:
-            return datetime.strptime(s, fmt)
-        except Exception:
-            pass
-    return pd.to_datetime(s, errors="coerce")
-
-def parse_datetime_col(series: pd.Series) -> pd.Series:
-    return series.apply(parse_dt)
-
-def _normalize_chat_df(df: pd.DataFrame, source_name: str) -> pd.DataFrame:
-    col_map = {
-        'time': 'timestamp', 'date': 'timestamp', 'datetime': 'timestamp',
-        'text': 'message', 'msg': 'message', 'content': 'message',
-        'from': 'speaker', 'author': 'speaker', 'name': 'speaker',
-        'sender': 'speaker'
-    }
-    df = df.rename(columns={k: v for k, v in col_map.items() if k in df.columns and v not in df.columns})
-    for c in ['timestamp','message','speaker']:
-        if c not in df.columns:
-            df[c] = np.nan
-    df['timestamp'] = parse_datetime_col(df['timestamp'])
-    if 'ref_id' not in df.columns:
-        df['ref_id'] = df['message'].apply(lambda s: extract_refs(str(s))[0] if extract_refs(str(s)) else np.nan)
-    df['source_file'] = source_name
-    base = ['timestamp','speaker','message','ref_id','episode_id','event','source_file']
-    keep = [c for c in base if c in df.columns] + [c for c in df.columns if c not in base]
-    df = df.dropna(subset=['timestamp']).sort_values('timestamp')
-    return df[keep]
-
-def _flatten_json_maybe(df_or_list) -> pd.DataFrame:
-    if isinstance(df_or_list, list):
-        return pd.json_normalize(df_or_list)
-    if isinstance(df_or_list, pd.DataFrame) and df_or_list.shape[1] == 1 and isinstance(df_or_list.iloc[0,0], (list, dict)):
-        return pd.json_normalize(df_or_list.iloc[0,0])
-    return df_or_list
+# Optional SQL backend: ELYX_STORE=<db file> keeps the corpus in an indexed
+# SQLite/DuckDB file and queries it per view instead of holding the chat
+# frames in memory (see elyx_store.py)
+STORE_PATH = os.environ.get("ELYX_STORE")
+
+@st.cache_resource(show_spinner=False)
+def analytics_store(path: str) -> AnalyticsStore:
+    return AnalyticsStore(path)
 
 # --------------------------
 # Loaders
 # --------------------------
-@st.cache_data(show_spinner=False)
 def load_conversations(folder: str) -> pd.DataFrame:
-    files = sorted(glob.glob(os.path.join(folder, "*conversation*.json")))
-    dfs = []
-    for f in files:
-        try:
-            raw = pd.read_json(f, typ='frame', convert_dates=False)
-            raw = _flatten_json_maybe(raw)
-            df = _normalize_chat_df(raw, source_name=os.path.basename(f))
-            dfs.append(df)
-        except Exception as e:
-            print(f"[WARN] Could not parse {f}: {e}")
-    if dfs:
-        return pd.concat(dfs, ignore_index=True).sort_values("timestamp")
-    return pd.DataFrame(columns=["timestamp","speaker","message","ref_id","source_file"])
+    return corpus_loader(folder).conversations()
 
-@st.cache_data(show_spinner=False)
 def load_decisions(folder: str) -> pd.DataFrame:
-    files = sorted(glob.glob(os.path.join(folder, "*decisions*.json"))) + \
-            sorted(glob.glob(os.path.join(folder, "*_decisions*.json")))
-    dfs = []
-    for f in files:
-        try:
-            raw = pd.read_json(f, typ='frame', convert_dates=False)
-            raw = _flatten_json_maybe(raw)
-            df = raw.copy()
-            if 'date' in df.columns:
-                df['date'] = parse_datetime_col(df['date']).dt.date
-            else:
-                if 'timestamp' in df.columns:
-                    df['date'] = parse_datetime_col(df['timestamp']).dt.date
-            for col in ['decision','category','owner','episode_id','reason_refs','notes','status']:
-                if col not in df.columns:
-                    df[col] = np.nan
-            df['source_file'] = os.path.basename(f)
-            dfs.append(df[['date','decision','category','owner','episode_id','reason_refs','notes','status','source_file']])
-        except Exception as e:
-            print(f"[WARN] Could not parse {f}: {e}")
-    if dfs:
-        return pd.concat(dfs, ignore_index=True).sort_values(["date","owner","decision"])
-    return pd.DataFrame(columns=['date','decision','category','owner','episode_id','reason_refs','notes','status','source_file'])
+    return corpus_loader(folder).decisions()
 
-@st.cache_data(show_spinner=False)
 def load_hours(folder: str) -> pd.DataFrame:
-    files = sorted(glob.glob(os.path.join(folder, "*hours*.csv")))
-    dfs = []
-    for f in files:
-        try:
-            df = pd.read_csv(f)
-            if 'date' in df.columns:
-                df['date'] = parse_datetime_col(df['date']).dt.date
-            else:
-                if 'timestamp' in df.columns:
-                    df['date'] = parse_datetime_col(df['timestamp']).dt.date
-            for c in ['role','hours','type']:
-                if c not in df.columns: df[c] = np.nan
-            df['source_file'] = os.path.basename(f)
-            dfs.append(df[['date','role','hours','type','source_file']])
-        except Exception as e:
-            print(f"[WARN] Could not parse {f}: {e}")
-    if dfs:
-        return pd.concat(dfs, ignore_index=True)
-    return pd.DataFrame(columns=['date','role','hours','type','source_file'])
+    return corpus_loader(folder).hours()
 
 @st.cache_data(show_spinner=False)
 def load_sample_journey():
@@ -300,12 +212,25 @@ PERSONAS = {
 # DATA LOAD
 # --------------------------
 HERE = os.path.dirname(os.path.abspath(__file__))
-chats = load_conversations(HERE)
-decisions = load_decisions(HERE)
-hours = load_hours(HERE)
+if STORE_PATH:
+    store = analytics_store(STORE_PATH)
+    # Each rerun stats the shards and ingests only new or changed ones
+    store.sync(HERE, workers=LOAD_WORKERS)
+    chats = hours = None
+    # Decisions are a handful of rows and every decision view needs them all
+    decisions = store.decisions()
+    has_chats = store.count_chats() > 0
+    has_hours = store.count_hours() > 0
+else:
+    store = None
+    chats = load_conversations(HERE)
+    decisions = load_decisions(HERE)
+    hours = load_hours(HERE)
+    has_chats = not chats.empty
+    has_hours = not hours.empty
 journey_episodes = load_sample_journey()
 
-if chats.empty:
+if not has_chats:
     st.error("⚠️ No conversation JSON found. Place files like 'week03_conversation.json' next to elyx_1.py.")
     st.stop()
 
@@ -314,10 +239,14 @@ if chats.empty:
 # --------------------------
 with st.sidebar:
     st.header("Filters 📊")
-    mind = chats['timestamp'].min().date()
-    maxd = chats['timestamp'].max().date()
+    if store:
+        mind, maxd = store.date_bounds()
+        speaker_opts = store.speakers()
+    else:
+        mind = chats['timestamp'].min().date()
+        maxd = chats['timestamp'].max().date()
+        speaker_opts = sorted(chats['speaker'].dropna().unique().tolist())
     date_rng = st.date_input("🗓️ Date range", (mind, maxd))
-    speaker_opts = sorted(chats['speaker'].dropna().unique().tolist())
     pick_speakers = st.multiselect("🗣️ Speakers", options=speaker_opts, default=speaker_opts)
     kw = st.text_input("🔍 Search keyword in chats", "")
     st.markdown("---")
@@ -503,13 +432,18 @@ st.markdown(
 )
 
 # Apply filters
-mask = (chats['timestamp'].dt.date >= date_rng[0]) & (chats['timestamp'].dt.date <= date_rng[1])
-if pick_speakers:
-    mask &= chats['speaker'].isin(pick_speakers)
-if kw.strip():
-    mask &= chats['message'].astype(str).str.contains(re.escape(kw.strip()), case=False, na=False)
-
-chats_f = chats.loc[mask].sort_values('timestamp')
+if store:
+    # Pushed down to SQL; the filtered chats are fetched per view, never whole
+    chat_filters = {"start": date_rng[0], "end": date_rng[1], "speakers": pick_speakers, "keyword": kw}
+    chats_f = None
+else:
+    mask = (chats['timestamp'].dt.date >= date_rng[0]) & (chats['timestamp'].dt.date <= date_rng[1])
+    if pick_speakers:
+        mask &= chats['speaker'].isin(pick_speakers)
+    if kw.strip():
+        mask &= chats['message'].astype(str).str.contains(re.escape(kw.strip()), case=False, na=False)
+
+    chats_f = chats.loc[mask].sort_values('timestamp')
 
 # --------------------------
 # MAIN PAGE LAYOUT
@@ -541,14 +475,17 @@ if st.session_state.page == 'Summary Dashboard':
     # KPIs
     st.markdown("<h2 id='kpis-section' class='section-header'>Key Performance Indicators</h2>", unsafe_allow_html=True)
     colA, colB, colC, colD = st.columns(4)
+    n_messages = store.count_chats(**chat_filters) if store else int(chats_f.shape[0])
+    n_speakers = store.count_speakers(**chat_filters) if store else int(chats_f['speaker'].nunique())
     with colA:
         with st.container(border=True):
-            st.markdown(f"<p class='kpi-label'>💬 Messages</p><p class='kpi-value'>{int(chats_f.shape[0])}</p>", unsafe_allow_html=True)
+            st.markdown(f"<p class='kpi-label'>💬 Messages</p><p class='kpi-value'>{n_messages}</p>", unsafe_allow_html=True)
     with colB:
         with st.container(border=True):
-            st.markdown(f"<p class='kpi-label'>🗣️ Unique Speakers</p><p class='kpi-value'>{int(chats_f['speaker'].nunique())}</p>", unsafe_allow_html=True)
+            st.markdown(f"<p class='kpi-label'>🗣️ Unique Speakers</p><p class='kpi-value'>{n_speakers}</p>", unsafe_allow_html=True)
     with colC:
-        rt = kpi_response_times(chats_f)
+        # In store mode the reply pairing runs in SQL; no chat rows are fetched
+        rt = store.response_times(**chat_filters) if store else kpi_response_times(chats_f)
         with st.container(border=True):
             st.markdown(f"<p class='kpi-label'>⏱️ Median Response Time</p><p class='kpi-value'>{f'{rt['median_minutes']:.0f} min' if rt['count'] else '—'}</p>", unsafe_allow_html=True)
     with colD:
@@ -608,7 +545,10 @@ if st.session_state.page == 'Summary Dashboard':
     # TIMELINE (message volume per day + optional hours overlay)
     # ---
     st.markdown("<h2 class='section-header'>Activity Timeline</h2>", unsafe_allow_html=True)
-    msg_daily = chats_f.groupby(chats_f['timestamp'].dt.date).size().reset_index(name='messages')
+    if store:
+        msg_daily = store.daily_counts(**chat_filters)
+    else:
+        msg_daily = chats_f.groupby(chats_f['timestamp'].dt.date).size().reset_index(name='messages')
     fig1 = px.bar(msg_daily, x='timestamp', y='messages', color_discrete_sequence=[primary_color])
     fig1.update_layout(
         margin=dict(l=0,r=0,t=0,b=0),
@@ -627,7 +567,12 @@ elif st.session_state.page == 'Detailed Journey':
     # WEEKLY SUMMARY
     # ---
     st.markdown("<h2 class='section-header'>Weekly Decisions & Discussions Summary</h2>", unsafe_allow_html=True)
-    weekly_summary_table = derive_weekly_discussions_summary(chats, decisions)
+    if store:
+        # Only the chats some decision refers to take part in the join
+        decision_refs = [r for refs in decisions['reason_refs'] for r in extract_refs(str(refs))]
+        weekly_summary_table = derive_weekly_discussions_summary(store.chats_by_refs(decision_refs), decisions)
+    else:
+        weekly_summary_table = derive_weekly_discussions_summary(chats, decisions)
     if not weekly_summary_table.empty:
         st.caption("This table links key decisions to the chat conversations that informed them, providing a weekly overview of important discussions.")
         st.dataframe(weekly_summary_table, use_container_width=True, height=300)
@@ -639,12 +584,18 @@ elif st.session_state.page == 'Detailed Journey':
     # ---
     st.markdown("<h2 class='section-header'>Daily Situation Snapshot</h2>", unsafe_allow_html=True)
 
-    all_days = chats['timestamp'].dt.date.unique()
-    default_day = all_days[-1] if all_days.size else datetime.now().date()
+    if store:
+        default_day = store.date_bounds()[1] or datetime.now().date()
+    else:
+        all_days = chats['timestamp'].dt.date.unique()
+        default_day = all_days[-1] if all_days.size else datetime.now().date()
     pick_day = st.date_input("🗓️ Pick a day", default_day)
 
-    day_mask = chats['timestamp'].dt.date == pick_day
-    day_chats = chats.loc[day_mask].sort_values("timestamp")
+    if store:
+        day_chats = store.chats(start=pick_day, end=pick_day)
+    else:
+        day_mask = chats['timestamp'].dt.date == pick_day
+        day_chats = chats.loc[day_mask].sort_values("timestamp")
 
     left, right = st.columns([1.8, 1])
     with left:
@@ -672,8 +623,8 @@ elif st.session_state.page == 'Detailed Journey':
                 else:
                     st.dataframe(day_decs[['date','decision','category','owner','status','source_file']], use_container_width=True, height=180)
         st.markdown("---")
-        if not hours.empty:
-            day_hours = hours[hours['date'] == pick_day]
+        if has_hours:
+            day_hours = store.hours(pick_day, pick_day) if store else hours[hours['date'] == pick_day]
             with st.container(border=True):
                 st.subheader("⏱️ Internal hours on this day")
                 if day_hours.empty:
@@ -707,7 +658,7 @@ elif st.session_state.page == 'Detailed Journey':
                     """, unsafe_allow_html=True)
                 refs = extract_refs(str(picked_row.get('reason_refs', '')))
                 if refs:
-                    ctx = chats[chats['ref_id'].isin(refs)].sort_values('timestamp')
+                    ctx = store.chats_by_refs(refs) if store else chats[chats['ref_id'].isin(refs)].sort_values('timestamp')
                     if not ctx.empty:
                         st.write("**Reasoning context (from chats referenced in decision):**")
                         st.dataframe(ctx[['timestamp','speaker','ref_id','message','source_file']], use_container_width=True, height=220)
@@ -722,10 +673,14 @@ elif st.session_state.page == 'Internal Metrics & Personas':
     # ---
     st.markdown("<h2 class='section-header'>Internal Effort & Metrics</h2>", unsafe_allow_html=True)
 
-    if hours.empty:
+    if not has_hours:
         st.caption("Place an hours CSV (e.g., hours.csv or week06_hours.csv with columns date,role,hours,type).")
     else:
-        hrs_rng = hours[hours['date'].between(date_rng[0], date_rng[1])] if isinstance(date_rng, tuple) else hours
+        if store:
+            # Summed per day and role in SQL, which is all the chart shows
+            hrs_rng = store.hours_daily(*date_rng) if isinstance(date_rng, tuple) else store.hours_daily()
+        else:
+            hrs_rng = hours[hours['date'].between(date_rng[0], date_rng[1])] if isinstance(date_rng, tuple) else hours
         if hrs_rng.empty:
             st.caption("No hours recorded for the selected range.")
         else:
@@ -745,16 +700,23 @@ elif st.session_state.page == 'Internal Metrics & Personas':
             with col2:
                 with st.container(border=True):
                     st.subheader("Total hours by role")
-                    by_role = hrs_rng.groupby("role", as_index=False)['hours'].sum().sort_values('hours', ascending=False)
+                    if store:
+                        by_role = store.hours_by_role(*date_rng) if isinstance(date_rng, tuple) else store.hours_by_role()
+                    else:
+                        by_role = hrs_rng.groupby("role", as_index=False)['hours'].sum().sort_values('hours', ascending=False)
                     st.dataframe(by_role, use_container_width=True, height=260)
 
     # ---
     # PERSONA DASHBOARD
     # ---
     st.markdown("<h2 class='section-header'>Personas & Participation</h2>", unsafe_allow_html=True)
-    speakers_seen = chats['speaker'].dropna()
-    by_speaker = speakers_seen.value_counts().reset_index()
-    by_speaker.columns = ['speaker','messages']
+    if store:
+        by_speaker = store.speaker_counts()
+        speakers_seen = by_speaker['speaker']
+    else:
+        speakers_seen = chats['speaker'].dropna()
+        by_speaker = speakers_seen.value_counts().reset_index()
+        by_speaker.columns = ['speaker','messages']
     colP1, colP2 = st.columns([1.2, 1])
     with colP1:
         figp = px.bar(by_speaker, x='speaker', y='messages', color_discrete_sequence=px.colors.qualitative.Pastel)
@@ -779,17 +741,37 @@ elif st.session_state.page == 'Internal Metrics & Personas':
 # CHAT BROWSER & EXPORT
 # ---
 st.markdown("<h2 class='section-header'>Chat Browser & Exports</h2>", unsafe_allow_html=True)
-view_cols = [c for c in ['timestamp','speaker','ref_id','episode_id','event','message','source_file'] if c in chats_f.columns]
-st.dataframe(chats_f[view_cols], use_container_width=True)
+if store:
+    # Only the visible page is fetched
+    n_rows = store.count_chats(**chat_filters)
+    n_pages = max(1, -(-n_rows // PAGE_SIZE))
+    page_no = st.number_input(f"Page (of {n_pages}, {PAGE_SIZE} rows each, {n_rows} total)",
+                              min_value=1, max_value=n_pages, value=1)
+    st.dataframe(store.chats(limit=PAGE_SIZE, offset=(page_no - 1) * PAGE_SIZE, **chat_filters),
+                 use_container_width=True)
+else:
+    view_cols = [c for c in ['timestamp','speaker','ref_id','episode_id','event','message','source_file'] if c in chats_f.columns]
+    st.dataframe(chats_f[view_cols], use_container_width=True)
 
 colD1, colD2 = st.columns(2)
 with colD1:
-    st.download_button(
-        "Download filtered chats (CSV)",
-        data=chats_f.to_csv(index=False).encode("utf-8"),
-        file_name="filtered_chats.csv",
-        mime="text/csv",
-    )
+    if store:
+        # Building the CSV reads every matching row: only do it on request,
+        # and keep it for as long as the filters stay the same
+        csv_key = repr(sorted(chat_filters.items()))
+        if st.button("Prepare filtered chats (CSV)"):
+            st.session_state.chats_csv = (csv_key, store.chats_csv(**chat_filters))
+        prepared = st.session_state.get("chats_csv")
+        chats_csv = prepared[1] if prepared and prepared[0] == csv_key else None
+    else:
+        chats_csv = chats_f.to_csv(index=False).encode("utf-8")
+    if chats_csv is not None:
+        st.download_button(
+            "Download filtered chats (CSV)",
+            data=chats_csv,
+            file_name="filtered_chats.csv",
+            mime="text/csv",
+        )
 with colD2:
     if not decisions.empty:
         st.download_button(
@@ -0,0 +1,474 @@
+# Pluggable chat backends for the week generator
+# - OllamaBackend: the real model via the ollama client (sync + async)
+# - FakeBackend: deterministic stand-in producing seeded "Speaker: message"
+#   lines, for profiling the non-LLM pipeline without a GPU or Ollama
+#
+# - PooledBackend: spreads calls over several backends (e.g. Ollama instances
+#   on different ports) with least-outstanding routing and failover
+#
+# Every backend exposes chat(model, messages) and async achat(model, messages)
+# returning an Ollama-shaped response dict: {"message": {"content": ...}, ...},
+# plus stream_chat()/astream_chat() yielding Ollama-shaped partial chunks, and
+# ping() which raises if the endpoint is unreachable.
+
+import re
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from collections import deque
+
+
+class OllamaBackend:
+    name = "ollama"
+
+    def __init__(self, host=None, timeout=None):
+        # Imported lazily so the fake backend works on boxes without ollama
+        import ollama
+        self.host = host
+        self.timeout = timeout
+        self._client = ollama.Client(host=host, timeout=timeout)
+        self._async_client = None
+
+    def ping(self):
+        self._client.list()
+
+    def chat(self, model, messages, **kwargs):
+        return self._client.chat(model=model, messages=messages, **kwargs)
+
+    async def achat(self, model, messages, **kwargs):
+        if self._async_client is None:
+            import ollama
+            self._async_client = ollama.AsyncClient(host=self.host, timeout=self.timeout)
+        return await self._async_client.chat(model=model, messages=messages, **kwargs)
+
+    def stream_chat(self, model, messages, **kwargs):
+        return self._client.chat(model=model, messages=messages, stream=True, **kwargs)
+
+    async def astream_chat(self, model, messages, **kwargs):
+        if self._async_client is None:
+            import ollama
+            self._async_client = ollama.AsyncClient(host=self.host, timeout=self.timeout)
+        return await self._async_client.chat(model=model, messages=messages, stream=True, **kwargs)
+
+
+# ------------ Fake backend ------------
+_SPEAKER_VARIANTS = [
+    "Rohan", "Rohan Patel", "Sarah", "Sarah Tan", "Ruby", "Ruby (Concierge)",
+    "Dr. Warren", "Dr Warren", "Dr. Warren (Medical)", "Advik", "Advik (Data)",
+    "Carla", "Carla (Nutrition)", "Rachel", "Rachel (Physio)", "Neel",
+]
+_PHRASES = [
+    "Can we move the blood panel to Thursday?",
+    "Results look good, LDL slightly high — let's follow up.",
+    "Booked your slot for 9am, calendar invite sent.",
+    "Flight lands at 6pm, will adjust the workout.",
+    "Tip: add 20g protein at breakfast, it helps recovery.",
+    "Checking in — how did the new routine feel?",
+    "HRV dipped last night, prioritise sleep today.",
+    "Done, resolved the app login issue.",
+    "Should we swap the evening run for mobility work?",
+    "Quick update: progress on steps is solid this week.",
+    "Urgent: BP reading flagged, please call me.",
+    "Why does fasting affect my glucose so much?",
+]
+_MALFORMED = [
+    "Here are the chat lines for today:",
+    "**{speaker}**: {text}",
+    "{n}. {speaker}: {text}",
+    "{text}",
+    "Unknown: {text}",
+    "{speaker}:",
+    "---",
+]
+_N_TURNS_RE = re.compile(r"exactly (\d+)")
+_SPEAKERS_RE = re.compile(r"Use only these speakers: (.+)\.$", re.MULTILINE)
+_DEFAULT_SPEAKERS = {"Rohan", "Sarah", "Ruby", "Dr. Warren", "Advik", "Carla", "Rachel", "Neel"}
+# Batched prompts list one '=== DAY n (date) === then exactly k lines' per day
+_DAY_PLAN_RE = re.compile(r"^(=== DAY .*?===).*?exactly (\d+)", re.MULTILINE)
+
+
+class FakeBackend:
+    """Seeded synthetic replies; output depends only on (seed, messages).
+
+    latency: seconds slept per call; malformed_rate: fraction of lines that
+    the parser should reject; drift: max +/- lines vs. the requested count.
+    parallel: calls served at once (like OLLAMA_NUM_PARALLEL; 0 = unlimited);
+    fail_rate: fraction of calls raising ConnectionError (1.0 = endpoint down).
+    """
+    name = "fake"
+
+    def __init__(self, seed=0, latency=0.0, malformed_rate=0.1, drift=3,
+                 parallel=0, fail_rate=0.0):
+        self.seed = seed
+        self.latency = latency
+        self.malformed_rate = malformed_rate
+        self.drift = drift
+        self.parallel = parallel
+        self.fail_rate = fail_rate
+        # Failures never change the output, so they need not be reproducible
+        self._fail_rng = random.Random()
+        self._slots = threading.BoundedSemaphore(parallel) if parallel else None
+        self._aslots = None
+
+    def ping(self):
+        if self.fail_rate >= 1:
+            raise ConnectionError("fake endpoint down")
+
+    def _maybe_fail(self):
+        if self.fail_rate and self._fail_rng.random() < self.fail_rate:
+            raise ConnectionError("fake endpoint failed")
+
+    def _async_slots(self):
+        if self.parallel and self._aslots is None:
+            self._aslots = asyncio.Semaphore(self.parallel)
+        return self._aslots
+
+    def _rng(self, model, messages):
+        h = hashlib.sha256(repr((self.seed, model, messages)).encode("utf-8"))
+        return random.Random(int.from_bytes(h.digest()[:8], "big"))
+
+    def _speakers(self, messages):
+        # Other members' prompts list their own member/PA names
+        m = _SPEAKERS_RE.search(messages[0]["content"]) if messages else None
+        if m:
+            names = [n.strip() for n in m.group(1).split(",")]
+            if set(names) != _DEFAULT_SPEAKERS:
+                return names
+        return _SPEAKER_VARIANTS
+
+    def _lines(self, rng, wanted, speakers=_SPEAKER_VARIANTS):
+        n = max(0, wanted + rng.randint(-self.drift, self.drift))
+        lines = []
+        for i in range(n):
+            speaker = rng.choice(speakers)
+            text = rng.choice(_PHRASES)
+            if rng.random() < self.malformed_rate:
+                lines.append(rng.choice(_MALFORMED).format(
+                    speaker=speaker, text=text, n=i + 1))
+            else:
+                lines.append(f"{speaker}: {text}")
+        return lines
+
+    def _reply(self, model, messages):
+        rng = self._rng(model, messages)
+        prompt = messages[-1]["content"]
+        speakers = self._speakers(messages)
+        plan = _DAY_PLAN_RE.findall(prompt)
+        if plan:
+            lines = []
+            for header, wanted in plan:
+                lines.append(header)
+                lines.extend(self._lines(rng, int(wanted), speakers))
+        else:
+            m = _N_TURNS_RE.search(prompt)
+            lines = self._lines(rng, int(m.group(1)) if m else 12, speakers)
+        content = "\n".join(lines)
+        prompt_tokens = sum(len(msg["content"]) for msg in messages) // 4
+        eval_tokens = len(content) // 4
+        duration = int(self.latency * 1e9)
+        return {
+            "model": model,
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": duration // 4,
+            "eval_count": eval_tokens,
+            "eval_duration": duration - duration // 4,
+            "load_duration": 0,
+            "total_duration": duration,
+        }
+
+    def chat(self, model, messages, **kwargs):
+        self._maybe_fail()
+        if self._slots:
+            with self._slots:
+                time.sleep(self.latency)
+        elif self.latency:
+            time.sleep(self.latency)
+        return self._reply(model, messages)
+
+    async def achat(self, model, messages, **kwargs):
+        self._maybe_fail()
+        slots = self._async_slots()
+        if slots:
+            async with slots:
+                await asyncio.sleep(self.latency)
+        elif self.latency:
+            await asyncio.sleep(self.latency)
+        return self._reply(model, messages)
+
+    def _chunks(self, reply):
+        # ~4 characters per "token", latency spread evenly across them
+        content = reply["message"]["content"]
+        pieces = [content[i:i + 4] for i in range(0, len(content), 4)] or [""]
+        delay = self.latency / len(pieces)
+        for piece in pieces:
+            yield delay, {"model": reply["model"], "done": False,
+                          "message": {"role": "assistant", "content": piece}}
+        final = dict(reply, message={"role": "assistant", "content": ""})
+        yield 0.0, final
+
+    def stream_chat(self, model, messages, **kwargs):
+        self._maybe_fail()
+        return self._stream(self._reply(model, messages))
+
+    def _stream(self, reply):
+        # Holds a slot until the caller finishes or closes the stream
+        if self._slots:
+            self._slots.acquire()
+        try:
+            for delay, chunk in self._chunks(reply):
+                if delay:
+                    time.sleep(delay)
+                yield chunk
+        finally:
+            if self._slots:
+                self._slots.release()
+
+    async def astream_chat(self, model, messages, **kwargs):
+        self._maybe_fail()
+        return self._astream(self._reply(model, messages))
+
+    async def _astream(self, reply):
+        slots = self._async_slots()
+        if slots:
+            await slots.acquire()
+        try:
+            for delay, chunk in self._chunks(reply):
+                if delay:
+                    await asyncio.sleep(delay)
+                yield chunk
+        finally:
+            if slots:
+                slots.release()
+
+
+# ------------ Endpoint pool ------------
+class _Endpoint:
+    def __init__(self, backend, label):
+        self.backend = backend
+        self.label = label
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=1000)
+        self.down_until = 0.0  # 0.0 = healthy
+        self.probing = False
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+
+class PooledBackend:
+    """Spreads calls across several backends of the same model.
+
+    Each call goes to the healthy endpoint with the fewest requests in
+    flight. A failed call marks its endpoint down for retry_after seconds and
+    is retried on the next endpoint (streams only until the first chunk has
+    been passed on). Once the window expires the endpoint is pinged before it
+    gets traffic again, so a live request is never the probe: a failed ping
+    starts a new window. When every endpoint is down, calls go to them anyway.
+    """
+
+    def __init__(self, backends, retry_after=30.0):
+        if not backends:
+            raise ValueError("PooledBackend needs at least one backend")
+        self.name = backends[0].name
+        self.retry_after = retry_after
+        self.endpoints = [
+            _Endpoint(b, getattr(b, "host", None) or f"{b.name}{i}")
+            for i, b in enumerate(backends)]
+        self._lock = threading.Lock()
+
+    def check_health(self):
+        """Ping every endpoint; returns the labels of those that are down."""
+        down = []
+        for ep in self.endpoints:
+            try:
+                ep.backend.ping()
+                with self._lock:
+                    ep.down_until = 0.0
+            except Exception:
+                with self._lock:
+                    ep.down_until = time.monotonic() + self.retry_after
+                down.append(ep.label)
+        return down
+
+    def ping(self):
+        if len(self.check_health()) == len(self.endpoints):
+            raise ConnectionError("no endpoint in the pool is reachable")
+
+    def _pick(self, tried):
+        """(endpoint to call, None), or (None, endpoint to probe first)."""
+        with self._lock:
+            now = time.monotonic()
+            left = [ep for ep in self.endpoints if ep not in tried]
+            if not left:
+                raise ConnectionError("every endpoint in the pool failed")
+            for ep in left:
+                if 0.0 < ep.down_until <= now and not ep.probing:
+                    ep.probing = True
+                    return None, ep
+            live = [ep for ep in left if not ep.down_until] or left
+            ep = min(live, key=lambda e: (e.outstanding, e.requests))
+            ep.outstanding += 1
+            return ep, None
+
+    def _probe(self, ep):
+        try:
+            ep.backend.ping()
+            ok = True
+        except Exception:
+            ok = False
+        with self._lock:
+            ep.probing = False
+            ep.down_until = 0.0 if ok else time.monotonic() + self.retry_after
+
+    def _acquire(self, tried):
+        while True:
+            ep, due = self._pick(tried)
+            if ep:
+                return ep
+            self._probe(due)
+
+    async def _aacquire(self, tried):
+        while True:
+            ep, due = self._pick(tried)
+            if ep:
+                return ep
+            # ping() is blocking I/O; keep it off the event loop
+            await asyncio.to_thread(self._probe, due)
+
+    def _release(self, ep, t0, ok):
+        with self._lock:
+            ep.outstanding -= 1
+            ep.requests += 1
+            if ok:
+                ep.latencies.append(time.perf_counter() - t0)
+                ep.down_until = 0.0
+            else:
+                ep.errors += 1
+                ep.down_until = time.monotonic() + self.retry_after
+
+    def chat(self, model, messages, **kwargs):
+        tried = []
+        while True:
+            ep = self._acquire(tried)
+            t0 = time.perf_counter()
+            try:
+                resp = ep.backend.chat(model, messages, **kwargs)
+            except Exception:
+                self._release(ep, t0, False)
+                tried.append(ep)
+                if len(tried) == len(self.endpoints):
+                    raise
+                continue
+            self._release(ep, t0, True)
+            return resp
+
+    async def achat(self, model, messages, **kwargs):
+        tried = []
+        while True:
+            ep = await self._aacquire(tried)
+            t0 = time.perf_counter()
+            try:
+                resp = await ep.backend.achat(model, messages, **kwargs)
+            except Exception:
+                self._release(ep, t0, False)
+                tried.append(ep)
+                if len(tried) == len(self.endpoints):
+                    raise
+                continue
+            self._release(ep, t0, True)
+            return resp
+
+    def stream_chat(self, model, messages, **kwargs):
+        tried = []
+        while True:
+            ep = self._acquire(tried)
+            t0 = time.perf_counter()
+            inner, started = None, False
+            try:
+                inner = ep.backend.stream_chat(model, messages, **kwargs)
+                for chunk in inner:
+                    started = True
+                    yield chunk
+            except GeneratorExit:
+                # Caller stopped early (n_turns reached): not a failure
+                self._release(ep, t0, True)
+                raise
+            except Exception:
+                self._release(ep, t0, False)
+                tried.append(ep)
+                if started or len(tried) == len(self.endpoints):
+                    raise
+                continue
+            finally:
+                if inner is not None and hasattr(inner, "close"):
+                    inner.close()
+            self._release(ep, t0, True)
+            return
+
+    async def astream_chat(self, model, messages, **kwargs):
+        return self._astream(model, messages, kwargs)
+
+    async def _astream(self, model, messages, kwargs):
+        tried = []
+        while True:
+            ep = await self._aacquire(tried)
+            t0 = time.perf_counter()
+            inner, started = None, False
+            try:
+                inner = await ep.backend.astream_chat(model, messages, **kwargs)
+                async for chunk in inner:
+                    started = True
+                    yield chunk
+            except GeneratorExit:
+                self._release(ep, t0, True)
+                raise
+            except Exception:
+                self._release(ep, t0, False)
+                tried.append(ep)
+                if started or len(tried) == len(self.endpoints):
+                    raise
+                continue
+            finally:
+                if inner is not None and hasattr(inner, "aclose"):
+                    await inner.aclose()
+            self._release(ep, t0, True)
+            return
+
+    def stats(self) -> dict:
+        """Per-endpoint request counts and latency (seconds) over the last 1000 calls."""
+        out = {}
+        with self._lock:
+            for ep in self.endpoints:
+                lat = list(ep.latencies)
+                out[ep.label] = {
+                    "requests": ep.requests,
+                    "errors": ep.errors,
+                    "outstanding": ep.outstanding,
+                    "healthy": ep.down_until <= time.monotonic(),
+                    "mean_s": round(sum(lat) / len(lat), 4) if lat else None,
+                    "p50_s": round(_percentile(lat, 0.5), 4) if lat else None,
+                    "p95_s": round(_percentile(lat, 0.95), 4) if lat else None,
+                }
+        return out
+
+
+BACKENDS = {
+    "ollama": OllamaBackend,
+    "fake": FakeBackend,
+}
+
+
+def get_backend(name="ollama", **kwargs):
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown backend '{name}'; choose from {sorted(BACKENDS)}")
+    return cls(**kwargs)
@@ -0,0 +1,192 @@
+# Multi-member journey generation
+# - Fans (member, week) jobs out over a process pool
+# - Jobs are spread round-robin over one or more Ollama endpoints
+# - Output is sharded per member: <out-dir>/<member_id>/elyx_weekN_communications.json
+#   (or .jsonl[.gz|.zst] with --format jsonl), plus that dir's elyx_manifest.jsonl
+# - With --continuity each member's weeks become one chained job, run in week
+#   order, so later weeks see a summary of earlier ones (members still in parallel)
+# - Workers share the response cache file (see elyx_cache); their --metrics
+#   records come back with each result and only the parent appends them
+#
+# Usage:
+#   python elyx_members.py synth --n 200
+#   python elyx_batch.py --members data/members_synth --weeks 1-4 --processes 8 \
+#       --hosts http://gpu1:11434,http://gpu2:11434
+#   python elyx_batch.py --members data/members --backend fake --no-cache   # no Ollama needed
+
+import os
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from elyx_backends import get_backend
+from elyx_cache import ResponseCache, DEFAULT_CACHE_PATH
+from elyx_continuity import ContinuityStore, DEFAULT_BUDGET_TOKENS
+from elyx_engine import MODEL, WEEK_CONFIGS, WeekGenerator, parse_weeks, parse_keep_alive
+from elyx_members import DATA_DIR, load_member, member_paths
+from elyx_metrics import MetricsBuffer, MetricsLog
+from elyx_prompt import LEVELS, PromptBudget
+from elyx_sink import make_sink
+
+# Per-process state: clients, cache handle and parsed members are reused
+# across the jobs a worker runs
+_WORKER = {"backends": {}, "members": {}, "cache": None}
+
+
+def _backend(job):
+    host = job["host"]
+    if host not in _WORKER["backends"]:
+        if job["backend"] == "fake":
+            _WORKER["backends"][host] = get_backend("fake", **job["fake"])
+        else:
+            _WORKER["backends"][host] = get_backend("ollama", host=host)
+    return _WORKER["backends"][host]
+
+
+def _member(path):
+    if path not in _WORKER["members"]:
+        _WORKER["members"][path] = load_member(path)
+    return _WORKER["members"][path]
+
+
+def _cache(job):
+    if job["cache"] and _WORKER["cache"] is None:
+        _WORKER["cache"] = ResponseCache(job["cache"], max_bytes=job["cache_max_bytes"])
+    return _WORKER["cache"]
+
+
+def run_job(job):
+    """Worker entry point: generate a member's week(s) in order and write
+    their shards; returns one result per week."""
+    member = _member(job["member_path"])
+    out_dir = os.path.join(job["out_dir"], member.id)
+    sink = make_sink(job["format"], out_dir, job["compression"])
+    gen = WeekGenerator(
+        _backend(job), job["model"], _cache(job),
+        checkpoint_dir=os.path.join(out_dir, ".checkpoints"), resume=job["resume"],
+        metrics=MetricsBuffer() if job["metrics"] else None,
+        topup=job["topup"], batch_days=job["batch_days"],
+        keep_alive=job["keep_alive"], member=member,
+        continuity=ContinuityStore(os.path.join(out_dir, ".continuity"), job["continuity_budget"])
+        if job["continuity"] else None,
+        prompt=PromptBudget(job["prompt_budget"], job["prompt_level"])
+        if job["prompt_budget"] or job["prompt_level"] != "full" else None)
+    results = []
+    for week in job["weeks"]:
+        t0 = time.perf_counter()
+        over = gen.prompt.over_budget if gen.prompt else 0
+        with sink.open_week(week, gen.config_hash(week)) as writer:
+            gen.generate_week(week, writer)
+        gen.close_checkpoint(week)
+        results.append({"member": member.id, "week": week, "host": job["host"],
+                        "path": writer.path, "lines": writer.messages,
+                        "seconds": time.perf_counter() - t0,
+                        "over_budget": (gen.prompt.over_budget if gen.prompt else 0) - over,
+                        "metrics": gen.metrics.drain() if gen.metrics else []})
+    return results
+
+
+def plan_jobs(paths, weeks, hosts, chain=False, **common):
+    """One job per (member, week), members outermost so each member's shard
+    directory fills in week order; chain=True makes one job per member that
+    runs its weeks in order. Hosts assigned round-robin."""
+    jobs = []
+    for path in paths:
+        for group in ([weeks] if chain else [[w] for w in weeks]):
+            jobs.append(dict(common, member_path=path, weeks=group,
+                             host=hosts[len(jobs) % len(hosts)]))
+    return jobs
+
+
+def run_jobs(jobs, processes=None, metrics=None):
+    """Run jobs on a process pool; returns (results, failures). metrics: a
+    MetricsLog for the records the workers send back."""
+    results, failures = [], []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {pool.submit(run_job, job): job for job in jobs}
+        for fut in as_completed(futures):
+            job = futures[fut]
+            try:
+                for res in fut.result():
+                    records = res.pop("metrics")
+                    if metrics and records:
+                        metrics.extend(records)
+                    results.append(res)
+                    print(f"✅ Generated: {res['path']} ({res['lines']} lines, {res['seconds']:.1f}s, {res['host']})")
+            except Exception as e:
+                failures.append(job)
+                weeks = ",".join(map(str, job["weeks"]))
+                print(f"[WARN] {os.path.basename(job['member_path'])} week {weeks} failed: {e}")
+    return results, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate week chats for many members.")
+    parser.add_argument("--members", default=os.path.join(DATA_DIR, "members"),
+                        help="Member profile dir, file or glob")
+    parser.add_argument("--weeks", default=f"1-{max(WEEK_CONFIGS)}")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--hosts", default="",
+                        help="Comma-separated Ollama endpoints (default: local)")
+    parser.add_argument("--out-dir", default="members_out")
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--format", default="json", choices=["json", "jsonl"])
+    parser.add_argument("--compression", default=None, choices=["gzip", "zstd"])
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--cache-max-mb", type=int, default=256)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--metrics", default=None, help="Append per-call telemetry JSONL here")
+    parser.add_argument("--topup", type=int, default=0)
+    parser.add_argument("--batch-days", type=int, default=1)
+    parser.add_argument("--keep-alive", default=None)
+    parser.add_argument("--continuity", action="store_true",
+                        help="Carry a summary of earlier weeks forward (per-member week order)")
+    parser.add_argument("--continuity-budget", type=int, default=DEFAULT_BUDGET_TOKENS)
+    parser.add_argument("--prompt-level", default="full", choices=LEVELS)
+    parser.add_argument("--prompt-budget", type=int, default=None,
+                        help="Per-call prompt token budget (see elyx_prompt)")
+    parser.add_argument("--backend", default="ollama", choices=["ollama", "fake"])
+    parser.add_argument("--fake-latency", type=float, default=0.0)
+    parser.add_argument("--fake-malformed-rate", type=float, default=0.1)
+    parser.add_argument("--fake-drift", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    paths = member_paths(args.members)
+    if not paths:
+        print(f"[WARN] No member profiles found at {args.members}")
+        return
+    hosts = [h.strip() for h in args.hosts.split(",") if h.strip()] or [None]
+    jobs = plan_jobs(
+        paths, parse_weeks(args.weeks), hosts, chain=args.continuity,
+        backend=args.backend, model=args.model, out_dir=args.out_dir,
+        format=args.format, compression=args.compression,
+        fake={"latency": args.fake_latency, "malformed_rate": args.fake_malformed_rate,
+              "drift": args.fake_drift},
+        cache=None if args.no_cache else args.cache,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        resume=args.resume, metrics=args.metrics, topup=args.topup,
+        batch_days=args.batch_days, keep_alive=parse_keep_alive(args.keep_alive),
+        continuity=args.continuity, continuity_budget=args.continuity_budget,
+        prompt_level=args.prompt_level, prompt_budget=args.prompt_budget)
+
+    t0 = time.perf_counter()
+    results, failures = run_jobs(jobs, args.processes,
+                                 MetricsLog(args.metrics) if args.metrics else None)
+    elapsed = time.perf_counter() - t0
+    lines = sum(r["lines"] for r in results)
+    print(f"Done: {len(results)}/{sum(len(j['weeks']) for j in jobs)} member-weeks, {len(paths)} members, "
+          f"{lines} lines in {elapsed:.1f}s ({len(results) / elapsed:.2f} jobs/s, "
+          f"{lines / elapsed:.0f} lines/s)")
+    print(f"Per host: {dict(Counter(str(r['host']) for r in results))}")
+    over = sum(r["over_budget"] for r in results)
+    if over:
+        print(f"[WARN] {over} member-week prompt(s) over the {args.prompt_budget} token "
+              f"budget even at level '{LEVELS[-1]}'")
+    if failures:
+        print(f"[WARN] {len(failures)} job(s) failed; rerun with --resume")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+# Generation pipeline benchmark
+# - Drives N synthetic member-weeks through WeekGenerator itself, so the
+#   cache, streaming, top-up and batching paths are the ones the engine runs
+# - Stages: plan, model (time inside the backend), parse (speaker-regex line
+#   splitting), fit, timestamp, classify, serialize (sink writes) and process
+#   (the remainder: top-up requests, cache, checkpoint and metrics bookkeeping)
+# - Reports stage wall time, lines/sec, parse yield, filler ratio, cache hits
+#   and peak RSS as one JSON object, so runs can be diffed between releases
+#
+# Usage:
+#   python elyx_bench.py --weeks 64                        # fake backend
+#   python elyx_bench.py --weeks 64 --fake-latency 0.02 --out bench.json
+#   python elyx_bench.py --weeks 32 --stream --topup 2 --batch-days 7
+#   python elyx_bench.py --weeks 32 --cache --passes 2     # cold then warm cache
+#   python elyx_bench.py --weeks 8 --backend ollama --label "llama3 cpu"
+#
+# Weeks past 32 cycle through the week configs with synthetic members, so
+# every week has distinct prompts. Weeks run one at a time so the stage times
+# add up to the wall time.
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+from collections import defaultdict
+from elyx_engine import MODEL, WEEK_CONFIGS, WeekGenerator, make_backend
+from elyx_cache import ResponseCache
+from elyx_members import Member, synth_member
+from elyx_metrics import MetricsLog, read_metrics, summarize
+from elyx_sink import make_sink
+
+STAGES = ["plan", "model", "parse", "fit", "timestamp", "classify", "process", "serialize"]
+
+
+class _TimedStream:
+    """Wraps a streaming reply; time spent waiting on chunks counts as model time."""
+
+    def __init__(self, stream, timer):
+        self._stream = stream
+        self._timer = timer
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        t = time.perf_counter()
+        try:
+            return next(self._stream)
+        finally:
+            self._timer["model"] += time.perf_counter() - t
+
+    def close(self):
+        self._stream.close()
+
+
+class _TimedBackend:
+    """Backend proxy that adds the time spent inside chat calls to timer["model"]."""
+
+    def __init__(self, backend, timer):
+        self._backend = backend
+        self._timer = timer
+        self.name = backend.name
+
+    def chat(self, model, messages, **kwargs):
+        t = time.perf_counter()
+        try:
+            return self._backend.chat(model=model, messages=messages, **kwargs)
+        finally:
+            self._timer["model"] += time.perf_counter() - t
+
+    def stream_chat(self, model, messages, **kwargs):
+        t = time.perf_counter()
+        stream = self._backend.stream_chat(model=model, messages=messages, **kwargs)
+        self._timer["model"] += time.perf_counter() - t
+        return _TimedStream(stream, self._timer)
+
+
+class _TimedWriter:
+    def __init__(self, writer, timer, counts):
+        self._writer = writer
+        self._timer = timer
+        self._counts = counts
+        self.path = writer.path
+
+    def write_day(self, day, items):
+        t = time.perf_counter()
+        self._writer.write_day(day, items)
+        self._timer["serialize"] += time.perf_counter() - t
+        self._counts["days"] += 1
+        self._counts["output_lines"] += len(items)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        t = time.perf_counter()
+        try:
+            return self._writer.__exit__(*exc)
+        finally:
+            self._timer["serialize"] += time.perf_counter() - t
+
+
+class _TimedSink:
+    def __init__(self, sink, timer, counts):
+        self._sink = sink
+        self._timer = timer
+        self._counts = counts
+
+    def open_week(self, week, config_hash=None):
+        return _TimedWriter(self._sink.open_week(week, config_hash), self._timer, self._counts)
+
+
+class _TimedGenerator(WeekGenerator):
+    """WeekGenerator whose plan and per-day stage methods add to the timer.
+    write_week plans once per week, so plan time is not double counted."""
+
+    def __init__(self, timer, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._timer = timer
+
+    def _timed(self, stage, fn, *args, **kwargs):
+        t = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._timer[stage] += time.perf_counter() - t
+
+    def plan_week(self, week):
+        return self._timed("plan", super().plan_week, week)
+
+    def _parse(self, raw):
+        return self._timed("parse", super()._parse, raw)
+
+    def _parse_line(self, line):
+        return self._timed("parse", super()._parse_line, line)
+
+    def _fit(self, parsed, n_turns):
+        return self._timed("fit", super()._fit, parsed, n_turns)
+
+    def _timestamp(self, parsed, timestamps, start=0):
+        return self._timed("timestamp", super()._timestamp, parsed, timestamps, start)
+
+    def _classify(self, items, week):
+        return self._timed("classify", super()._classify, items, week)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def bench_jobs(n_weeks, seed=0):
+    """(week, member) pairs: the 32 configured weeks for the built-in member,
+    then again for synthetic members."""
+    weeks = sorted(WEEK_CONFIGS)
+    rng = random.Random(seed)
+    jobs, member = [], None
+    for i in range(n_weeks):
+        if i and i % len(weeks) == 0:
+            member = Member(synth_member(i // len(weeks), rng))
+        jobs.append((weeks[i % len(weeks)], member))
+    return jobs
+
+
+def run_bench(n_weeks, backend, model=MODEL, fmt="json", compression=None, seed=0,
+              stream=False, topup=0, batch_days=1, cache=False, passes=1):
+    """Run the bench jobs `passes` times through WeekGenerator.write_week.
+    With cache=True every pass shares one fresh response cache, so pass 2
+    onwards measures the warm-cache path."""
+    timer = defaultdict(float)
+    counts = defaultdict(int)
+    jobs = bench_jobs(n_weeks, seed)
+    timed = _TimedBackend(backend, timer)
+    pass_walls = []
+    with tempfile.TemporaryDirectory(prefix="elyx_bench_") as tmp:
+        rc = ResponseCache(os.path.join(tmp, "cache.sqlite")) if cache else None
+        metrics_path = os.path.join(tmp, "metrics.jsonl")
+        metrics = MetricsLog(metrics_path)
+        generators = {}
+        for p in range(passes):
+            sink = _TimedSink(make_sink(fmt, os.path.join(tmp, f"pass{p}"), compression),
+                              timer, counts)
+            t_pass = time.perf_counter()
+            for week, member in jobs:
+                gen = generators.get(member)
+                if gen is None:
+                    gen = generators[member] = _TimedGenerator(
+                        timer, timed, model, rc, stream, metrics=metrics, topup=topup,
+                        batch_days=batch_days, member=member)
+                gen.write_week(week, sink)
+            pass_walls.append(time.perf_counter() - t_pass)
+        records = list(read_metrics(metrics_path))
+        cache_stats = rc.stats() if rc else None
+        if rc:
+            rc.close()
+    wall = sum(pass_walls)
+    timer["process"] = max(0.0, wall - sum(timer[s] for s in STAGES if s != "process"))
+
+    summary = summarize(records).get("all", {}) if records else {}
+    raw_lines = sum(r["raw_lines"] for r in records)
+    valid_lines = sum(r["valid_lines"] for r in records)
+    out_lines = counts["output_lines"]
+    filler = summary.get("filler", 0)
+    pipeline = wall - timer["model"]
+    return {
+        "label": None,
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": backend.name,
+        "model": model,
+        "format": fmt + (f"+{compression}" if compression else ""),
+        "stream": stream,
+        "topup": topup,
+        "batch_days": batch_days,
+        "weeks": len(jobs),
+        "passes": passes,
+        "days": counts["days"],
+        "calls": summary.get("calls", 0),
+        "cache_hits": summary.get("cache_hits", 0),
+        "topup_calls": summary.get("topup_calls", 0),
+        "raw_lines": raw_lines,
+        "valid_lines": valid_lines,
+        "output_lines": out_lines,
+        "filler": filler,
+        "parse_yield": round(valid_lines / raw_lines, 4) if raw_lines else None,
+        "filler_ratio": round(filler / out_lines, 4) if out_lines else None,
+        "cache": cache_stats,
+        "stages_s": {s: round(timer[s], 4) for s in STAGES},
+        "stage_share": {s: round(timer[s] / wall, 4) for s in STAGES} if wall else {},
+        "pass_wall_s": [round(w, 4) for w in pass_walls],
+        "wall_s": round(wall, 4),
+        "lines_per_s": round(out_lines / wall, 1) if wall else None,
+        # Throughput of everything except the model call: the part this repo owns
+        "pipeline_lines_per_s": round(out_lines / pipeline, 1) if pipeline > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the week generation pipeline.")
+    parser.add_argument("--weeks", type=int, default=32, help="Synthetic member-weeks to run")
+    parser.add_argument("--label", default=None, help="Free-form tag stored in the result")
+    parser.add_argument("--out", default=None, help="Also write the JSON result here")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--format", default="json", choices=["json", "jsonl"])
+    parser.add_argument("--compression", default=None, choices=["gzip", "zstd"])
+    parser.add_argument("--stream", action="store_true", help="Stream each day's reply")
+    parser.add_argument("--topup", type=int, default=0, help="Top-up requests per short day")
+    parser.add_argument("--batch-days", type=int, default=1, help="Days per model call")
+    parser.add_argument("--cache", action="store_true",
+                        help="Use a fresh response cache shared by all passes")
+    parser.add_argument("--passes", type=int, default=1,
+                        help="Run the jobs this many times (with --cache: cold, then warm)")
+    parser.add_argument("--backend", default="fake", choices=["ollama", "fake"])
+    parser.add_argument("--hosts", default="")
+    parser.add_argument("--timeout", type=float, default=None)
+    parser.add_argument("--fake-endpoints", type=int, default=1)
+    parser.add_argument("--fake-parallel", type=int, default=0)
+    parser.add_argument("--fake-fail-rate", type=float, default=0.0)
+    parser.add_argument("--fake-latency", type=float, default=0.0)
+    parser.add_argument("--fake-malformed-rate", type=float, default=0.1)
+    parser.add_argument("--fake-drift", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    result = run_bench(args.weeks, make_backend(args), args.model, args.format,
+                       args.compression, args.seed, args.stream, args.topup,
+                       args.batch_days, args.cache, max(1, args.passes))
+    result["label"] = args.label
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
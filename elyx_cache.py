@@ -0,0 +1,139 @@
+# Content-addressed on-disk cache for LLM responses
+# - Key: sha256 over (model, messages, sampling options)
+# - Stored in a local SQLite file; least-recently-used rows evicted past max_bytes
+# - Hit/miss counters for end-of-run reporting
+# - Safe to share between processes (elyx_batch workers): the byte total lives
+#   in the database, kept by triggers, and writers wait on each other's locks
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_CACHE_PATH = ".elyx_llm_cache.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+BUSY_TIMEOUT_S = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_used);
+CREATE TABLE IF NOT EXISTS cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_size VALUES (0, (SELECT COALESCE(SUM(size), 0) FROM responses));
+CREATE TRIGGER IF NOT EXISTS responses_added AFTER INSERT ON responses
+BEGIN UPDATE cache_size SET bytes = bytes + NEW.size; END;
+CREATE TRIGGER IF NOT EXISTS responses_resized AFTER UPDATE OF size ON responses
+BEGIN UPDATE cache_size SET bytes = bytes + NEW.size - OLD.size; END;
+CREATE TRIGGER IF NOT EXISTS responses_removed AFTER DELETE ON responses
+BEGIN UPDATE cache_size SET bytes = bytes - OLD.size; END;
+"""
+
+
+def cache_key(model: str, messages, options=None) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages, "options": options or {}},
+        sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Autocommit; writes that must be atomic open their own transaction
+        self._db = sqlite3.connect(path, timeout=BUSY_TIMEOUT_S,
+                                   isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with _Transaction(self._db):
+            for stmt in _SCHEMA.split(";\n"):
+                if stmt.strip():
+                    self._db.execute(stmt)
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, content: str):
+        size = len(content.encode("utf-8"))
+        with self._lock, _Transaction(self._db):
+            # An upsert, not INSERT OR REPLACE: the replace's implicit delete
+            # would skip the trigger that keeps cache_size
+            self._db.execute(
+                "INSERT INTO responses (key, content, size, last_used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET content = excluded.content, "
+                "size = excluded.size, last_used = excluded.last_used",
+                (key, content, size, time.time()))
+            # The total every process has written, not just this one
+            if self._total() > self.max_bytes:
+                self._evict()
+
+    def _total(self):
+        return self._db.execute("SELECT bytes FROM cache_size").fetchone()[0]
+
+    def _evict(self):
+        # Trim to 90% of the budget so every put past the limit doesn't evict again
+        target = int(self.max_bytes * 0.9)
+        total = self._total()
+        rows = self._db.execute(
+            "SELECT key, size FROM responses ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if total <= target:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+            "bytes": self.size(),
+        }
+
+    def size(self) -> int:
+        with self._lock:
+            return self._total()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back on error. IMMEDIATE takes the
+    write lock up front, so a read-then-write can't be overtaken by another
+    process between the two."""
+
+    def __init__(self, db):
+        self._db = db
+
+    def __enter__(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        return self._db
+
+    def __exit__(self, exc_type, *exc):
+        self._db.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
@@ -0,0 +1,64 @@
+# Day-granularity checkpoints for week generation
+# - Each finished day is appended as one JSONL record and fsync'd
+# - Records carry the week's config hash; resume only reuses matching days
+# - A torn trailing line (process killed mid-write) is ignored on load
+
+import os
+import json
+import threading
+
+
+class DayCheckpoint:
+    def __init__(self, path: str, config_hash: str):
+        self.path = path
+        self.config_hash = config_hash
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Return {day: items} for records written under the same config hash.
+
+        Stale or torn records are dropped from the file (atomic rewrite) so
+        later appends don't pile up behind them.
+        """
+        if not os.path.exists(self.path):
+            return {}
+        done, dirty = {}, False
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    dirty = True
+                    continue
+                if rec.get("config_hash") != self.config_hash:
+                    dirty = True
+                    continue
+                done[rec["day"]] = rec["items"]
+        if dirty:
+            self._rewrite(done)
+        return done
+
+    def _rewrite(self, done):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for day in sorted(done):
+                f.write(self._record(day, done[day]))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _record(self, day, items):
+        return json.dumps({"config_hash": self.config_hash, "day": day, "items": items},
+                          ensure_ascii=False) + "\n"
+
+    def append(self, day: int, items):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(self._record(day, items))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
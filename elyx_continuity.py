@@ -0,0 +1,144 @@
+# Rolling continuity summary per member
+# - After each generated week, a few salient lines are pulled from its
+#   messages: open plans, pending tests, commitments and travel
+# - Stored per member in <dir>/<member_id>.json, keyed by week, so
+#   regenerating a week replaces its entries instead of piling up
+# - render(week) returns only what happened before that week, trimmed to a
+#   fixed token budget (oldest first), so the prompt stays the same size
+#   whether it is week 3 or week 30
+#
+# Usage:
+#   python elyx_engine.py --backend fake --continuity          # weeks run in order
+#   python elyx_continuity.py show rohan_patel --week 19
+
+import os
+import re
+import json
+import argparse
+import threading
+from elyx_prompt import estimate_tokens
+
+DEFAULT_CONTINUITY_DIR = ".continuity"
+DEFAULT_BUDGET_TOKENS = 200
+
+# Kind -> (events that feed it, how many recent weeks to keep)
+KINDS = {
+    "plan": (("plan_change",), 3),
+    "test": (("test",), 3),
+    "commitment": ((), 3),
+    "travel": (("travel",), 1),
+}
+COMMITMENT_RE = re.compile(
+    r"\b(i'll|we'll|i will|we will|will send|will share|will book|by (?:mon|tue|wed|thu|fri|sat|sun)\w*"
+    r"|by next week|next week|tomorrow)\b", re.IGNORECASE)
+MAX_ENTRY_CHARS = 140
+FILLER = {"Noted.", "Okay."}
+
+
+def _clip(text: str, limit=MAX_ENTRY_CHARS):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def extract_entries(week: int, items):
+    """Pick at most one line per kind from a week's messages: the longest
+    candidate, which tends to carry the actual decision."""
+    best = {}
+    for item in items:
+        message = item.get("message", "")
+        if message in FILLER:
+            continue
+        for kind, (events, _) in KINDS.items():
+            if item.get("event") in events or (kind == "commitment" and COMMITMENT_RE.search(message)):
+                if kind not in best or len(message) > len(best[kind]["message"]):
+                    best[kind] = item
+    entries, seen = [], set()
+    for kind in KINDS:
+        item = best.get(kind)
+        if not item or item["message"] in seen:
+            continue
+        seen.add(item["message"])
+        entries.append({"week": week, "kind": kind,
+                        "text": _clip(f"{item.get('sender', '')}: {item['message']}")})
+    return entries
+
+
+class ContinuityStore:
+    """Per-member rolling summary; one JSON file per member."""
+
+    def __init__(self, directory=DEFAULT_CONTINUITY_DIR, budget_tokens=DEFAULT_BUDGET_TOKENS):
+        self.directory = directory
+        self.budget_tokens = budget_tokens
+        self._lock = threading.Lock()
+
+    def path(self, member_id: str):
+        return os.path.join(self.directory, f"{member_id}.json")
+
+    def load(self, member_id: str):
+        """Return {week: [entries]}."""
+        try:
+            with open(self.path(member_id), encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return {int(w): entries for w, entries in state.get("weeks", {}).items()}
+
+    def update(self, member_id: str, week: int, items):
+        """Replace this week's entries with ones extracted from its messages."""
+        with self._lock:
+            weeks = self.load(member_id)
+            weeks[week] = extract_entries(week, items)
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(member_id)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"member": member_id,
+                           "weeks": {str(w): weeks[w] for w in sorted(weeks)}},
+                          f, indent=2, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+
+    def select(self, member_id: str, week: int):
+        """Entries from weeks before `week`: the newest few per kind, then
+        oldest dropped until the rendered block fits the token budget."""
+        weeks = self.load(member_id)
+        picked = []
+        for kind, (_, keep) in KINDS.items():
+            of_kind = [e for w in sorted(weeks) if w < week for e in weeks[w] if e["kind"] == kind]
+            picked.extend(of_kind[-keep:])
+        picked.sort(key=lambda e: (e["week"], list(KINDS).index(e["kind"])))
+        while picked and estimate_tokens(render_entries(picked)) > self.budget_tokens:
+            picked.pop(0)
+        return picked
+
+    def render(self, member_id: str, week: int):
+        """Prompt block for `week`, or "" when nothing came before it."""
+        return render_entries(self.select(member_id, week))
+
+
+def render_entries(entries):
+    return "\n".join(f"- Week {e['week']} {e['kind']}: {e['text']}" for e in entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect a member's continuity summary.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    show = sub.add_parser("show")
+    show.add_argument("member_id")
+    show.add_argument("--week", type=int, default=None,
+                      help="Render what week N would see (default: after the last week)")
+    show.add_argument("--dir", default=DEFAULT_CONTINUITY_DIR)
+    show.add_argument("--budget", type=int, default=DEFAULT_BUDGET_TOKENS)
+    args = parser.parse_args(argv)
+
+    store = ContinuityStore(args.dir, args.budget)
+    weeks = store.load(args.member_id)
+    if not weeks:
+        print(f"[WARN] No continuity recorded for {args.member_id} in {args.dir}")
+        return
+    week = args.week if args.week is not None else max(weeks) + 1
+    text = store.render(args.member_id, week)
+    print(text)
+    print(f"({estimate_tokens(text)} of {store.budget_tokens} tokens, weeks {min(weeks)}-{max(weeks)} recorded)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,540 @@
+# Dashboard corpus loading (pandas, no Streamlit)
+# - Readers for the dashboard's shards: *conversation*.json chats,
+#   *decisions*.json and *hours*.csv, normalized to the dashboard's columns
+# - CorpusLoader keeps a per-file manifest (size, mtime_ns, sha256) and the
+#   parsed frame of every shard; refresh() re-parses only new or changed
+#   files and drops deleted ones, so a reload after one new week costs one
+#   shard's parse, not the whole corpus
+# - Chat records get elyx_validate's record checks as column masks while the
+#   shard is normalized; failing rows are dropped, counted in a [WARN] and
+#   written to <folder>/.quarantine/<shard>.rejects.jsonl
+# - Shards that need parsing are parsed concurrently: a process pool for the
+#   CPU-bound read + normalize, threads for stat/hash I/O. Results are merged
+#   in file order, so any worker count gives the serial path's frames
+# - With pyarrow installed, every kind's frame is also saved as an Arrow IPC
+#   snapshot under <folder>/.elyx_snapshot/, tagged with the manifest of the
+#   shards it came from. A cold start whose shards still match memory-maps
+#   the snapshot instead of parsing any JSON; changed shards are re-parsed
+#   on top of it as usual. pyarrow is in requirements.txt; without it the
+#   loader warns once and always parses
+# - Lives outside elyx_1.py so it can be imported and reused without a
+#   running Streamlit app
+#
+# Usage:
+#   python elyx_corpus.py .          # load the folder, print shard/row counts
+#   python elyx_corpus.py . --workers 1   # serial, for comparison
+#   python elyx_corpus.py . --no-snapshot # always parse the JSON/CSV shards
+
+import os, re, glob, json, time, hashlib, argparse, threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from elyx_normalize import NORMALIZER as SPEAKERS
+from elyx_classify import classify_many
+from elyx_validate import RecordValidator, ShardValidator, file_sha256, write_rejects
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional; without it every cold start parses the shards
+    pa = None
+
+SNAPSHOT_DIR = ".elyx_snapshot"
+SNAPSHOT_VERSION = 1
+
+CHAT_COLUMNS = ["timestamp","speaker","message","ref_id","source_file"]
+DECISION_COLUMNS = ['date','decision','category','owner','episode_id','reason_refs','notes','status','source_file']
+HOURS_COLUMNS = ['date','role','hours','type','source_file']
+
+# --------------------------
+# Parsing helpers
+# --------------------------
+REF_PATTERN = re.compile(r"\[(\d+)\]")
+
+def extract_refs(text: str) -> list[int]:
+    if not isinstance(text, str): return []
+    return [int(m.group(1)) for m in REF_PATTERN.finditer(text)]
+
+DT_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M",
+              "%d/%m/%Y %H:%M", "%d-%m-%Y %H:%M",
+              "%m/%d/%y, %I:%M %p", "%m/%d/%y %I:%M %p")
+DT_SAMPLE = 500
+
+def parse_dt(value):
+    if pd.isna(value):
+        return pd.NaT
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return pd.to_datetime(value)
+    s = str(value).strip()
+    m = re.match(r"^\[([^\]]+)\]", s)
+    if m: s = m.group(1)
+    for fmt in DT_FORMATS:
+        try:
+            return datetime.strptime(s, fmt)
+        except Exception:
+            pass
+    return pd.to_datetime(s, errors="coerce")
+
+def _naive(ts):
+    # Free-form fallbacks may carry an offset; the rest of the app is naive
+    if pd.isna(ts):
+        return pd.NaT
+    ts = pd.Timestamp(ts)
+    return ts.tz_convert(None) if ts.tzinfo is not None else ts
+
+def parse_datetime_col(series: pd.Series) -> pd.Series:
+    """Same results as parse_dt per value, but column at a time: the formats
+    that match a sample go first, each format is one vectorized to_datetime
+    over the rows still unparsed, and only the residue is parsed per
+    distinct value."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.tz_convert(None) if series.dt.tz is not None else series
+    text = (series.astype("string").str.strip()
+            .str.replace(r"^\[([^\]]+)\].*$", r"\1", regex=True)
+            .fillna("").astype(object).reset_index(drop=True))
+    out = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    pending = text != ""
+    sample = text[pending].head(DT_SAMPLE)
+    hits = {fmt: int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+            for fmt in DT_FORMATS}
+    # Stable sort: ties keep parse_dt's order
+    for fmt in sorted(DT_FORMATS, key=lambda f: -hits[f]):
+        if not pending.any():
+            break
+        rows = text[pending]
+        parsed = pd.to_datetime(rows, format=fmt, errors="coerce")
+        ok = parsed.notna()
+        out[ok[ok].index] = parsed[ok]
+        pending[ok[ok].index] = False
+    if pending.any():
+        rest = text[pending]
+        lookup = {v: _naive(pd.to_datetime(v, errors="coerce")) for v in rest.unique()}
+        out[rest.index] = pd.to_datetime(rest.map(lookup))
+    out.index = series.index
+    return out
+
+def _normalize_chat_df(df: pd.DataFrame, source_name: str, validator=None,
+                       quarantine_dir=None) -> pd.DataFrame:
+    """Map a chat shard onto the dashboard's columns and drop the records
+    that fail validator (default RecordValidator()), reporting them and, with
+    quarantine_dir, writing them to its .quarantine/ like elyx_validate."""
+    raw = df
+    col_map = {
+        'time': 'timestamp', 'date': 'timestamp', 'datetime': 'timestamp',
+        'text': 'message', 'msg': 'message', 'content': 'message',
+        'from': 'speaker', 'author': 'speaker', 'name': 'speaker',
+        'sender': 'speaker'
+    }
+    df = df.rename(columns={k: v for k, v in col_map.items() if k in df.columns and v not in df.columns})
+    for c in ['timestamp','message','speaker']:
+        if c not in df.columns:
+            df[c] = np.nan
+    # Fold alias spellings ("Rohan Patel", "Dr Warren (MD)") into canonical senders
+    names = df['speaker'].dropna().unique()
+    df['speaker'] = df['speaker'].replace(dict(zip(names, SPEAKERS.canonical_many(names))))
+    df['timestamp'] = parse_datetime_col(df['timestamp'])
+    # Tag messages that arrived without an event label (e.g. plain-text exports)
+    if 'event' not in df.columns:
+        df['event'] = np.nan
+    missing = df['event'].isna()
+    if missing.any():
+        # An all-missing column is float; pandas 3 refuses strings in it
+        df['event'] = df['event'].astype(object)
+        df.loc[missing, 'event'] = classify_many(df.loc[missing, 'message'].tolist())
+    if 'ref_id' not in df.columns:
+        df['ref_id'] = df['message'].apply(lambda s: extract_refs(str(s))[0] if extract_refs(str(s)) else np.nan)
+    df['source_file'] = source_name
+    df = df[~_reject_chats(df, raw, source_name, validator or RecordValidator(), quarantine_dir)]
+    base = ['timestamp','speaker','message','ref_id','episode_id','event','source_file']
+    keep = [c for c in base if c in df.columns] + [c for c in df.columns if c not in base]
+    return df.sort_values('timestamp')[keep]
+
+def _reject_chats(df, raw, source_name, validator, quarantine_dir):
+    """Boolean mask of df's invalid rows. raw is the shard as read, on the
+    same index, so rejects are quarantined as they appear in the file."""
+    flags = pd.DataFrame(validator.frame_reasons(df, sender="speaker"))
+    bad = flags.any(axis=1)
+    rejects = []
+    if bad.any():
+        counts = {r: int(n) for r, n in flags.sum().items() if n}
+        print(f"[WARN] {source_name}: {int(bad.sum())}/{len(df)} records rejected {counts}")
+        rows = flags[bad]
+        rejects = [(int(i), [r for r in flags.columns if row[r]], record) for (i, row), record
+                   in zip(rows.iterrows(), raw.loc[rows.index].to_dict("records"))]
+    if quarantine_dir:
+        try:
+            # A clean shard clears its stale rejects file
+            write_rejects(quarantine_dir, source_name, rejects)
+        except OSError as e:
+            # Read-only data dir: the rows are still dropped, just not kept
+            print(f"[WARN] Could not quarantine {source_name} rejects: {e}")
+    return bad
+
+def _flatten_json_maybe(df_or_list) -> pd.DataFrame:
+    if isinstance(df_or_list, list):
+        return pd.json_normalize(df_or_list)
+    if isinstance(df_or_list, pd.DataFrame) and df_or_list.shape[1] == 1 and isinstance(df_or_list.iloc[0,0], (list, dict)):
+        return pd.json_normalize(df_or_list.iloc[0,0])
+    return df_or_list
+
+# --------------------------
+# Per-shard readers
+# --------------------------
+def read_conversation_file(f: str, validator=None, quarantine=False) -> pd.DataFrame:
+    raw = pd.read_json(f, typ='frame', convert_dates=False)
+    raw = _flatten_json_maybe(raw)
+    return _normalize_chat_df(raw, os.path.basename(f), validator,
+                              os.path.dirname(f) if quarantine else None)
+
+def read_decisions_file(f: str) -> pd.DataFrame:
+    raw = pd.read_json(f, typ='frame', convert_dates=False)
+    raw = _flatten_json_maybe(raw)
+    df = raw.copy()
+    if 'date' in df.columns:
+        df['date'] = parse_datetime_col(df['date']).dt.date
+    else:
+        if 'timestamp' in df.columns:
+            df['date'] = parse_datetime_col(df['timestamp']).dt.date
+    for col in ['decision','category','owner','episode_id','reason_refs','notes','status']:
+        if col not in df.columns:
+            df[col] = np.nan
+    df['source_file'] = os.path.basename(f)
+    return df[DECISION_COLUMNS]
+
+def read_hours_file(f: str) -> pd.DataFrame:
+    df = pd.read_csv(f)
+    if 'date' in df.columns:
+        df['date'] = parse_datetime_col(df['date']).dt.date
+    else:
+        if 'timestamp' in df.columns:
+            df['date'] = parse_datetime_col(df['timestamp']).dt.date
+    for c in ['role','hours','type']:
+        if c not in df.columns: df[c] = np.nan
+    df['source_file'] = os.path.basename(f)
+    return df[HOURS_COLUMNS]
+
+# --------------------------
+# Parallel parsing
+# --------------------------
+# Below this many shards a pool costs more than it saves
+MIN_PARALLEL_SHARDS = 4
+
+def _signature(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+def _safe_read(read, path):
+    # Runs in a worker: report errors back instead of failing the whole map
+    try:
+        return read(path), None
+    except Exception as e:
+        return None, str(e)
+
+def default_workers():
+    return min(32, os.cpu_count() or 1)
+
+def parse_shards(read, paths, workers=None, processes=True):
+    """[(frame or None, error or None), ...] in `paths` order.
+
+    workers: pool size (None = CPU count, 1 = serial in this process).
+    processes: parse in a process pool (read + normalize is CPU-bound and
+    holds the GIL); False uses threads. `read` must be a module-level
+    function so it can be sent to worker processes.
+    """
+    workers = workers or default_workers()
+    if workers <= 1 or len(paths) < MIN_PARALLEL_SHARDS:
+        return [_safe_read(read, p) for p in paths]
+    pool_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with pool_cls(max_workers=min(workers, len(paths))) as pool:
+        return list(pool.map(_safe_read, [read] * len(paths), paths))
+
+def hash_files(paths, workers=None):
+    """sha256 per path; hashing is I/O-bound, so threads."""
+    workers = workers or default_workers()
+    if workers <= 1 or len(paths) < MIN_PARALLEL_SHARDS:
+        return [file_sha256(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        return list(pool.map(file_sha256, paths))
+
+# --------------------------
+# Incremental loading
+# --------------------------
+
+class ShardSet:
+    """One kind of shard in a folder, parsed once per content change.
+
+    files: {path: {"size", "mtime_ns", "sha256", "frame"}}; frame is None for
+    a shard that failed to parse (retried only once the file changes).
+    skip(path, entry) -> True leaves a new/changed shard unparsed;
+    failed(path, entry, error) hears about shards that failed to parse.
+    Both get the files entry, so neither needs to reopen the file.
+    """
+
+    def __init__(self, folder, patterns, read, empty_columns, sort_by, skip=None,
+                 failed=None, workers=None, processes=True):
+        self.folder = folder
+        self.patterns = patterns
+        self.read = read
+        self.empty_columns = empty_columns
+        self.sort_by = sort_by
+        self.skip = skip
+        self.failed = failed
+        self.workers = workers
+        self.processes = processes
+        self.files = {}
+        self.frame = None
+        self.parsed = 0
+
+    def paths(self):
+        # Patterns may overlap ("*decisions*" vs "*_decisions*"); each file once
+        found = []
+        for pat in self.patterns:
+            found += sorted(glob.glob(os.path.join(self.folder, pat)))
+        return list(dict.fromkeys(found))
+
+    def refresh(self) -> bool:
+        """Re-parse new/changed shards, forget deleted ones; True if the
+        merged frame changed."""
+        paths = self.paths()
+        changed = False
+        for path in set(self.files) - set(paths):
+            del self.files[path]
+            changed = True
+        sigs = {p: _signature(p) for p in paths}
+        touched = [p for p in paths if p not in self.files
+                   or [self.files[p]["size"], self.files[p]["mtime_ns"]] != sigs[p]]
+        todo = []
+        for path, sha in zip(touched, hash_files(touched, self.workers)):
+            size, mtime_ns = sigs[path]
+            entry = self.files.get(path)
+            if entry and entry["sha256"] == sha:
+                entry.update(size=size, mtime_ns=mtime_ns)
+                continue
+            self.files[path] = {"size": size, "mtime_ns": mtime_ns, "sha256": sha, "frame": None}
+            changed = True
+            if not (self.skip and self.skip(path, self.files[path])):
+                todo.append(path)
+        self.parsed += len(todo)
+        for path, (frame, error) in zip(todo, parse_shards(self.read, todo, self.workers, self.processes)):
+            if error is not None:
+                print(f"[WARN] Could not parse {path}: {error}")
+                if self.failed:
+                    self.failed(path, self.files[path], error)
+            self.files[path]["frame"] = frame
+        if changed or self.frame is None:
+            self.frame = self._merge(paths)
+        return changed
+
+    def concat(self, paths=None):
+        """Shard frames back to back in file order (None if there are none)."""
+        paths = self.paths() if paths is None else paths
+        dfs = [self.files[p]["frame"] for p in paths if self.files[p]["frame"] is not None]
+        return pd.concat(dfs, ignore_index=True) if dfs else None
+
+    def _sorted(self, df):
+        if df is None:
+            return pd.DataFrame(columns=self.empty_columns)
+        return df.sort_values(self.sort_by) if self.sort_by else df
+
+    def _merge(self, paths):
+        return self._sorted(self.concat(paths))
+
+    def restore(self, df, shards):
+        """Adopt a snapshot: df is concat() as it was saved, shards the
+        [name, size, mtime_ns, sha256, rows] it was built from. The next
+        refresh() re-checks every shard against this manifest."""
+        start = 0
+        for name, size, mtime_ns, sha, rows in shards:
+            frame = None
+            if rows is not None:
+                frame, start = df.iloc[start:start + rows], start + rows
+            self.files[os.path.join(self.folder, name)] = {
+                "size": size, "mtime_ns": mtime_ns, "sha256": sha, "frame": frame}
+        self.frame = self._sorted(df)
+
+    def manifest(self):
+        return {os.path.basename(p): {k: e[k] for k in ("size", "mtime_ns", "sha256")}
+                for p, e in sorted(self.files.items())}
+
+# --------------------------
+# Arrow snapshot
+# --------------------------
+class Snapshot:
+    """<folder>/.elyx_snapshot/<kind>.json names the Arrow file holding that
+    kind's concatenated frame and the shard manifest it was built from. The
+    Arrow file name carries the manifest hash and is written before the
+    JSON, so a crash mid-save leaves the previous snapshot in force."""
+
+    def __init__(self, folder):
+        self.dir = os.path.join(folder, SNAPSHOT_DIR)
+
+    def load(self, kind):
+        """(frame, shards) or None when missing, stale-format or unreadable."""
+        try:
+            with open(os.path.join(self.dir, f"{kind}.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != SNAPSHOT_VERSION:
+                return None
+            # Memory-mapped, so reading costs no JSON parse. split_blocks
+            # keeps each column its own block: null-free fixed-width columns
+            # can stay views of the map instead of being consolidated.
+            # String columns are still materialized as Python objects.
+            source = pa.memory_map(os.path.join(self.dir, meta["file"]), "r")
+            df = pa.ipc.open_file(source).read_all().to_pandas(
+                split_blocks=True, self_destruct=True)
+            # Arrow turns mixed/NaN-padded object columns into strings; give
+            # them back the dtype a fresh merge would have
+            objects = {c: object for c, t in meta["dtypes"].items()
+                       if t == "object" and df[c].dtype != object}
+            return (df.astype(objects) if objects else df), meta["shards"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable {kind} snapshot: {e}")
+            return None
+
+    def save(self, kind, shard_set):
+        df = shard_set.concat()
+        if df is None:
+            return
+        shards, names = [], {p: os.path.basename(p) for p in shard_set.files}
+        for path in shard_set.paths():
+            e = shard_set.files[path]
+            shards.append([names[path], e["size"], e["mtime_ns"], e["sha256"],
+                           None if e["frame"] is None else len(e["frame"])])
+        digest = hashlib.sha256(json.dumps(shards).encode("utf-8")).hexdigest()
+        name = f"{kind}-{digest[:16]}.arrow"
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except Exception as e:
+            # e.g. a column mixing numbers and text; parse from JSON next time
+            print(f"[WARN] Could not snapshot {kind}: {e}")
+            return
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            tmp = os.path.join(self.dir, name + ".tmp")
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, os.path.join(self.dir, name))
+            meta = {"version": SNAPSHOT_VERSION, "kind": kind, "file": name,
+                    "manifest_hash": digest, "shards": shards,
+                    "dtypes": {c: str(t) for c, t in df.dtypes.items()}}
+            with open(os.path.join(self.dir, f"{kind}.json.tmp"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(os.path.join(self.dir, f"{kind}.json.tmp"), os.path.join(self.dir, f"{kind}.json"))
+            for old in glob.glob(os.path.join(self.dir, f"{kind}-*.arrow")):
+                if os.path.basename(old) != name:
+                    os.remove(old)
+        except OSError as e:
+            print(f"[WARN] Could not save {kind} snapshot: {e}")
+
+class CorpusLoader:
+    """Chats, decisions and hours of one folder, kept up to date incrementally.
+
+    Frames handed out are copies: the dashboard adds columns in place.
+    snapshot: restore from / save to the Arrow snapshot (needs pyarrow).
+    validator: elyx_validate.RecordValidator for chat records (default:
+    Rohan's team and ALLOWED_EVENTS); failing records are dropped and, with
+    quarantine, written to <folder>/.quarantine/.
+    """
+
+    def __init__(self, folder: str, workers=None, processes=True, snapshot=True,
+                 validator=None, quarantine=True):
+        """workers/processes: see parse_shards()."""
+        self.folder = folder
+        if snapshot and pa is None:
+            print("[WARN] pyarrow is not installed: Arrow snapshot off, every cold start parses the shards")
+        self.snapshot = Snapshot(folder) if snapshot and pa is not None else None
+        # Empty/unparseable chat shards are known from earlier runs (by
+        # size+mtime or checksum) and skipped without reading; a shard that
+        # fails to parse here is recorded as bad for the next run
+        self.validator = ShardValidator(folder, quarantine=False)
+        pool = {"workers": workers, "processes": processes}
+        self.sets = {
+            "chats": ShardSet(folder, ["*conversation*.json"],
+                              partial(read_conversation_file, validator=validator, quarantine=quarantine),
+                              CHAT_COLUMNS, "timestamp", skip=self._bad_chat_shard,
+                              failed=self._chat_shard_failed, **pool),
+            "decisions": ShardSet(folder, ["*decisions*.json", "*_decisions*.json"],
+                                  read_decisions_file, DECISION_COLUMNS, ["date","owner","decision"], **pool),
+            "hours": ShardSet(folder, ["*hours*.csv"], read_hours_file, HOURS_COLUMNS, None, **pool),
+        }
+        self._lock = threading.Lock()
+        self._restored = set()
+
+    def _bad_chat_shard(self, path, entry):
+        # The set has just stat'ed and hashed the file: reuse both
+        known = self.validator.known(path, [entry["size"], entry["mtime_ns"]], entry["sha256"])
+        if not known or known["status"] != "bad":
+            return False
+        print(f"[WARN] Skipping empty/unreadable shard {os.path.basename(path)}")
+        return True
+
+    def _chat_shard_failed(self, path, entry, error):
+        self.validator.mark_bad(path, error, [entry["size"], entry["mtime_ns"]], entry["sha256"])
+
+    def _refresh(self, kind):
+        s = self.sets[kind]
+        if self.snapshot and kind not in self._restored:
+            self._restored.add(kind)
+            snap = self.snapshot.load(kind)
+            if snap:
+                s.restore(*snap)
+        changed = s.refresh()
+        if changed:
+            if kind == "chats":
+                self.validator.save()
+            if self.snapshot:
+                self.snapshot.save(kind, s)
+        return changed
+
+    def refresh(self):
+        """Bring every frame up to date; returns {kind: changed}."""
+        with self._lock:
+            return {kind: self._refresh(kind) for kind in self.sets}
+
+    def frame(self, kind: str) -> pd.DataFrame:
+        with self._lock:
+            self._refresh(kind)
+            return self.sets[kind].frame.copy()
+
+    def conversations(self) -> pd.DataFrame:
+        return self.frame("chats")
+
+    def decisions(self) -> pd.DataFrame:
+        return self.frame("decisions")
+
+    def hours(self) -> pd.DataFrame:
+        return self.frame("hours")
+
+    def manifest(self):
+        return {kind: s.manifest() for kind, s in self.sets.items()}
+
+    def manifest_hash(self) -> str:
+        """Changes whenever any shard's content is added, changed or removed."""
+        payload = json.dumps({kind: {n: e["sha256"] for n, e in m.items()}
+                              for kind, m in self.manifest().items()}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load a dashboard folder and report what was parsed.")
+    parser.add_argument("folder", nargs="?", default=".")
+    parser.add_argument("--workers", type=int, default=None, help="Parse pool size (1 = serial)")
+    parser.add_argument("--threads", action="store_true", help="Parse with threads instead of processes")
+    parser.add_argument("--no-snapshot", action="store_true", help="Neither read nor write the Arrow snapshot")
+    args = parser.parse_args(argv)
+
+    loader = CorpusLoader(args.folder, args.workers, not args.threads, not args.no_snapshot)
+    for kind, s in loader.sets.items():
+        t0 = time.perf_counter()
+        with loader._lock:
+            loader._refresh(kind)
+        print(f"{kind}: {len(s.files)} shards, {s.parsed} parsed, {len(s.frame)} rows "
+              f"in {time.perf_counter() - t0:.2f}s")
+    print(f"manifest {loader.manifest_hash()[:12]}")
+
+if __name__ == "__main__":
+    main()
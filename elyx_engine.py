@@ -0,0 +1,1270 @@
+# Elyx week-generation engine
+# - One parameterized generator for every week of the member journey
+# - Per-week config table replaces the copy-pasted N_weekN.py scripts
+# - Generates any subset of weeks in parallel with a bounded worker pool
+#
+# Usage:
+#   python elyx_engine.py                  # all 32 weeks, 4 workers
+#   python elyx_engine.py --weeks 1-4,19   # subset
+#   python elyx_engine.py --workers 8 --out-dir out/
+#   python elyx_engine.py --async --concurrency 16   # all days in flight
+#   python elyx_engine.py --backend fake --no-cache   # no Ollama needed
+#   python elyx_engine.py --resume                    # continue after a crash
+#   python elyx_engine.py --metrics && python elyx_metrics.py
+#   python elyx_engine.py --topup 2   # ask for missing lines instead of padding
+#   python elyx_engine.py --batch-days 7 --keep-alive 30m   # one call per week
+#   python elyx_engine.py --format jsonl --compression gzip   # compact, flushed per day
+#   python elyx_engine.py --async --hosts http://127.0.0.1:11434,http://127.0.0.1:11435
+#   python elyx_engine.py --continuity   # later weeks remember earlier ones
+#   python elyx_engine.py --prompt-budget 900   # compact prompts to fit (see elyx_prompt)
+
+import os
+import re
+import json
+import time
+import hashlib
+import random
+import asyncio
+import threading
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from elyx_backends import OllamaBackend, PooledBackend, get_backend
+from elyx_normalize import NORMALIZER
+from elyx_classify import CLASSIFIERS
+from elyx_checkpoint import DayCheckpoint
+from elyx_metrics import MetricsLog, call_record, DEFAULT_METRICS_PATH
+from elyx_cache import ResponseCache, cache_key, DEFAULT_CACHE_PATH
+from elyx_sink import JsonSink, make_sink
+from elyx_prompt import (LEVELS, PromptBudget, dedupe_blocks, compact_block, drop_voices,
+                         brief_profile)
+from elyx_continuity import ContinuityStore, DEFAULT_CONTINUITY_DIR, DEFAULT_BUDGET_TOKENS
+from elyx_members import DATA_DIR, load_member
+
+# ------------ Default member ------------
+# Rohan Patel's profile, team roster and program rules live in data/ like any
+# other member's (see elyx_members); member=None everywhere means this member
+DEFAULT_MEMBER_ID = "rohan_patel"
+DEFAULT_MEMBER = load_member(os.path.join(DATA_DIR, "members", f"{DEFAULT_MEMBER_ID}.json"))
+
+# ------------ Allowed Senders & Event Types ------------
+# ALLOWED_SENDERS and the speaker alias table live in elyx_normalize
+ALLOWED_EVENTS = ["update", "question", "test", "plan_change", "travel",
+                  "logistics", "followup", "education", "escalation", "resolution", "attachment"]
+
+MODEL = "llama3"
+
+# ------------ Per-week config table ------------
+# travel: True/False adds a travel note to the user prompt, None leaves it to
+# the focus lines. rules: extra "Week N Specifics" appended to the member's
+# program rules.
+# event_rules: which elyx_classify.EVENT_RULES table tags this week.
+_PANEL_FOCUS = [
+    "Intermittent sharing of test results categorized as: \"major issues\" <act>, \"need followup\" <soft follow up>, or \"all okay\" <note>.",
+]
+_CHECKIN_FOCUS = [
+    "Weekly check-in by the concierge/wellness officer to remove blockers / follow-up.",
+    "Push Rohan to try the interventions suggested (exercise, nutrition, mindfulness, labs).",
+]
+_ADHERENCE_FOCUS = [
+    "Follow-up on previous interventions and exercise updates.",
+    "Rohan may ask 1–2 curiosity questions per day.",
+    "Concierges push for adherence; member sticks to plan ~50% of time, adjust as needed.",
+    "Motivational messages and educational tips from experts.",
+    "Include travel if relevant.",
+    "Chronic condition: high sugar or high BP, based in Singapore.",
+]
+
+WEEK_CONFIGS = {
+    1: {"start_date": "2025-01-15", "daily_min": 10, "daily_max": 16, "seed": 101,
+        "travel": None, "event_rules": "base",
+        "focus": ["This is the onboarding week.",
+                  "Rohan onboarding with Elyx team: shares history, priorities, diet.",
+                  "Sarah introduces herself to Ruby and helps with setup.",
+                  "Ruby coordinates logistics, schedules test panel, reminders.",
+                  "Dr. Warren discusses baseline medical strategy.",
+                  "Advik mentions wearables / data tracking.",
+                  "Carla starts food/nutrition conversation.",
+                  "Rachel introduces exercises (first 2-week plan).",
+                  "Neel welcomes and gives big-picture reassurance.",
+                  "Rohan has ~2-3 curious questions this week.",
+                  "Singapore is his residence.",
+                  "Rohan has one chronic condition (e.g., high BP)."]},
+    2: {"start_date": "2025-01-22", "daily_min": 12, "daily_max": 18, "seed": 202,
+        "travel": False, "event_rules": "base",
+        "rules": "- Settling into rhythm, no major travel this week.\n"
+                 "- No diagnostic test panel yet (tests come at week 4).",
+        "focus": ["Habit setting and adherence reminders.",
+                  "Biweekly first updates to exercise/nutrition.",
+                  "Some curiosity questions from Rohan (total 3–5 this week)."]},
+    3: {"start_date": "2025-01-15", "daily_min": 10, "daily_max": 15, "seed": 303,
+        "travel": False, "event_rules": "week3",
+        "focus": ["Review prior results + update health & fitness plans + minor follow-ups.",
+                  "Trending biomarkers, functional mobility, and nutritional adjustments."]},
+    4: {"start_date": "2025-01-22", "daily_min": 12, "daily_max": 18, "seed": 42,
+        "travel": True, "event_rules": "base",
+        "rules": "- Test results are shared intermittently and categorized: \"major issues\" <act>, \"need followup\" <soft follow up>, \"all okay\" <note>.\n"
+                 "- Different Elyx experts speak with the member about results and actions.\n"
+                 "- Confirm and capture member commitments for interventions (lifestyle changes).",
+        "focus": _PANEL_FOCUS + [
+                  "Experts (Dr. Warren, Advik, Carla, Rachel, Neel, Ruby) discuss results, interventions, and commitments.",
+                  "Up to 5 member-initiated curiosity questions across the week; sprinkle naturally.",
+                  "Exercises may update this week (biweekly cadence).",
+                  "Adherence ~50% → some plan changes due to preferences/logistics."]},
+    5: {"start_date": "2025-01-29", "daily_min": 12, "daily_max": 18, "seed": 99,
+        "travel": False, "event_rules": "base",
+        "focus": ["Test results (some major issues <act>, some followup <soft follow up>, some all okay <note>).",
+                  "Exercise plan updated this week.",
+                  "Rohan asks up to 5 curiosity questions during the week.",
+                  "Adherence ~50%, so some plan adjustments."]},
+    6: {"start_date": "2025-02-05", "daily_min": 12, "daily_max": 18, "seed": 123,
+        "travel": True, "event_rules": "base",
+        "focus": ["Blood panel scheduling this week.",
+                  "Exercise adjustments (hotel-friendly).",
+                  "HRV dips and sleep guidance.",
+                  "Nutrition question about fish oil.",
+                  "Curiosity questions from Rohan (≤5 in week).",
+                  "Adherence ~50%, so some adjustments."]},
+    7: {"start_date": "2025-02-12", "daily_min": 12, "daily_max": 18, "seed": 321,
+        "travel": False, "event_rules": "base",
+        "focus": ["Blood panel results discussed this week (LDL borderline, ApoB high).",
+                  "Nutrition adjustments and supplement tweaks recommended.",
+                  "Exercise back to normal (post-travel).",
+                  "Rohan asks up to 5 curiosity questions across the week.",
+                  "Adherence ~50–60%, with a few reminders."]},
+    8: {"start_date": "2025-02-19", "daily_min": 12, "daily_max": 18, "seed": 456,
+        "travel": False, "event_rules": "base",
+        "focus": ["Diagnostics focus this week: CIMT + MRI scheduled/discussed, some labs too.",
+                  "Some reassuring results, some needing follow-up.",
+                  "A couple of logistics/scheduling chats.",
+                  "Nutrition/exercise adherence ~50–60%.",
+                  "Rohan asks up to 5 curiosity questions across the week."]},
+    9: {"start_date": "2025-02-26", "daily_min": 12, "daily_max": 18, "seed": 789,
+        "travel": False, "event_rules": "base",
+        "focus": _CHECKIN_FOCUS + [
+                  "Member attempts interventions but adherence ~50–60%.",
+                  "Fortnightly medical team check-in (light follow-up this week).",
+                  "Short curiosity questions by Rohan (up to 5 this week)."]},
+    10: {"start_date": "2025-03-05", "daily_min": 12, "daily_max": 18, "seed": 1010,
+         "travel": False, "event_rules": "base",
+         "focus": _CHECKIN_FOCUS + [
+                   "Member adherence ~50–60%, interventions attempted.",
+                   "Fortnightly medical team check-in (light follow-up this week).",
+                   "Sarah may speak on behalf of Rohan to communicate with Ruby or other Elyx team members.",
+                   "Short curiosity questions by Rohan (up to 5 this week)."]},
+    11: {"start_date": "2025-03-12", "daily_min": 12, "daily_max": 18, "seed": 1111,
+         "travel": False, "event_rules": "base",
+         "focus": _CHECKIN_FOCUS + [
+                   "Member adherence ~50–60%, interventions attempted.",
+                   "Fortnightly medical team check-in this week (light review of records, guidance).",
+                   "Sarah may speak on behalf of Rohan to communicate with Ruby or other Elyx team members.",
+                   "Short curiosity questions by Rohan (up to 5 this week)."]},
+    12: {"start_date": "2025-03-26", "daily_min": 12, "daily_max": 18, "seed": 1212,
+         "travel": False, "event_rules": "base",
+         "focus": _CHECKIN_FOCUS + [
+                   "End-of-week tests conducted to review progress.",
+                   "Physician and Elyx team review test results and plan next steps.",
+                   "Member adherence ~50–60%, interventions attempted.",
+                   "Sarah may speak on behalf of Rohan to communicate with Ruby or other Elyx team members.",
+                   "Short curiosity questions by Rohan (up to 5 this week)."]},
+    13: {"start_date": "2025-04-02", "daily_min": 12, "daily_max": 18, "seed": 1313,
+         "travel": None, "event_rules": "panel",
+         "focus": ["Discuss Rohan's upcoming comprehensive Test Panel.",
+                   "Explain rationale for key tests (General Health, Cancer Screening, Cardiovascular, Genetics, Hormones, Body Composition, Brain, Skin, Nutritional).",
+                   "Ask Rohan/Sarah for consent, schedule, preferences.",
+                   "Some nudges by concierge to complete tasks.",
+                   "Short curiosity questions by Rohan (up to 5 this week).",
+                   "Sarah can speak on behalf of Rohan."]},
+    14: {"start_date": "2025-04-09", "daily_min": 12, "daily_max": 18, "seed": 1414,
+         "travel": None, "event_rules": "panel",
+         "focus": ["Rohan has completed or is mid-way through his test panel.",
+                   "Elyx team reviewing test results.",
+                   "Discuss insights, next steps, lifestyle interventions, or specialist consults.",
+                   "Sarah can speak on behalf of Rohan.",
+                   "Concierge nudges to complete any pending forms or tests.",
+                   "Short curiosity questions by Rohan."]},
+    15: {"start_date": "2025-04-16", "daily_min": 12, "daily_max": 18, "seed": 1515,
+         "travel": None, "event_rules": "panel_followup",
+         "focus": ["Follow-up on Week 14 test results and insights.",
+                   "Discuss next steps, interventions, specialist consults.",
+                   "Rohan or Sarah can ask clarification questions about results.",
+                   "Concierge nudges for pending appointments, lifestyle tracking, medication adherence.",
+                   "Experts providing guidance, tips, or education based on test results.",
+                   "Short motivational messages to keep Rohan on track."]},
+    16: {"start_date": "2025-04-23", "daily_min": 12, "daily_max": 18, "seed": 1616,
+         "travel": None, "event_rules": "panel_followup",
+         "focus": ["Follow-up on Week 15 interventions and progress.",
+                   "Rohan or Sarah may ask clarification questions from experts.",
+                   "Concierge nudges for appointments, lifestyle tracking, or adherence.",
+                   "Experts provide guidance, educational tips, or adjustments based on prior test results.",
+                   "Short motivational messages to keep Rohan engaged."]},
+    17: {"start_date": "2025-05-01", "daily_min": 12, "daily_max": 18, "seed": 1717,
+         "travel": None, "event_rules": "training",
+         "focus": ["Follow-up on previous interventions and exercise updates.",
+                   "1 full diagnostic test panel done this week (progress tracking, highlighted issues).",
+                   "Rohan or Sarah may ask 1–2 curiosity or research questions per day on health topics.",
+                   "Concierges push for adherence; member sticks to plan ~50% of time, adjust as needed.",
+                   "Motivational messages and educational tips from experts.",
+                   "Include travel if relevant (1 week business trip scenario possible).",
+                   "Reflect member in Singapore managing 1 chronic condition (e.g., high sugar or BP)."]},
+    18: {"start_date": "2025-05-08", "daily_min": 12, "daily_max": 18, "seed": 1818,
+         "travel": None, "event_rules": "training",
+         "focus": _ADHERENCE_FOCUS},
+    19: {"start_date": "2025-05-14", "daily_min": 12, "daily_max": 18, "seed": 19,
+         "travel": True, "event_rules": "base",
+         "rules": "- No test panel this week (next due in Week 24).\n"
+                  "- Exercise updates may occur this week (biweekly cadence).\n"
+                  "- Include ~5 curiosity questions naturally across the week.\n"
+                  "- Adherence 50% → some plan changes & swaps.",
+         "focus": ["Exercise update this week (biweekly cadence).",
+                   "Member may ask ~5 curiosity questions in total this week.",
+                   "Adherence ~50% → some changes to proposed plans.",
+                   "No diagnostic test this week (next at Week 24)."]},
+    20: {"start_date": "2025-05-22", "daily_min": 12, "daily_max": 18, "seed": 2020,
+         "travel": None, "event_rules": "training",
+         "focus": _ADHERENCE_FOCUS},
+    21: {"start_date": "2025-05-29", "daily_min": 12, "daily_max": 18, "seed": 2021,
+         "travel": None, "event_rules": "training",
+         "focus": _ADHERENCE_FOCUS},
+    # No standalone script for week 22 (22_week2.py is a week-2 variant)
+    22: {"start_date": "2025-06-05", "daily_min": 12, "daily_max": 18, "seed": 2222,
+         "travel": None, "event_rules": "training",
+         "focus": _ADHERENCE_FOCUS},
+    23: {"start_date": "2025-05-28", "daily_min": 12, "daily_max": 18, "seed": 23,
+         "travel": False, "event_rules": "bloodwork",
+         "rules": "- Full diagnostic test panel due in Week 24.",
+         "focus": ["Reminders about upcoming Week 24 diagnostic panel (lab prep, fasting, logistics).",
+                   "Ongoing plan discussions: exercise updates (biweekly), nutrition tweaks, stress/sleep monitoring.",
+                   "Up to 5 Rohan curiosity questions sprinkled across week.",
+                   "Adherence ~50% → some plan adjustments required."]},
+    24: {"start_date": "2025-07-03", "daily_min": 13, "daily_max": 18, "seed": 2024,
+         "travel": None, "event_rules": "lipid",
+         "focus": ["Diagnostics: full test panel scheduled (end of 3-month cycle).",
+                   "Conversations about logistics, booking labs, preparing Rohan.",
+                   "4–5 curiosity questions by Rohan during the week about health topics (genetics, microbiome, biomarkers).",
+                   "Chronic condition management: sugar/BP monitoring.",
+                   "Exercise updates bi-weekly.",
+                   "Elyx team explains rationale, follows up, motivates.",
+                   "Member follows plan ~50% of time, adjustments suggested."]},
+    25: {"start_date": "2025-07-10", "daily_min": 12, "daily_max": 16, "seed": 2025,
+         "travel": None, "event_rules": "lipid",
+         "focus": ["Physicians review test results from Week 24 and share feedback.",
+                   "Ruby helps coordinate logistics and sends summaries.",
+                   "Adjustments to nutrition, supplements, and exercise plan based on results.",
+                   "4–5 curiosity questions from Rohan on health topics (ApoE4, microbiome, inflammation, hormones).",
+                   "Bi-weekly exercise update continues.",
+                   "Member follows ~50% of the plan, team nudges and adapts."]},
+    26: {"start_date": "2025-07-17", "daily_min": 12, "daily_max": 16, "seed": 2626,
+         "travel": None, "event_rules": "lipid_travel",
+         "focus": ["Rohan is on a business trip (assume Hong Kong), with some travel constraints.",
+                   "New exercise plan introduced this week (bi-weekly update cycle).",
+                   "Ruby/Advik check in for blockers, logistics, and nudges on adherence.",
+                   "4–5 curiosity questions from Rohan about fasting, inflammation, genetics, supplements.",
+                   "Member follows ~50% of plan → team adapts."]},
+    27: {"start_date": "2025-06-25", "daily_min": 12, "daily_max": 18, "seed": 27,
+         "travel": True, "event_rules": "bloodwork",
+         "rules": "- Week 24 panel just done, next due Week 36.",
+         "focus": ["Travel logistics, timezone coordination, flight/jet lag adjustments.",
+                   "Exercise updates (biweekly plan refresh).",
+                   "Nutrition tweaks for eating during travel.",
+                   "Up to 5 Rohan curiosity questions sprinkled across week.",
+                   "Adherence ~50% → some plan adjustments required."]},
+    28: {"start_date": "2025-07-31", "daily_min": 12, "daily_max": 16, "seed": 2828,
+         "travel": False, "event_rules": "tweak",
+         "focus": ["New workout program update from Advik (every 2 weeks).",
+                   "Ruby nudges Rohan about ~50% adherence, suggests small swaps/tweaks.",
+                   "Curiosity questions from Rohan (about fasting vs eating pre-workout, supplements for brain health, sleep debt, HRV tracking, sauna).",
+                   "Rachel reminds that full diagnostic test panel is due after Week 36.",
+                   "Sarah helps with scheduling/logistics."]},
+    29: {"start_date": "2025-08-07", "daily_min": 12, "daily_max": 16, "seed": 2929,
+         "travel": None, "event_rules": "tweak",
+         "focus": ["Ruby’s weekly check-in (remove blockers, nudge adherence).",
+                   "Rohan follows ~50% of plan, Ruby tweaks where needed.",
+                   "Rohan asks curiosity questions (diet timing, morning vs evening workouts, nootropics, sleep supplements, intermittent fasting & exercise).",
+                   "Rachel reminds test panel is after Week 36.",
+                   "This week Rohan is traveling for business to Hong Kong → logistics by Sarah."]},
+    30: {"start_date": "2025-08-14", "daily_min": 12, "daily_max": 16, "seed": 3030,
+         "travel": False, "event_rules": "tweak_diet",
+         "focus": ["Ruby’s weekly check-in (remove blockers, nudge adherence).",
+                   "Rohan skipped some hotel workouts last week → Advik adjusts plan.",
+                   "Rohan asks curiosity questions: sauna/cold plunge for recovery, magnesium/ashwagandha for sleep, HIIT vs cardio, coffee timing.",
+                   "Carla shares dining-out hacks since Rohan slipped at social dinners.",
+                   "Rachel reminds: test panel is due after Week 36."]},
+    31: {"start_date": "2025-08-21", "daily_min": 12, "daily_max": 16, "seed": 3131,
+         "travel": None, "event_rules": "tweak_diet",
+         "focus": ["Ruby’s weekly check-in and one mid-week motivational push.",
+                   "Advik adjusts workouts (Rohan bored with cardio → adds more strength).",
+                   "Rohan asks questions: intermittent fasting, smartwatch sleep accuracy, meditation/breathwork, healthy meeting snacks.",
+                   "Carla gives dining reminders (avoid heavy late-night meals).",
+                   "Rachel reminds: test panel due after Week 36.",
+                   "Rohan travels Wed–Sat to Tokyo → Sarah handles logistics and timezones.",
+                   "Commitment: ~5 hrs/week, but adherence drops while traveling."]},
+    32: {"start_date": "2025-09-10", "daily_min": 10, "daily_max": 16, "seed": 321,
+         "travel": None, "event_rules": "base",
+         "focus": ["This is the final week of the 8-month program.",
+                   "Reflections on progress so far, reminders, encouragement.",
+                   "Sarah sometimes speaking on behalf of Rohan with Elyx team.",
+                   "Rohan curious with 2–3 questions during the week.",
+                   "Some exercise/lifestyle updates and nudges.",
+                   "Plan adherence ~50%, some adjustments still needed."]},
+}
+
+# ------------ Timestamps ------------
+
+
+def day_timestamps(iso_date: str, n: int, rng=random):
+    # Random times between 08:00 and 18:00 local
+    base = datetime.strptime(iso_date + " 08:00", "%Y-%m-%d %H:%M")
+    times = [base + timedelta(minutes=rng.randint(0, 600))
+             for _ in range(n)]
+    times.sort()
+    return [t.strftime("%Y-%m-%d %H:%M") for t in times]
+
+# ------------ Ollama Prompt Builders ------------
+
+
+def build_system_prompt(week: int, member=None, level=0):
+    """member: an elyx_members.Member; None means DEFAULT_MEMBER.
+    level: compaction level (index into elyx_prompt.LEVELS); 0 is verbatim."""
+    cfg = WEEK_CONFIGS[week]
+    m = member or DEFAULT_MEMBER
+    name, possessive, pa, short = m.name, m.possessive, m.pa_short, m.short_name
+    senders, team, profile, rules = m.senders, m.team_roles, m.profile, m.rules
+    if cfg.get("rules"):
+        rules += f"\nWeek {week} Specifics\n{m.render(cfg['rules'])}\n"
+    fmt_rule = "No markdown, no numbering, no explanations—only chat content."
+    if level >= LEVELS.index("dedupe"):
+        # The focus lines go out in the user prompt anyway; the roster stays
+        # whole (it defines who may speak) and profile lines it covers go
+        profile, rules = dedupe_blocks(
+            [profile, rules], _focus_lines(week, member).split("\n") + team.split("\n"),
+            [name, short])
+        # The user prompt drops its constraints at this level (_constraints)
+        fmt_rule = "No markdown, numbering, timestamps, JSON or explanations—only chat content."
+    if level >= LEVELS.index("lean"):
+        team = drop_voices(team)
+    if level >= LEVELS.index("brief"):
+        profile = brief_profile(profile)
+    if level >= LEVELS.index("compact"):
+        profile, rules = compact_block(profile), compact_block(rules)
+    return f"""
+You are the Elyx Concierge Team. Generate WhatsApp-style messages between the member ({name}), {possessive} PA ({pa}), and Elyx experts.
+Rules:
+- Keep each message 1–2 short lines, WhatsApp tone.
+- Use only these speakers: {", ".join(senders)}.
+- {pa} may occasionally speak for {short} to communicate with Ruby or other Elyx team members.
+- {fmt_rule}
+Context:
+{team}
+
+Member Context:
+{profile}
+
+Program Context:
+{rules}
+"""
+
+
+def _focus_lines(week: int, member=None):
+    cfg = WEEK_CONFIGS[week]
+    focus = list(cfg["focus"])
+    if cfg["travel"] is True:
+        focus.append(
+            "Rohan is traveling this week (timezone shifts, flight logistics, hotel gyms, diet adjustments).")
+    elif cfg["travel"] is False:
+        focus.append("Rohan is in Singapore this week (normal SGT schedule).")
+    include = "\n".join(f"- {line}" for line in focus)
+    return member.render(include) if member else include
+
+
+def _continuity_block(context):
+    if not context:
+        return ""
+    return f"Earlier weeks (stay consistent; follow up where it fits):\n{context}\n"
+
+
+def _constraints(level=0):
+    # Every line restates a system prompt rule; from "dedupe" on, the system
+    # prompt's rules carry them alone
+    if level >= LEVELS.index("dedupe"):
+        return ""
+    return """Constraints:
+- Short WhatsApp-style messages only.
+- Allowed speakers only.
+- No timestamps, no JSON, no explanations.
+"""
+
+
+def build_user_prompt(week: int, day_idx: int, date_str: str, n_turns: int, member=None,
+                      context=None, level=0):
+    include = _focus_lines(week, member)
+    return f"""
+Week {week}, Day {day_idx} ({date_str}).
+Generate exactly {n_turns} raw chat lines. Each line format: 'Speaker: message'.
+Include:
+{include}
+{_continuity_block(context)}{_constraints(level)}"""
+
+
+def build_batch_prompt(week: int, days, member=None, context=None, level=0):
+    """One request covering several planned days of the same week."""
+    include = _focus_lines(week, member)
+    plan = "\n".join(
+        f"=== DAY {d['day']} ({d['date']}) === then exactly {d['n_turns']} lines"
+        for d in days)
+    return f"""
+Week {week}, Days {days[0]['day']}-{days[-1]['day']}.
+For each day below, write its header line exactly as shown, then that day's raw chat lines.
+Each chat line format: 'Speaker: message'.
+{plan}
+Include:
+{include}
+{_continuity_block(context)}{_constraints(level)}"""
+
+
+def batch_request(days, member=None):
+    """Pseudo-day for a multi-day call: one system prompt, one batched ask.
+    Used for caching and metrics; split_days() maps the reply back to days."""
+    first = days[0]
+    return {
+        "week": first["week"],
+        "day": f"{first['day']}-{days[-1]['day']}",
+        "days": len(days),
+        "n_turns": sum(d["n_turns"] for d in days),
+        "messages": [
+            first["messages"][0],
+            {"role": "user", "content": build_batch_prompt(
+                first["week"], days, member, first.get("context"),
+                first.get("prompt_level", 0)).strip()},
+        ],
+    }
+
+
+def build_topup_prompt(k: int):
+    return f"""
+Continue the same day's chat with exactly {k} more raw chat lines.
+Do not repeat earlier lines. Same format 'Speaker: message', allowed speakers only.
+No timestamps, no JSON, no explanations.
+"""
+
+
+def topup_messages(day, parsed, k: int):
+    """Continuation request: the day's prompt, the lines accepted so far as the
+    assistant turn, then a short ask for only the k missing lines."""
+    accepted = "\n".join(f"{s}: {m}" for s, m in parsed)
+    return day["messages"] + [
+        {"role": "assistant", "content": accepted},
+        {"role": "user", "content": build_topup_prompt(k)},
+    ]
+
+# ------------ Line parsing ------------
+
+
+def parse_line(ln: str, normalizer=NORMALIZER):
+    """Return (sender, message) for a valid chat line, else None."""
+    return normalizer.split(ln)
+
+
+# '=== DAY 3 (2025-01-17) ===', tolerating markdown or dropped '=' signs.
+# Chat lines can't match: they start with a speaker and carry a colon.
+DAY_HEADER_RE = re.compile(
+    r"^[^\w\n]*day[^\S\n]+(\d+)\b[^:\n]*$", re.IGNORECASE | re.MULTILINE)
+
+
+def split_days(raw: str):
+    """Split a batched reply into {day: block text} at the day headers."""
+    heads = list(DAY_HEADER_RE.finditer(raw))
+    blocks = {}
+    for i, m in enumerate(heads):
+        end = heads[i + 1].start() if i + 1 < len(heads) else len(raw)
+        # A repeated header continues the same day
+        blocks[int(m.group(1))] = blocks.get(int(m.group(1)), "") + raw[m.end():end]
+    return blocks
+
+
+def parse_lines(raw: str, normalizer=NORMALIZER):
+    return normalizer.split_lines(raw)
+
+
+def fit_turns(parsed, n_turns: int):
+    # Enforce exact n_turns if the model produced extra/less
+    if len(parsed) > n_turns:
+        return parsed[:n_turns]
+    parsed = list(parsed)
+    while len(parsed) < n_turns and parsed:
+        last = parsed[-1]
+        filler = (last[0], "Noted.") if len(
+            last[1]) > 6 else (last[0], "Okay.")
+        parsed.append(filler)
+    return parsed
+
+
+def timestamp_items(parsed, timestamps, start=0):
+    return [{
+        "timestamp": timestamps[min(i, len(timestamps)-1)],
+        "sender": sender,
+        "message": message,
+    } for i, (sender, message) in enumerate(parsed, start)]
+
+
+def tag_events(items, classifier=CLASSIFIERS["base"]):
+    for item in items:
+        event = classifier.classify(item["message"])
+        # Guard: enforce allowed event vocabulary only
+        item["event"] = event if event in ALLOWED_EVENTS else "update"
+    return items
+
+# ------------ Core Generator ------------
+
+
+
+def derive_seed(*parts) -> int:
+    """Stable 64-bit seed from e.g. (week seed, member, week, day).
+
+    Depends only on the parts, never on run order, thread, process or
+    PYTHONHASHSEED. NumPy code can use np.random.default_rng(derive_seed(...)).
+    """
+    digest = hashlib.sha256(json.dumps(parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def task_rng(week: int, day_idx: int, member=None):
+    """Private RNG for one (member, week, day) task."""
+    member_id = member.id if member else DEFAULT_MEMBER_ID
+    return random.Random(derive_seed(WEEK_CONFIGS[week]["seed"], member_id, week, day_idx))
+
+
+def week_prompt_level(week: int, member=None, context=None, prompt=None):
+    """The compaction level `prompt` (an elyx_prompt.PromptBudget) requires
+    for the week. Budgeted against the longest user prompt the week can have,
+    so one level (and one system prompt) serves every day."""
+    if prompt is None:
+        return 0
+    cfg = WEEK_CONFIGS[week]
+    member_id = member.id if member else DEFAULT_MEMBER_ID
+    level, _ = prompt.fit(lambda level: [
+        {"role": "system", "content": build_system_prompt(week, member, level).strip()},
+        {"role": "user", "content": build_user_prompt(
+            week, 7, cfg["start_date"], cfg["daily_max"], member, context, level).strip()}],
+        key=f"{member_id} week {week}")
+    return level
+
+
+def plan_day(week: int, day_idx: int, member=None, system_prompt=None, context=None,
+             prompt=None, level=None):
+    """Draw one day's turn count, timestamps and prompts from its own RNG,
+    so any day can be planned alone, in any order, with the same result.
+    context: continuity summary of earlier weeks (see elyx_continuity).
+    prompt: an elyx_prompt.PromptBudget (default: verbatim prompts); level
+    overrides it with an already chosen compaction level."""
+    cfg = WEEK_CONFIGS[week]
+    rng = task_rng(week, day_idx, member)
+    if level is None:
+        level = week_prompt_level(week, member, context, prompt)
+    if system_prompt is None:
+        system_prompt = build_system_prompt(week, member, level).strip()
+    date_obj = datetime.strptime(
+        cfg["start_date"], "%Y-%m-%d") + timedelta(days=day_idx - 1)
+    date_str = date_obj.strftime("%Y-%m-%d")
+    n_turns = rng.randint(cfg["daily_min"], cfg["daily_max"])
+    day = {
+        "week": week,
+        "day": day_idx,
+        "date": date_str,
+        "n_turns": n_turns,
+        "timestamps": day_timestamps(date_str, n_turns, rng),
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": build_user_prompt(
+                week, day_idx, date_str, n_turns, member, context, level).strip()}
+        ]
+    }
+    if context:
+        day["context"] = context
+    if level:
+        day["prompt_level"] = level
+    return day
+
+
+def plan_week(week: int, member=None, context=None, prompt=None):
+    """Plan every day of a week up front.
+
+    Days do not depend on each other's model output, so a planned week can be
+    sent to the model serially or all at once with identical results.
+    """
+    level = week_prompt_level(week, member, context, prompt)
+    system_prompt = build_system_prompt(week, member, level).strip()
+    return [plan_day(week, d, member, system_prompt, context, level=level)
+            for d in range(1, 8)]
+
+
+def week_config_hash(days, model=MODEL, backend_name="ollama", batch_days=1):
+    """Hash of everything that determines a planned week's output."""
+    config = {
+        "model": model,
+        "backend": backend_name,
+        "days": [[d["messages"], d["n_turns"], d["timestamps"]] for d in days],
+    }
+    if batch_days > 1:
+        config["batch_days"] = batch_days
+    payload = json.dumps(config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DayStream:
+    """Incremental parser for one streamed day.
+
+    Each completed line is parsed, classified and timestamped as soon as it
+    arrives; feed() returns True once n_turns valid lines exist so the caller
+    can close the stream instead of paying for lines it would discard.
+    stages: the WeekGenerator running the day; its stage methods do the work.
+    """
+
+    def __init__(self, day, stages):
+        self.day = day
+        self.stages = stages
+        self.buf = ""
+        self.lines = []
+        self.parsed = []
+        self.items = []
+
+    @property
+    def done(self):
+        return len(self.parsed) >= self.day["n_turns"]
+
+    def feed(self, piece: str) -> bool:
+        self.buf += piece
+        while "\n" in self.buf and not self.done:
+            line, self.buf = self.buf.split("\n", 1)
+            self._line(line)
+        return self.done
+
+    def flush(self):
+        # Parse a trailing line the stream ended without a newline
+        if not self.done and self.buf.strip():
+            self._line(self.buf)
+        self.buf = ""
+
+    def _items(self, parsed):
+        st = self.stages
+        items = st._timestamp(parsed, self.day["timestamps"], start=len(self.parsed))
+        return st._classify(items, self.day["week"])
+
+    def _line(self, line: str):
+        self.lines.append(line)
+        p = self.stages._parse_line(line)
+        if p:
+            self.items.extend(self._items([p]))
+            self.parsed.append(p)
+
+    def finish(self):
+        self.flush()
+        fillers = self.stages._fit(self.parsed, self.day["n_turns"])[len(self.parsed):]
+        self.items.extend(self._items(fillers))
+        return self.items
+
+    @property
+    def text(self):
+        # Only the consumed lines; re-parsing this gives the same items
+        return "\n".join(self.lines)
+
+
+class _StreamStats:
+    """Timing for one streamed call. Ollama only reports its counters on the
+    final chunk, which we never see when the stream is cut at n_turns, so
+    chunks (one token each) and wall time stand in for them."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.ttft_s = None
+        self.chunks = 0
+        self.final = None
+
+    def feed(self, chunk) -> str:
+        piece = chunk.get("message", {}).get("content", "")
+        if piece:
+            if self.ttft_s is None:
+                self.ttft_s = round(time.perf_counter() - self.t0, 4)
+            self.chunks += 1
+        if chunk.get("done"):
+            self.final = chunk
+        return piece
+
+    def response(self):
+        if self.final:
+            return self.final
+        first = self.t0 + (self.ttft_s or 0)
+        return {"eval_count": self.chunks,
+                "eval_duration": int((time.perf_counter() - first) * 1e9)}
+
+
+class WeekGenerator:
+    """Runs planned days through a chat backend.
+
+    backend: anything with chat()/achat() returning an Ollama-shaped response
+    (see elyx_backends); defaults to the real Ollama server. stream=True
+    consumes tokens as they arrive and stops each day at n_turns valid lines.
+    checkpoint_dir: append each finished day there durably; with resume=True,
+    days already checkpointed under the same config hash are not regenerated.
+    metrics: a MetricsLog (or MetricsBuffer) receiving one record per call
+    (see elyx_metrics).
+    topup: when a day comes back short, up to this many continuation requests
+    ask for just the missing lines before falling back to filler (0 = off).
+    member: an elyx_members.Member to generate for (default: Rohan Patel).
+    batch_days: ask for this many days per call (7 = whole week) so the long
+    system prompt is evaluated once per batch; streaming applies only to
+    single-day calls. keep_alive: passed to Ollama ("30m", -1) so the model
+    and its prompt-prefix cache stay loaded between calls.
+    continuity: an elyx_continuity.ContinuityStore; each week's prompts then
+    carry a budgeted summary of earlier weeks and weeks run in order.
+    prompt: an elyx_prompt.PromptBudget for compacting system prompts.
+    """
+
+    def __init__(self, backend=None, model=MODEL, cache=None, stream=False,
+                 checkpoint_dir=None, resume=False, metrics=None, topup=0,
+                 batch_days=1, keep_alive=None, member=None, continuity=None, prompt=None):
+        self.backend = backend or OllamaBackend()
+        self.model = model
+        self.cache = cache
+        self.stream = stream
+        self.checkpoint_dir = checkpoint_dir
+        self.resume = resume
+        self.metrics = metrics
+        self.topup = topup
+        self.batch_days = max(1, batch_days)
+        self.member = member
+        self.continuity = continuity
+        self.prompt = prompt
+        self.normalizer = member.normalizer if member else NORMALIZER
+        self.chat_kwargs = {} if keep_alive is None else {"keep_alive": keep_alive}
+        self.topup_stats = {"calls": 0, "requested": 0, "added": 0,
+                            "prompt_tokens": 0, "eval_tokens": 0}
+        self._stats_lock = threading.Lock()
+        self._checkpoints = {}
+
+    @property
+    def member_id(self):
+        return self.member.id if self.member else DEFAULT_MEMBER_ID
+
+    def plan_week(self, week: int):
+        context = self.continuity.render(self.member_id, week) if self.continuity else None
+        return plan_week(week, self.member, context, self.prompt)
+
+    def _remember(self, week, items):
+        if self.continuity:
+            self.continuity.update(self.member_id, week, items)
+
+    def _open_checkpoint(self, week, days):
+        """Return (checkpoint or None, {day: items} already done)."""
+        if not self.checkpoint_dir:
+            return None, {}
+        ck = DayCheckpoint(
+            os.path.join(self.checkpoint_dir, f"{self.member.id}_week{week}.jsonl"
+                         if self.member else f"week{week}.jsonl"),
+            self._days_hash(days))
+        self._checkpoints[week] = ck
+        if self.resume:
+            return ck, ck.load()
+        ck.clear()
+        return ck, {}
+
+    def close_checkpoint(self, week):
+        """Drop the week's day checkpoint; call once its output is safely written."""
+        ck = self._checkpoints.pop(week, None)
+        if ck:
+            ck.clear()
+
+    def _cache_key(self, messages):
+        if not self.cache:
+            return None
+        # Keep fake/stand-in responses out of the real model's key space
+        model = self.model if self.backend.name == "ollama" else f"{self.backend.name}:{self.model}"
+        return cache_key(model, messages)
+
+    # ------------ Per-day stages ------------
+    # Methods so a subclass can wrap each one (elyx_bench times them)
+
+    def _parse(self, raw):
+        return parse_lines(raw, self.normalizer)
+
+    def _parse_line(self, line):
+        return parse_line(line, self.normalizer)
+
+    def _fit(self, parsed, n_turns):
+        return fit_turns(parsed, n_turns)
+
+    def _timestamp(self, parsed, timestamps, start=0):
+        return timestamp_items(parsed, timestamps, start)
+
+    def _classify(self, items, week):
+        return tag_events(items, CLASSIFIERS[WEEK_CONFIGS[week]["event_rules"]])
+
+    def _finish_parsed(self, day, parsed):
+        parsed = self._fit(parsed, day["n_turns"])
+        return self._classify(self._timestamp(parsed, day["timestamps"]), day["week"])
+
+    def _log_call(self, day, raw, resp=None, t0=None, **extra):
+        if not self.metrics:
+            return
+        if t0 is not None:
+            extra["wall_s"] = round(time.perf_counter() - t0, 4)
+        if self.member:
+            extra["member"] = self.member.id
+        self.metrics.record(call_record(
+            day, raw, parse_lines(raw, self.normalizer), resp, backend=self.backend.name,
+            model=self.model, stream=self.stream, **extra))
+
+    def _topup_request(self, day, parsed):
+        k = day["n_turns"] - len(parsed)
+        req = dict(day, messages=topup_messages(day, parsed, k), n_turns=k)
+        return req, self._cache_key(req["messages"])
+
+    def _topup_done(self, req, raw, parsed, resp, t0, attempt):
+        """Account for one top-up reply and return the extended parsed lines."""
+        more = self._parse(raw)[:req["n_turns"]]
+        with self._stats_lock:
+            st = self.topup_stats
+            st["calls"] += resp is not None
+            st["requested"] += req["n_turns"]
+            st["added"] += len(more)
+            st["prompt_tokens"] += (resp or {}).get("prompt_eval_count") or 0
+            st["eval_tokens"] += (resp or {}).get("eval_count") or 0
+        if resp is None:
+            self._log_call(req, raw, cached=True, topup=attempt)
+        else:
+            self._log_call(req, raw, resp, t0, topup=attempt)
+        return parsed + more
+
+    def _top_up(self, day, parsed):
+        # Nothing to continue from on an empty reply; leave that day short
+        attempt = 0
+        while parsed and len(parsed) < day["n_turns"] and attempt < self.topup:
+            attempt += 1
+            req, key = self._topup_request(day, parsed)
+            raw = self.cache.get(key) if key else None
+            resp, t0 = None, time.perf_counter()
+            if raw is None:
+                resp = self.backend.chat(model=self.model, messages=req["messages"], **self.chat_kwargs)
+                raw = resp.get("message", {}).get("content", "")
+                if key:
+                    self.cache.put(key, raw)
+            parsed = self._topup_done(req, raw, parsed, resp, t0, attempt)
+        return parsed
+
+    async def _top_up_async(self, day, parsed):
+        attempt = 0
+        while parsed and len(parsed) < day["n_turns"] and attempt < self.topup:
+            attempt += 1
+            req, key = self._topup_request(day, parsed)
+            raw = self.cache.get(key) if key else None
+            resp, t0 = None, time.perf_counter()
+            if raw is None:
+                resp = await self.backend.achat(model=self.model, messages=req["messages"], **self.chat_kwargs)
+                raw = resp.get("message", {}).get("content", "")
+                if key:
+                    self.cache.put(key, raw)
+            parsed = self._topup_done(req, raw, parsed, resp, t0, attempt)
+        return parsed
+
+    def _finish_stream(self, ds):
+        ds.flush()
+        if self.topup and not ds.done:
+            return self._finish_parsed(ds.day, self._top_up(ds.day, ds.parsed))
+        return ds.finish()
+
+    def _finish_raw(self, day, raw):
+        parsed = self._parse(raw)
+        return self._finish_parsed(day, self._top_up(day, parsed) if self.topup else parsed)
+
+    def _stream_day(self, day):
+        ds, st = DayStream(day, self), _StreamStats()
+        stream = self.backend.stream_chat(model=self.model, messages=day["messages"], **self.chat_kwargs)
+        try:
+            for chunk in stream:
+                if ds.feed(st.feed(chunk)):
+                    break
+        finally:
+            # Closing the generator drops the connection so Ollama stops decoding
+            stream.close()
+        return ds, st
+
+    def _batches(self, days):
+        k = self.batch_days
+        return [days[i:i + k] for i in range(0, len(days), k)]
+
+    def run_batch(self, days):
+        """Generate several days in one call; returns items per day."""
+        if len(days) == 1:
+            return [self.run_day(days[0])]
+        req = batch_request(days, self.member)
+        key = self._cache_key(req["messages"])
+        raw = self.cache.get(key) if key else None
+        if raw is not None:
+            self._log_call(req, raw, cached=True, days=req["days"])
+        else:
+            t0 = time.perf_counter()
+            resp = self.backend.chat(model=self.model, messages=req["messages"], **self.chat_kwargs)
+            raw = resp.get("message", {}).get("content", "")
+            self._log_call(req, raw, resp, t0, days=req["days"])
+            if key:
+                self.cache.put(key, raw)
+        blocks = split_days(raw)
+        # Top-ups of a batched day are credited against the batch's filler
+        return [self._finish_raw(dict(day, batch=req["day"]), blocks.get(day["day"], "")) for day in days]
+
+    def run_day(self, day):
+        key = self._cache_key(day["messages"])
+        if key:
+            raw = self.cache.get(key)
+            if raw is not None:
+                self._log_call(day, raw, cached=True)
+                return self._finish_raw(day, raw)
+        t0 = time.perf_counter()
+        if self.stream:
+            ds, st = self._stream_day(day)
+            # Flush first: an unterminated last line must reach the cache too
+            ds.flush()
+            raw = ds.text
+            self._log_call(day, raw, st.response(), t0, ttft_s=st.ttft_s)
+        else:
+            ds, resp = None, self.backend.chat(model=self.model, messages=day["messages"], **self.chat_kwargs)
+            raw = resp.get("message", {}).get("content", "")
+            self._log_call(day, raw, resp, t0)
+        if key:
+            self.cache.put(key, raw)
+        return self._finish_stream(ds) if ds else self._finish_raw(day, raw)
+
+    def _days_hash(self, days):
+        return week_config_hash(days, self.model, self.backend.name, self.batch_days)
+
+    def config_hash(self, week: int):
+        return self._days_hash(self.plan_week(week))
+
+    def generate_week(self, week: int, writer=None, days=None):
+        """Generate one week; each day is handed to writer.write_day() in
+        order as soon as it is done (see elyx_sink). days: the week's
+        plan_week() result, if the caller already has it."""
+        days = days or self.plan_week(week)
+        ck, done = self._open_checkpoint(week, days)
+        batches = iter(self._batches([day for day in days if day["day"] not in done]))
+        for day in days:
+            if day["day"] not in done:
+                # Batches are cut from the pending days in order, so the next
+                # batch always starts at this day
+                batch = next(batches)
+                for d, items in zip(batch, self.run_batch(batch)):
+                    done[d["day"]] = items
+                    if ck:
+                        ck.append(d["day"], items)
+            if writer:
+                writer.write_day(day["day"], done[day["day"]])
+        items = [item for day in days for item in done[day["day"]]]
+        self._remember(week, items)
+        return items
+
+    def write_week(self, week: int, sink):
+        # Plan once: the shard's config hash and the generation share it
+        days = self.plan_week(week)
+        with sink.open_week(week, self._days_hash(days)) as writer:
+            self.generate_week(week, writer, days)
+        return writer.path
+
+    def generate_weeks(self, weeks, max_workers=4, out_dir=".", sink=None):
+        """Generate and write several weeks concurrently; returns {week: path}.
+        With continuity, weeks run one at a time in week order."""
+        sink = sink or JsonSink(out_dir)
+        if self.continuity:
+            weeks, max_workers = sorted(weeks), 1
+        written = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(self.write_week, w, sink): w for w in weeks}
+            for fut in as_completed(futures):
+                week = futures[fut]
+                try:
+                    written[week] = fut.result()
+                    self.close_checkpoint(week)
+                    print(f"✅ Generated: {written[week]}")
+                except Exception as e:
+                    print(f"[WARN] Week {week} failed: {e}")
+        return written
+
+    # ------------ Async path ------------
+
+    async def _stream_day_async(self, day):
+        ds, st = DayStream(day, self), _StreamStats()
+        stream = await self.backend.astream_chat(model=self.model, messages=day["messages"], **self.chat_kwargs)
+        try:
+            async for chunk in stream:
+                if ds.feed(st.feed(chunk)):
+                    break
+        finally:
+            await stream.aclose()
+        return ds, st
+
+    async def _run_batch_async(self, sem, days, ck=None):
+        if len(days) == 1:
+            return [await self._run_day_async(sem, days[0], ck)]
+        req = batch_request(days, self.member)
+        key = self._cache_key(req["messages"])
+        raw = self.cache.get(key) if key else None
+        if raw is not None:
+            self._log_call(req, raw, cached=True, days=req["days"])
+        else:
+            async with sem:
+                t0 = time.perf_counter()
+                resp = await self.backend.achat(model=self.model, messages=req["messages"], **self.chat_kwargs)
+                raw = resp.get("message", {}).get("content", "")
+                self._log_call(req, raw, resp, t0, days=req["days"])
+            if key:
+                self.cache.put(key, raw)
+        blocks = split_days(raw)
+        out = []
+        for day in days:
+            parsed = self._parse(blocks.get(day["day"], ""))
+            if self.topup:
+                async with sem:
+                    parsed = await self._top_up_async(dict(day, batch=req["day"]), parsed)
+            items = self._finish_parsed(day, parsed)
+            if ck:
+                ck.append(day["day"], items)
+            out.append(items)
+        return out
+
+    async def _run_day_async(self, sem, day, ck=None):
+        key = self._cache_key(day["messages"])
+        raw = self.cache.get(key) if key else None
+        parsed = None
+        if raw is not None:
+            self._log_call(day, raw, cached=True)
+        else:
+            async with sem:
+                t0 = time.perf_counter()
+                if self.stream:
+                    ds, st = await self._stream_day_async(day)
+                    ds.flush()
+                    raw, parsed = ds.text, ds.parsed
+                    self._log_call(day, raw, st.response(), t0, ttft_s=st.ttft_s)
+                else:
+                    resp = await self.backend.achat(model=self.model, messages=day["messages"], **self.chat_kwargs)
+                    raw = resp.get("message", {}).get("content", "")
+                    self._log_call(day, raw, resp, t0)
+            if key:
+                self.cache.put(key, raw)
+        if parsed is None:
+            parsed = self._parse(raw)
+        if self.topup:
+            async with sem:
+                parsed = await self._top_up_async(day, parsed)
+        items = self._finish_parsed(day, parsed)
+        if ck:
+            ck.append(day["day"], items)
+        return items
+
+    async def generate_weeks_async(self, weeks, concurrency=8, by_day=False):
+        """Send every day of every requested week at once, at most `concurrency`
+        requests in flight; returns {week: items} with days in order
+        ({week: [day 1 items, ..., day 7 items]} with by_day=True).
+
+        Pair with OLLAMA_NUM_PARALLEL>1 on the server, otherwise requests queue
+        there instead of here.
+        """
+        sem = asyncio.Semaphore(concurrency)
+        batches, tasks = [], []
+        for w in weeks:
+            planned = self.plan_week(w)
+            ck, done = self._open_checkpoint(w, planned)
+            for day in planned:
+                if day["day"] in done:
+                    batches.append([day])
+                    tasks.append(asyncio.sleep(0, [done[day["day"]]]))
+            for batch in self._batches([d for d in planned if d["day"] not in done]):
+                batches.append(batch)
+                tasks.append(self._run_batch_async(sem, batch, ck))
+        outs = await asyncio.gather(*tasks, return_exceptions=True)
+
+        done_days, failed = {}, set()
+        for batch, out in zip(batches, outs):
+            week = batch[0]["week"]
+            if isinstance(out, Exception):
+                if week not in failed:
+                    print(f"[WARN] Week {week} day {batch[0]['day']} failed: {out}")
+                failed.add(week)
+                continue
+            for day, items in zip(batch, out):
+                done_days[week, day["day"]] = items
+        results = {}
+        for w in weeks:
+            if w in failed:
+                continue
+            days = [done_days[w, d] for d in range(1, 8)]
+            self._remember(w, [item for items in days for item in items])
+            results[w] = days if by_day else [item for items in days for item in items]
+        return results
+
+    def generate_weeks_concurrent(self, weeks, concurrency=8, out_dir=".", sink=None):
+        """Async counterpart of generate_weeks: one event loop, all days in flight."""
+        sink = sink or JsonSink(out_dir)
+        if self.continuity:
+            # Each week's prompts depend on the one before: keep its days in
+            # flight together, but finish weeks in order
+            results = {}
+            for week in sorted(weeks):
+                results.update(asyncio.run(self.generate_weeks_async([week], concurrency, by_day=True)))
+        else:
+            results = asyncio.run(self.generate_weeks_async(weeks, concurrency, by_day=True))
+        written = {}
+        for week in sorted(results):
+            with sink.open_week(week, self.config_hash(week)) as writer:
+                for d, items in enumerate(results[week], 1):
+                    writer.write_day(d, items)
+            written[week] = writer.path
+            self.close_checkpoint(week)
+            print(f"✅ Generated: {written[week]}")
+        return written
+
+
+def generate_week(week: int, model=MODEL, backend=None, cache=None, stream=False):
+    return WeekGenerator(backend, model, cache, stream).generate_week(week)
+
+
+def parse_weeks(spec: str):
+    """Parse a week selection like '1-4,19,27' into a sorted list."""
+    weeks = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            weeks.update(range(int(lo), int(hi) + 1))
+        else:
+            weeks.add(int(part))
+    unknown = sorted(weeks - set(WEEK_CONFIGS))
+    if unknown:
+        raise ValueError(f"No config for week(s): {unknown}")
+    return sorted(weeks)
+
+
+def parse_keep_alive(value):
+    # Ollama takes a duration string or a number of seconds (-1 = forever)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def make_backend(args):
+    """One backend, or a PooledBackend when several endpoints are given."""
+    if args.backend == "fake":
+        backends = [get_backend("fake", latency=args.fake_latency,
+                                malformed_rate=args.fake_malformed_rate, drift=args.fake_drift,
+                                parallel=args.fake_parallel, fail_rate=args.fake_fail_rate)
+                    for _ in range(max(1, args.fake_endpoints))]
+    else:
+        hosts = [h.strip() for h in args.hosts.split(",") if h.strip()] or [None]
+        backends = [get_backend("ollama", host=h, timeout=args.timeout) for h in hosts]
+    return backends[0] if len(backends) == 1 else PooledBackend(backends)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Elyx week chats.")
+    parser.add_argument("--weeks", default=f"1-{max(WEEK_CONFIGS)}",
+                        help="Weeks to generate, e.g. '1-4,19' (default: all)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Max weeks generated concurrently")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Send all day requests at once via the async client")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Max in-flight requests in --async mode")
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--format", default="json", choices=["json", "jsonl"],
+                        help="json: pretty-printed week files; jsonl: one message per line")
+    parser.add_argument("--compression", default=None, choices=["gzip", "zstd"],
+                        help="Compress --format jsonl shards (zstd needs the zstandard package)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH,
+                        help="SQLite file for cached model responses")
+    parser.add_argument("--cache-max-mb", type=int, default=256)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--checkpoint-dir", default=None,
+                        help="Where finished days are checkpointed (default: <out-dir>/.checkpoints)")
+    parser.add_argument("--no-checkpoint", action="store_true")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip days already checkpointed under the same config")
+    parser.add_argument("--metrics", nargs="?", const=DEFAULT_METRICS_PATH, default=None,
+                        help="Append per-call telemetry JSONL here (see elyx_metrics.py)")
+    parser.add_argument("--topup", type=int, default=0, metavar="N",
+                        help="Up to N continuation requests for missing lines before padding with filler")
+    parser.add_argument("--batch-days", type=int, default=1, metavar="K",
+                        help="Days per model call (7 = one call per week); not streamed")
+    parser.add_argument("--keep-alive", default=None,
+                        help="Ollama keep_alive, e.g. '30m' or -1, to keep the model warm")
+    parser.add_argument("--continuity", nargs="?", const=DEFAULT_CONTINUITY_DIR, default=None,
+                        metavar="DIR", help="Carry a rolling summary of earlier weeks into each "
+                        "week's prompts (weeks then run in order)")
+    parser.add_argument("--continuity-budget", type=int, default=DEFAULT_BUDGET_TOKENS,
+                        help="Token budget for the continuity summary")
+    parser.add_argument("--prompt-level", default="full", choices=LEVELS,
+                        help="Least system-prompt compaction to apply")
+    parser.add_argument("--prompt-budget", type=int, default=None, metavar="TOKENS",
+                        help="Compact further, level by level, until each call's prompt fits")
+    parser.add_argument("--stream", action="store_true",
+                        help="Parse lines as tokens arrive; stop each day at n_turns")
+    parser.add_argument("--backend", default="ollama", choices=["ollama", "fake"])
+    parser.add_argument("--hosts", default="",
+                        help="Comma-separated Ollama endpoints to load-balance over")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Per-request timeout in seconds for Ollama endpoints")
+    parser.add_argument("--fake-endpoints", type=int, default=1,
+                        help="Pool this many fake backends (stand-ins for --hosts)")
+    parser.add_argument("--fake-parallel", type=int, default=0,
+                        help="Calls each fake endpoint serves at once (0 = unlimited)")
+    parser.add_argument("--fake-fail-rate", type=float, default=0.0)
+    parser.add_argument("--fake-latency", type=float, default=0.0,
+                        help="Seconds per call for --backend fake")
+    parser.add_argument("--fake-malformed-rate", type=float, default=0.1)
+    parser.add_argument("--fake-drift", type=int, default=3,
+                        help="Max +/- lines vs. requested for --backend fake")
+    args = parser.parse_args(argv)
+
+    backend = make_backend(args)
+    if isinstance(backend, PooledBackend):
+        for label in backend.check_health():
+            print(f"[WARN] Endpoint {label} is not responding; routing around it")
+    cache = None if args.no_cache else ResponseCache(
+        args.cache, max_bytes=args.cache_max_mb * 1024 * 1024)
+    checkpoint_dir = None if args.no_checkpoint else (
+        args.checkpoint_dir or os.path.join(args.out_dir, ".checkpoints"))
+    gen = WeekGenerator(backend, args.model, cache, stream=args.stream,
+                        checkpoint_dir=checkpoint_dir, resume=args.resume,
+                        metrics=MetricsLog(args.metrics) if args.metrics else None,
+                        topup=args.topup, batch_days=args.batch_days,
+                        keep_alive=parse_keep_alive(args.keep_alive),
+                        continuity=ContinuityStore(args.continuity, args.continuity_budget)
+                        if args.continuity else None,
+                        prompt=PromptBudget(args.prompt_budget, args.prompt_level)
+                        if args.prompt_budget or args.prompt_level != "full" else None)
+    weeks = parse_weeks(args.weeks)
+    sink = make_sink(args.format, args.out_dir, args.compression)
+    if args.use_async:
+        gen.generate_weeks_concurrent(weeks, concurrency=args.concurrency,
+                                      out_dir=args.out_dir, sink=sink)
+    else:
+        gen.generate_weeks(weeks, max_workers=args.workers, out_dir=args.out_dir, sink=sink)
+    if isinstance(backend, PooledBackend):
+        for label, st in backend.stats().items():
+            print(f"Endpoint {label}: {st}")
+    if args.topup:
+        print(f"Top-up: {gen.topup_stats}")
+    if gen.prompt and gen.prompt.report():
+        print(gen.prompt.report())
+    if cache:
+        print(f"Cache: {cache.stats()}")
+        cache.close()
+
+
+# ------------ Script Entry ------------
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# Member profiles, team rosters and program rules from data files
+# - data/members/<id>.json : one member (names, aliases, PA, profile lines)
+# - data/rosters/<id>.json : the expert team (names, speaker aliases, roles)
+# - data/rules/<id>.txt    : program constraints text
+# - Member bundles the three and renders the week configs (written for
+#   Rohan / Sarah / Singapore) for any other member
+#
+# Usage:
+#   python elyx_members.py list data/members
+#   python elyx_members.py synth --n 200 --out data/members_synth   # load-test profiles
+
+import os
+import re
+import json
+import glob
+import random
+import argparse
+from functools import lru_cache
+from elyx_normalize import SpeakerNormalizer
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Who the WEEK_CONFIGS focus lines and week rules were written about
+TEMPLATE_NAMES = {
+    "name": "Rohan Patel", "short_name": "Rohan", "possessive": "his",
+    "pa_name": "Sarah Tan", "pa_short": "Sarah", "home": "Singapore", "timezone": "SGT",
+}
+
+
+def _alias_regex(aliases):
+    # Longest first so 'Rohan Patel' wins over 'Rohan'
+    return "|".join(re.escape(a) for a in sorted(aliases, key=len, reverse=True))
+
+
+@lru_cache(maxsize=None)
+def load_roster(roster_id: str, data_dir=DATA_DIR):
+    with open(os.path.join(data_dir, "rosters", f"{roster_id}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def load_rules(rules_id: str, data_dir=DATA_DIR):
+    with open(os.path.join(data_dir, "rules", f"{rules_id}.txt"), encoding="utf-8") as f:
+        return "\n" + f.read().strip("\n") + "\n"
+
+
+class Member:
+    def __init__(self, spec: dict, data_dir=DATA_DIR):
+        self.id = spec["id"]
+        self.name = spec["name"]
+        self.short_name = spec.get("short_name", self.name.split()[0])
+        self.aliases = spec.get("aliases", [self.name, self.short_name])
+        self.possessive = spec.get("possessive", "their")
+        self.home = spec.get("home", TEMPLATE_NAMES["home"])
+        self.timezone = spec.get("timezone", TEMPLATE_NAMES["timezone"])
+        self.persona = spec.get("persona", "")
+        self.pa = spec["pa"]
+        self.pa_short = self.pa.get("short_name", self.pa["name"].split()[0])
+        self.roster = load_roster(spec.get("roster", "elyx_core"), data_dir)
+        self.rules = load_rules(spec.get("rules", "default"), data_dir)
+        self.profile = "\n" + "\n".join(spec["profile"]) + "\n"
+
+        experts = self.roster["experts"]
+        self.senders = [self.short_name, self.pa_short] + [x["name"] for x in experts]
+        aliases = {
+            self.short_name: (_alias_regex(self.aliases), False),
+            self.pa_short: (_alias_regex(self.pa.get("aliases", [self.pa["name"], self.pa_short])), False),
+        }
+        for x in experts:
+            aliases[x["name"]] = (x.get("alias", re.escape(x["name"])), x.get("loose", True))
+        self.normalizer = SpeakerNormalizer(self.senders, aliases)
+
+        subs = [(TEMPLATE_NAMES["name"], self.name),
+                (TEMPLATE_NAMES["short_name"], self.short_name),
+                (TEMPLATE_NAMES["pa_name"], self.pa["name"]),
+                (TEMPLATE_NAMES["pa_short"], self.pa_short),
+                (TEMPLATE_NAMES["home"], self.home),
+                (TEMPLATE_NAMES["timezone"], self.timezone),
+                (TEMPLATE_NAMES["possessive"], self.possessive)]
+        self._subs = {old: new for old, new in subs if old != new}
+        self._sub_re = re.compile(
+            r"\b(" + "|".join(re.escape(o) for o in sorted(self._subs, key=len, reverse=True)) + r")\b"
+        ) if self._subs else None
+
+    def render(self, text: str) -> str:
+        """Rewrite template text about Rohan/Sarah/Singapore for this member."""
+        if not self._sub_re:
+            return text
+        return self._sub_re.sub(lambda m: self._subs[m.group(1)], text)
+
+    @property
+    def team_roles(self):
+        lines = [self.roster["title"]]
+        for x in self.roster["experts"]:
+            lines.append(f"- {x['name']} ({x['role']}): {x['duties']}")
+            lines.append(f"  Voice: {x['voice']}")
+        lines.append(f"- {self.pa['name']} (Personal Assistant): {self.pa.get('persona', '')}")
+        lines.append(f"- {self.name} (Member): {self.persona}")
+        return "\n" + "\n".join(lines) + "\n"
+
+
+def load_member(path: str, data_dir=None):
+    """Load one member file; rosters/rules resolve against the data dir that
+    holds it (…/data/members/x.json -> …/data) unless data_dir is given."""
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    if data_dir is None:
+        parent = os.path.dirname(os.path.dirname(os.path.abspath(path)))
+        data_dir = parent if os.path.isdir(os.path.join(parent, "rosters")) else DATA_DIR
+    return Member(spec, data_dir)
+
+
+def member_paths(spec: str):
+    """Member files for a directory, a single file or a glob."""
+    if os.path.isdir(spec):
+        return sorted(glob.glob(os.path.join(spec, "*.json")))
+    if os.path.isfile(spec):
+        return [spec]
+    return sorted(glob.glob(spec))
+
+
+def load_members(spec: str, data_dir=None):
+    return [load_member(p, data_dir) for p in member_paths(spec)]
+
+
+# ------------ Synthetic profiles for load tests ------------
+_FIRST = [("Aarav", "his"), ("Maya", "her"), ("Daniel", "his"), ("Priya", "her"),
+          ("Kenji", "his"), ("Lina", "her"), ("Marcus", "his"), ("Sofia", "her"),
+          ("Arjun", "his"), ("Mei", "her"), ("Omar", "his"), ("Elena", "her"),
+          ("Tomas", "his"), ("Aisha", "her"), ("Liam", "his"), ("Hana", "her")]
+_LAST = ["Shah", "Lim", "Okafor", "Tan", "Kumar", "Nakamura", "Fischer", "Costa",
+         "Haddad", "Reyes", "Novak", "Wong", "Mensah", "Iyer", "Larsen", "Park"]
+_PA = ["Grace Ho", "Leo Chan", "Nina Roy", "Owen Lee", "Tara Singh", "Ivy Goh", "Ben Cole"]
+_HOMES = [("Singapore", "SGT"), ("London", "GMT"), ("Dubai", "GST"),
+          ("Hong Kong", "HKT"), ("Sydney", "AEST"), ("New York", "EST")]
+_JOBS = ["Regional Head of Sales, FinTech", "Partner, law firm", "Founder, logistics startup",
+         "CFO, shipping group", "Managing Director, private equity", "VP Engineering, SaaS"]
+_GOALS = ["Reduce risk of heart disease by maintaining healthy cholesterol/BP",
+          "Improve metabolic health and HbA1c", "Lose 8 kg while keeping strength",
+          "Enhance cognitive function & focus", "Sleep 7h+ consistently", "Run a half marathon"]
+
+
+def synth_member(i: int, rng):
+    first, possessive = rng.choice(_FIRST)
+    last = rng.choice(_LAST)
+    pa_name = rng.choice(_PA)
+    home, tz = rng.choice(_HOMES)
+    age = rng.randint(32, 64)
+    goals = rng.sample(_GOALS, 3)
+    return {
+        "id": f"{first}_{last}_{i:04d}".lower(),
+        "name": f"{first} {last}",
+        "short_name": first,
+        "aliases": [f"{first} {last}", first],
+        "possessive": possessive,
+        "home": home,
+        "timezone": tz,
+        "persona": rng.choice(["Busy, analytical, professional but casual.",
+                               "Warm, curious, sometimes overcommitted.",
+                               "Direct, skeptical, wants evidence."]),
+        "pa": {"name": pa_name, "short_name": pa_name.split()[0],
+               "aliases": [pa_name, pa_name.split()[0]],
+               "persona": f"Scheduling & coordination for {first}; concise & precise."},
+        "roster": "elyx_core",
+        "rules": "default",
+        "profile": [
+            "Member’s Profile",
+            "1) Snapshot",
+            f"- Preferred name: {first} {last}",
+            f"- Age: {age}",
+            f"- Residence & travel hubs: {home}; regular business travel",
+            f"- Occupation: {rng.choice(_JOBS)}",
+            f"- Personal assistant: {pa_name}",
+            "",
+            "2) Core Outcomes & Timelines",
+        ] + [f"- {g} by {rng.choice(['Jun', 'Dec'])} {rng.choice([2026, 2027])}" for g in goals] + [
+            "",
+            "3) Preferences",
+            f"- Channels: Important updates + scheduling via PA ({pa_name.split()[0]})",
+            "- Detail depth: Prefers exec summaries",
+        ],
+    }
+
+
+def write_synth_members(n: int, out_dir: str, seed=0):
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i in range(n):
+        spec = synth_member(i, rng)
+        path = os.path.join(out_dir, f"{spec['id']}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(spec, f, indent=2, ensure_ascii=False)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or synthesize member profiles.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    ls = sub.add_parser("list")
+    ls.add_argument("members", nargs="?", default=os.path.join(DATA_DIR, "members"))
+    syn = sub.add_parser("synth")
+    syn.add_argument("--n", type=int, default=100)
+    syn.add_argument("--seed", type=int, default=0)
+    syn.add_argument("--out", default=os.path.join(DATA_DIR, "members_synth"))
+    args = parser.parse_args(argv)
+
+    if args.cmd == "list":
+        for m in load_members(args.members):
+            print(f"{m.id}: {m.name} (PA {m.pa_short}, {m.home}) senders={m.senders}")
+    else:
+        # Synthetic members still use the shipped rosters/rules
+        paths = write_synth_members(args.n, args.out, args.seed)
+        print(f"✅ Wrote {len(paths)} member profiles to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# Per-call LLM telemetry for the week generator
+# - One JSONL record per chat call: Ollama timing/token counters plus week,
+#   day, requested n_turns, parsed-line yield and filler count
+# - `python elyx_metrics.py elyx_metrics.jsonl` prints a per-week summary:
+#   tokens/sec, time-to-first-token, prompt tokens spent on the system
+#   prompt (member profile / team roster / program rules) and wasted tokens
+#
+# Batched calls (engine --batch-days) are one record with "days": <count>,
+# "day": "<first>-<last>" and n_turns summed over the batch.
+#
+# Top-up continuation calls (engine --topup) carry "topup": <attempt> and
+# n_turns = the lines they asked for; the lines they add are credited back
+# against the filler of the call they continue. Top-ups of a batched day keep
+# their own int day and add "batch": "<first>-<last>", the batch record's day.
+# Filler is tallied per (member, week, batch or day).
+#
+# prompt_tokens_est is the local estimate (elyx_prompt) of each call's prompt,
+# logged even when Ollama reports no prompt_eval_count (cache hits, fakes).
+#
+# Wasted tokens are generated tokens that never reach the output: rejected
+# malformed lines and lines past n_turns. Estimated from the character share
+# of the response that survived parsing.
+
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import defaultdict
+from elyx_prompt import messages_tokens
+
+DEFAULT_METRICS_PATH = "elyx_metrics.jsonl"
+
+_OLLAMA_FIELDS = ["prompt_eval_count", "prompt_eval_duration", "eval_count",
+                  "eval_duration", "load_duration", "total_duration"]
+
+
+class MetricsLog:
+    def __init__(self, path=DEFAULT_METRICS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, rec: dict):
+        self.extend([rec])
+
+    def extend(self, records):
+        text = "".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in records)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(text)
+
+
+class MetricsBuffer:
+    """Keeps records in memory instead of appending them. Worker processes
+    (elyx_batch) hand theirs back with the job result and the parent writes
+    them through its one MetricsLog, so lines never interleave."""
+
+    def __init__(self):
+        self._records = []
+        self._lock = threading.Lock()
+
+    def record(self, rec: dict):
+        with self._lock:
+            self._records.append(rec)
+
+    def drain(self):
+        with self._lock:
+            records, self._records = self._records, []
+        return records
+
+
+def call_record(day, raw, parsed, resp=None, **extra):
+    """Build one metrics record for a finished chat call.
+
+    parsed: the valid (sender, message) lines found in raw, before fit_turns.
+    resp: Ollama-shaped response (or final stream chunk) carrying the counters.
+    """
+    messages = day["messages"]
+    n_turns = day["n_turns"]
+    kept = parsed[:n_turns]
+    rec = {
+        "ts": round(time.time(), 3),
+        "week": day["week"],
+        "day": day["day"],
+        "n_turns": n_turns,
+        "raw_lines": sum(1 for ln in raw.splitlines() if ln.strip()),
+        "valid_lines": len(parsed),
+        "filler": max(0, n_turns - len(parsed)) if parsed else 0,
+        "raw_chars": len(raw),
+        "kept_chars": sum(len(s) + 2 + len(m) for s, m in kept),
+        "system_chars": sum(len(m["content"]) for m in messages if m["role"] == "system"),
+        "prompt_chars": sum(len(m["content"]) for m in messages),
+        "prompt_tokens_est": messages_tokens(messages),
+    }
+    if "batch" in day:
+        rec["batch"] = day["batch"]
+    for field in _OLLAMA_FIELDS:
+        rec[field] = (resp or {}).get(field)
+    rec.update(extra)
+    return rec
+
+
+def read_metrics(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _ratio(a, b, digits=3):
+    return round(a / b, digits) if b else None
+
+
+def summarize(records):
+    """Aggregate records into {week: stats} plus an "all" row."""
+    groups = defaultdict(list)
+    for rec in records:
+        groups[rec["week"]].append(rec)
+        groups["all"].append(rec)
+
+    summary = {}
+    for week, recs in groups.items():
+        live = [r for r in recs if not r.get("cached")]
+        eval_tokens = sum(r["eval_count"] or 0 for r in live)
+        eval_s = sum(r["eval_duration"] or 0 for r in live) / 1e9
+        prompt_tokens = system_tokens = wasted = 0.0
+        ttfts = []
+        for r in live:
+            # Ollama skips prompt_eval_count when the prompt was fully cached
+            # or a stream was cut early; fall back to the local estimate
+            pt = r["prompt_eval_count"]
+            if pt is None:
+                pt = r.get("prompt_tokens_est") or r["prompt_chars"] / 4
+            prompt_tokens += pt
+            system_tokens += pt * r["system_chars"] / max(r["prompt_chars"], 1)
+            if r["raw_chars"]:
+                wasted += (r["eval_count"] or 0) * (1 - min(r["kept_chars"] / r["raw_chars"], 1))
+            if r.get("ttft_s") is not None:
+                ttfts.append(r["ttft_s"])
+            elif r["prompt_eval_duration"] is not None:
+                ttfts.append(((r["load_duration"] or 0) + r["prompt_eval_duration"]) / 1e9)
+        raw_lines = sum(r["raw_lines"] for r in recs)
+        filler = defaultdict(int)
+        for r in recs:
+            # str(): batch days are "1-7", single days ints; one key space
+            key = (r.get("member"), r["week"], str(r.get("batch", r["day"])))
+            if r.get("topup"):
+                filler[key] -= min(r["valid_lines"], r["n_turns"])
+            else:
+                filler[key] += r["filler"]
+        topups = [r for r in live if r.get("topup")]
+        live_lines = sum(min(r["valid_lines"], r["n_turns"]) for r in live)
+        summary[week] = {
+            "calls": len(live),
+            "cache_hits": len(recs) - len(live),
+            "n_turns": sum(r["n_turns"] for r in recs),
+            "yield": _ratio(sum(min(r["valid_lines"], r["n_turns"]) for r in recs), raw_lines),
+            "filler": sum(max(0, f) for f in filler.values()),
+            "tokens_per_s": _ratio(eval_tokens, eval_s, 1),
+            "ttft_s": round(sum(ttfts) / len(ttfts), 3) if ttfts else None,
+            "prompt_tokens": int(prompt_tokens),
+            "est_prompt_tokens": round(sum(r.get("prompt_tokens_est") or 0 for r in recs) / len(recs)),
+            "system_prompt_tokens": int(system_tokens),
+            "system_prompt_share": _ratio(system_tokens, prompt_tokens),
+            "prompt_tokens_per_line": _ratio(prompt_tokens, live_lines, 1),
+            "eval_tokens": eval_tokens,
+            "wasted_tokens": int(wasted),
+            "wasted_ratio": _ratio(wasted, eval_tokens),
+            "topup_calls": len(topups),
+            "topup_tokens": sum((r["prompt_eval_count"] or 0) + (r["eval_count"] or 0) for r in topups),
+        }
+    return summary
+
+
+def format_summary(summary):
+    cols = ["calls", "cache_hits", "yield", "filler", "tokens_per_s", "ttft_s", "est_prompt_tokens",
+            "system_prompt_tokens", "system_prompt_share", "prompt_tokens_per_line", "eval_tokens", "wasted_ratio", "topup_calls", "topup_tokens"]
+    rows = [["week"] + cols]
+    weeks = sorted(w for w in summary if w != "all") + (["all"] if "all" in summary else [])
+    for w in weeks:
+        rows.append([str(w)] + ["-" if summary[w][c] is None else str(summary[w][c]) for c in cols])
+    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(v.rjust(widths[i]) for i, v in enumerate(r)) for r in rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize generator call metrics.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_METRICS_PATH)
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+    try:
+        summary = summarize(read_metrics(args.path))
+    except FileNotFoundError:
+        print(f"[WARN] No metrics file at {args.path}")
+        return 1
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# Speaker normalization for generated chat lines
+# - One compiled pattern, built once from ALLOWED_SENDERS + SPEAKER_ALIASES,
+#   canonicalizes and splits 'Speaker: message' lines in a single pass
+# - split_lines() takes a whole model response (one finditer over the text)
+# - canonical()/canonical_many() map bare speaker names, used by the dashboard
+#
+# Run `python elyx_normalize.py` to benchmark against the old per-line
+# chain of re.sub calls.
+
+import re
+import time
+
+ALLOWED_SENDERS = ["Rohan", "Sarah", "Ruby",
+                   "Dr. Warren", "Advik", "Carla", "Rachel", "Neel"]
+
+# canonical sender -> (alias regex, loose). A strict alias must be followed
+# directly by the colon ("Sarah Tan: hi"); a loose one may carry a suffix
+# up to the first colon ("Ruby (Concierge): hi"). Same rules as the
+# original week scripts. Use [^\S\n] rather than \s so patterns never span lines.
+SPEAKER_ALIASES = {
+    "Rohan": (r"Rohan Patel|Rohan", False),
+    "Sarah": (r"Sarah Tan|Sarah", False),
+    "Ruby": (r"Ruby", True),
+    "Dr. Warren": (r"Dr\.?[^\S\n]*Warren", True),
+    "Advik": (r"Advik", True),
+    "Carla": (r"Carla", True),
+    "Rachel": (r"Rachel", True),
+    "Neel": (r"Neel", True),
+}
+
+# Line breaks str.splitlines() honours but a MULTILINE '$' does not
+_OTHER_BREAKS = re.compile("\r\n|[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+class SpeakerNormalizer:
+    def __init__(self, senders=ALLOWED_SENDERS, aliases=SPEAKER_ALIASES):
+        self.senders = list(senders)
+        self._groups = {}
+        line_alts, name_alts = [], []
+        # Alternation order = sender order, so the first matching alias wins
+        # exactly like the old sequential re.sub chain. Each alternative is one
+        # outer group s<i> (closes last, so m.lastgroup names the sender)
+        # around an inner m<i> holding the message.
+        for i, sender in enumerate(self.senders):
+            alias, loose = aliases.get(sender, (re.escape(sender), False))
+            self._groups[f"s{i}"] = (sender, f"m{i}")
+            tail = r".*?:" if loose else r"[^\S\n]*:"
+            line_alts.append(
+                rf"(?P<s{i}>(?:{alias}){tail}[^\S\n]*(?P<m{i}>.*))")
+            name_alts.append(
+                f"(?P<s{i}>(?:{alias})" + ("" if loose else r"\s*$") + ")")
+        self._line_re = re.compile(
+            r"^[^\S\n]*(?:" + "|".join(line_alts) + r")$", re.MULTILINE)
+        self._name_re = re.compile(r"^\s*(?:" + "|".join(name_alts) + r")")
+
+    def split(self, line: str):
+        """Return (sender, message) for a valid chat line, else None."""
+        m = self._line_re.match(line.strip())
+        if not m:
+            return None
+        sender, msg_group = self._groups[m.lastgroup]
+        message = m.group(msg_group).strip()
+        return (sender, message) if message else None
+
+    def split_lines(self, raw: str):
+        """Parse a whole response into [(sender, message), ...] in one pass."""
+        raw = _OTHER_BREAKS.sub("\n", raw)
+        groups = self._groups
+        out = []
+        for m in self._line_re.finditer(raw):
+            sender, msg_group = groups[m.lastgroup]
+            message = m.group(msg_group).strip()
+            if message:
+                out.append((sender, message))
+        return out
+
+    def canonical(self, name):
+        """Map a bare speaker name ('Rohan Patel', 'Dr Warren (MD)') to its
+        canonical sender; unknown names are returned unchanged."""
+        if not isinstance(name, str):
+            return name
+        m = self._name_re.match(name)
+        return self._groups[m.lastgroup][0] if m else name
+
+    def canonical_many(self, names):
+        return [self.canonical(n) for n in names]
+
+
+NORMALIZER = SpeakerNormalizer()
+
+
+def split_line(line: str):
+    return NORMALIZER.split(line)
+
+
+def split_lines(raw: str):
+    return NORMALIZER.split_lines(raw)
+
+
+# ------------ Benchmark ------------
+
+
+def _legacy_parse_lines(raw: str):
+    # The per-line chain every N_weekN.py script runs
+    parsed = []
+    for ln in [ln.strip() for ln in raw.splitlines() if ln.strip()]:
+        ln = re.sub(r'^(Rohan Patel|Rohan)\s*:\s*', 'Rohan: ', ln)
+        ln = re.sub(r'^(Sarah Tan|Sarah)\s*:\s*', 'Sarah: ', ln)
+        ln = re.sub(r'^(Ruby).*?:\s*', 'Ruby: ', ln)
+        ln = re.sub(r'^(Dr\.?\s*Warren).*?:\s*', 'Dr. Warren: ', ln)
+        ln = re.sub(r'^(Advik).*?:\s*', 'Advik: ', ln)
+        ln = re.sub(r'^(Carla).*?:\s*', 'Carla: ', ln)
+        ln = re.sub(r'^(Rachel).*?:\s*', 'Rachel: ', ln)
+        ln = re.sub(r'^(Neel).*?:\s*', 'Neel: ', ln)
+        m = re.match(
+            r'^(Rohan|Sarah|Ruby|Dr\. Warren|Advik|Carla|Rachel|Neel):\s*(.+)$', ln)
+        if not m:
+            continue
+        sender, message = m.group(1), m.group(2).strip()
+        if message:
+            parsed.append((sender, message))
+    return parsed
+
+
+def benchmark(n_lines=100_000, seed=0):
+    from elyx_backends import FakeBackend
+    backend = FakeBackend(seed=seed, malformed_rate=0.15, drift=3)
+    responses, total = [], 0
+    while total < n_lines:
+        content = backend.chat("bench", [{"role": "user", "content": f"Day {len(responses)}: Generate exactly 20 lines."}])["message"]["content"]
+        responses.append(content)
+        total += content.count("\n") + 1
+
+    t0 = time.perf_counter()
+    legacy = [_legacy_parse_lines(r) for r in responses]
+    t1 = time.perf_counter()
+    fast = [split_lines(r) for r in responses]
+    t2 = time.perf_counter()
+    return {
+        "lines": total,
+        "legacy_s": round(t1 - t0, 4),
+        "compiled_s": round(t2 - t1, 4),
+        "speedup": round((t1 - t0) / max(t2 - t1, 1e-9), 2),
+        "identical": legacy == fast,
+    }
+
+
+if __name__ == "__main__":
+    print(benchmark())
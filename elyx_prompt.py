@@ -0,0 +1,202 @@
+# Prompt sizing and compaction
+# - estimate_tokens(): rough local token count, no tokenizer download; used
+#   for budgeting and logged per call (Ollama's prompt_eval_count is the truth)
+# - Compaction levels for the system prompt, cheapest first:
+#     full      the original wording, byte for byte
+#     dedupe    say everything once: profile/rule lines the week's focus
+#               lines (user prompt) or an earlier block already cover are
+#               dropped, and the user prompt's constraints, which restate the
+#               system rules (speakers, style, format), are folded into them
+#     compact   one line per profile/rules section instead of a bullet list
+#     lean      team roster without the "Voice:" lines
+#     brief     profile cut to snapshot + core outcomes
+# - PromptBudget picks the first level whose prompts fit a per-call budget
+#
+# Usage:
+#   python elyx_engine.py --prompt-level compact
+#   python elyx_engine.py --prompt-budget 900          # compact only as needed
+#   python elyx_prompt.py --weeks 1-32                 # tokens per level
+
+import re
+import argparse
+import threading
+
+LEVELS = ["full", "dedupe", "compact", "lean", "brief"]
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d|[^\sA-Za-z\d]")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_HEADER_RE = re.compile(r"^(?:\d+\)\s*)?([^-\s].*?):?$")
+_STOPWORDS = frozenset("a an and are as at be but by for in is it its may of on or "
+                       "per that the this to up via with".split())
+# A line whose (stemmed) content words are this much covered by one line
+# already said adds nothing, e.g. "Member starts up to 5 curiosity questions
+# per week on average." after "Rohan asks up to 5 curiosity questions during
+# the week." (the member's names count as "member")
+NEAR_DUP = 0.6
+
+
+def estimate_tokens(text: str) -> int:
+    """Words cost one token per ~7 letters, digits and symbols one each."""
+    return sum(1 + (len(t) - 1) // 7 if t[0].isalpha() else 1 for t in _TOKEN_RE.findall(text))
+
+
+def messages_tokens(messages) -> int:
+    # ~4 tokens of chat-template framing per message
+    return sum(estimate_tokens(m["content"]) + 4 for m in messages)
+
+
+def level_index(level) -> int:
+    if isinstance(level, int):
+        return level
+    if level not in LEVELS:
+        raise ValueError(f"Unknown prompt level '{level}'; choose {', '.join(LEVELS)}")
+    return LEVELS.index(level)
+
+
+def _words(line: str, aliases=None):
+    # 5-letter prefixes: a cheap stemmer (intermittent/intermittently)
+    aliases = aliases or {}
+    return frozenset(aliases.get(w, w)[:5] for w in _WORD_RE.findall(line.lower())
+                     if w not in _STOPWORDS)
+
+
+def _is_dup(words, seen):
+    return any(len(words & s) >= 3 and len(words & s) / len(words) >= NEAR_DUP
+               for s in seen)
+
+
+def dedupe_blocks(blocks, reference=(), names=()):
+    """Drop bullet lines already said (exactly or nearly) by a reference line
+    or an earlier bullet. names: the member's names, which match the word
+    "member". Headers and blank lines are kept."""
+    aliases = {w: "member" for n in names for w in _WORD_RE.findall(n.lower())}
+    seen = [w for w in (_words(ln, aliases) for ln in reference) if len(w) >= 3]
+    out = []
+    for block in blocks:
+        kept = []
+        for line in block.split("\n"):
+            words = _words(line, aliases)
+            if len(words) >= 3 and line.lstrip().startswith("-"):
+                if _is_dup(words, seen):
+                    continue
+                seen.append(words)
+            kept.append(line)
+        out.append("\n".join(kept))
+    return out
+
+
+def compact_block(text: str) -> str:
+    """Fold each header and its bullets into one line:
+    '1) Snapshot' + '- a' + '- b'  ->  'Snapshot: a; b'."""
+    lines, header, items = [], None, []
+
+    def flush():
+        if items:
+            lines.append(f"{header}: " + "; ".join(items) if header else "; ".join(items))
+        elif header is not None:
+            lines.append(header)
+
+    for line in text.strip("\n").split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("-"):
+            items.append(line.lstrip("- ").rstrip("."))
+        elif items and not _HEADER_RE.match(line):
+            items[-1] += " " + line
+        else:
+            flush()
+            m = _HEADER_RE.match(line)
+            header, items = (m.group(1) if m else line), []
+    flush()
+    return "\n" + "\n".join(lines) + "\n"
+
+
+def drop_voices(team: str) -> str:
+    return "\n".join(ln for ln in team.split("\n") if not ln.strip().startswith("Voice:"))
+
+
+def brief_profile(profile: str, sections=2) -> str:
+    """Keep the title and the first `sections` numbered sections."""
+    out, seen = [], 0
+    for line in profile.split("\n"):
+        if re.match(r"^\s*\d+\)", line):
+            seen += 1
+        if seen > sections:
+            break
+        out.append(line)
+    return "\n".join(out).rstrip("\n") + "\n"
+
+
+class PromptBudget:
+    """Per-call prompt budget.
+
+    level: the least compaction to apply (a LEVELS name or index).
+    max_tokens: if set, compaction steps up from `level` until the estimated
+    prompt fits; a prompt that cannot fit goes out at the last level with a
+    warning (instructions are never cut). over_budget counts those prompts,
+    each once however often it is re-planned, for the end-of-run report.
+    """
+
+    def __init__(self, max_tokens=None, level="full"):
+        self.max_tokens = max_tokens
+        self.level = level_index(level)
+        self._over = {}
+        self._lock = threading.Lock()
+
+    @property
+    def over_budget(self) -> int:
+        return len(self._over)
+
+    def fit(self, render, key=None):
+        """render(level) -> list of messages; returns (level, messages) for
+        the first level that fits. key names the prompt (e.g. member and week)
+        in the over-budget tally."""
+        for level in range(self.level, len(LEVELS)):
+            messages = render(level)
+            if self.max_tokens is None or messages_tokens(messages) <= self.max_tokens:
+                return level, messages
+        tokens = messages_tokens(messages)
+        with self._lock:
+            first = key not in self._over
+            self._over[key] = tokens
+        if first:
+            label = "" if key is None else f" ({key})"
+            print(f"[WARN] Prompt{label} is ~{tokens} tokens at level "
+                  f"'{LEVELS[-1]}', over the {self.max_tokens} token budget")
+        return level, messages
+
+    def report(self):
+        """One end-of-run line, or None when every prompt fit."""
+        if not self.over_budget:
+            return None
+        return (f"[WARN] {self.over_budget} prompt(s) over the {self.max_tokens} token "
+                f"budget even at level '{LEVELS[-1]}' (largest ~{max(self._over.values())})")
+
+
+def main(argv=None):
+    from elyx_engine import WEEK_CONFIGS, parse_weeks, plan_day
+
+    parser = argparse.ArgumentParser(description="Estimated prompt tokens per compaction level.")
+    parser.add_argument("--weeks", default=f"1-{max(WEEK_CONFIGS)}")
+    args = parser.parse_args(argv)
+
+    weeks = parse_weeks(args.weeks)
+    rows = [["level", "system", "user", "per_call", "saved"]]
+    full = None
+    for i, name in enumerate(LEVELS):
+        system = user = 0
+        for week in weeks:
+            msgs = plan_day(week, 1, prompt=PromptBudget(level=i))["messages"]
+            system += estimate_tokens(msgs[0]["content"])
+            user += estimate_tokens(msgs[1]["content"])
+        per_call = (system + user) / len(weeks)
+        full = full or per_call
+        rows.append([name, str(system // len(weeks)), str(user // len(weeks)),
+                     str(round(per_call)), f"{1 - per_call / full:.0%}"])
+    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+    print("\n".join("  ".join(v.rjust(widths[i]) for i, v in enumerate(r)) for r in rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# Publish generator output into the dashboard's data directory
+# - Reads every generator output format: elyx_weekN_communications.json,
+#   .jsonl[.gz|.zst] shards (elyx_sink) and plain-text elyx_weekN_chats.txt
+#   ("[MM/DD/YY, HH:MM AM] Speaker: message" lines, as 22_week2.py writes, or
+#   "YYYY-MM-DD HH:MM Speaker: message"); timestamps are parsed like the
+#   dashboard parses them (elyx_corpus.parse_dt)
+# - Normalizes to the dashboard's shard layout: weekNN_conversation.json,
+#   a list of {timestamp, sender, message, event} with canonical senders
+# - Normalized records are schema-checked (elyx_validate); rejects are left out
+#   and written to <dest>/.quarantine/ with their reasons
+# - Each shard is written to a temp file and swapped in with os.replace;
+#   shards whose bytes would not change are left alone (mtime untouched),
+#   so the dashboard only re-parses what actually changed
+#
+# Usage:
+#   python elyx_publish.py --src out/                 # into the dashboard folder
+#   python elyx_publish.py --src out/ --dest data/ --dry-run
+
+import os
+import re
+import glob
+import json
+import hashlib
+import argparse
+import pandas as pd
+from elyx_normalize import NORMALIZER
+from elyx_classify import CLASSIFIERS
+from elyx_sink import read_shard
+from elyx_engine import WEEK_CONFIGS
+from elyx_validate import RecordValidator, write_rejects
+from elyx_corpus import parse_dt
+
+DASHBOARD_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_NAME = ".elyx_published.json"
+
+_SHARD_RE = re.compile(r"^elyx_week(\d+)_communications\.(json|jsonl|jsonl\.gz|jsonl\.zst)$")
+_TXT_RE = re.compile(r"^elyx_week(\d+)_chats\.txt$")
+# "[...]" stamp (WhatsApp export style) or a bare "YYYY-MM-DD HH:MM[:SS]"
+_TXT_LINE_RE = re.compile(r"^(\[[^\]]+\]|\d{4}-\d{2}-\d{2} \d{2}:\d{2}(?::\d{2})?)\s+(.*)$")
+
+
+def dashboard_name(week: int):
+    return f"week{week:02d}_conversation.json"
+
+
+def find_sources(src_dirs):
+    """Return {week: path}; structured shards win over plain-text chats."""
+    found = {}
+    for src in src_dirs:
+        for path in sorted(glob.glob(os.path.join(src, "elyx_week*"))):
+            name = os.path.basename(path)
+            m = _SHARD_RE.match(name) or _TXT_RE.match(name)
+            if not m or os.path.getsize(path) == 0:
+                continue
+            week = int(m.group(1))
+            prev = found.get(week)
+            if prev and prev.endswith(".txt") and not path.endswith(".txt"):
+                prev = None
+            if prev:
+                print(f"[WARN] Week {week}: using {prev}, ignoring {path}")
+                continue
+            found[week] = path
+    return found
+
+
+def read_txt_chats(path: str):
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            m = _TXT_LINE_RE.match(line.strip())
+            if not m:
+                continue
+            ts = parse_dt(m.group(1))
+            parsed = NORMALIZER.split(m.group(2))
+            if parsed and not pd.isna(ts):
+                fmt = "%Y-%m-%d %H:%M:%S" if ts.second else "%Y-%m-%d %H:%M"
+                items.append({"timestamp": ts.strftime(fmt),
+                              "sender": parsed[0], "message": parsed[1]})
+    return items
+
+
+def normalize_items(items, week: int):
+    """Canonical senders, an event on every message, sorted by timestamp."""
+    rules = WEEK_CONFIGS[week]["event_rules"] if week in WEEK_CONFIGS else "base"
+    classifier = CLASSIFIERS[rules]
+    out = []
+    for item in items:
+        message = str(item.get("message", "")).strip()
+        if not message or not item.get("timestamp"):
+            continue
+        out.append({
+            "timestamp": item["timestamp"],
+            "sender": NORMALIZER.canonical(item.get("sender") or item.get("speaker")),
+            "message": message,
+            "event": item.get("event") or classifier.classify(message),
+        })
+    # Stable sort keeps same-minute messages in conversation order
+    out.sort(key=lambda it: it["timestamp"])
+    return out
+
+
+def _signature(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _load_state(dest):
+    try:
+        with open(os.path.join(dest, STATE_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _loads(data: bytes):
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def _write_atomic(path, data: bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def publish(src_dirs, dest=DASHBOARD_DIR, dry_run=False):
+    """Publish every week found under src_dirs; returns {"written": [...],
+    "unchanged": [...], "skipped": [...]} of dashboard shard names plus
+    "quarantined": {name: rejected record count}."""
+    state = _load_state(dest)
+    validator = RecordValidator()
+    report = {"written": [], "unchanged": [], "skipped": [], "quarantined": {}}
+    for week, src in sorted(find_sources(src_dirs).items()):
+        name = dashboard_name(week)
+        target = os.path.join(dest, name)
+        prev = state.get(name)
+        # Same source file as last time and the shard is still ours: skip reading
+        if (prev and prev["source"] == os.path.abspath(src) and prev["source_sig"] == _signature(src)
+                and os.path.exists(target) and prev["sig"] == _signature(target)):
+            report["unchanged"].append(name)
+            continue
+        try:
+            raw = read_txt_chats(src) if src.endswith(".txt") else read_shard(src)
+        except Exception as e:
+            print(f"[WARN] Could not read {src}: {e}")
+            report["skipped"].append(name)
+            continue
+        items, rejects = validator.split(normalize_items(raw, week))
+        if rejects:
+            report["quarantined"][name] = len(rejects)
+            print(f"[WARN] {src}: {len(rejects)} record(s) failed validation")
+        if not dry_run:
+            write_rejects(dest, name, rejects)
+        if not items:
+            print(f"[WARN] No messages in {src}; leaving {name} alone")
+            report["skipped"].append(name)
+            continue
+        data = json.dumps(items, indent=2, ensure_ascii=False).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        changed = True
+        if os.path.exists(target):
+            with open(target, "rb") as f:
+                current = f.read()
+            # Same messages with different bytes (e.g. the CRLF files in the
+            # repo) count as unchanged too
+            changed = hashlib.sha256(current).hexdigest() != digest and _loads(current) != items
+        if changed and not dry_run:
+            _write_atomic(target, data)
+        report["written" if changed else "unchanged"].append(name)
+        if not dry_run:
+            state[name] = {"source": os.path.abspath(src), "source_sig": _signature(src),
+                           "sig": _signature(target), "sha256": digest}
+    if not dry_run:
+        _write_atomic(os.path.join(dest, STATE_NAME),
+                      json.dumps(state, indent=2, sort_keys=True).encode("utf-8"))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish generated weeks to the dashboard.")
+    parser.add_argument("--src", nargs="+", default=["."],
+                        help="Generator output dir(s)")
+    parser.add_argument("--dest", default=DASHBOARD_DIR,
+                        help="Dashboard data dir (default: next to elyx_1.py)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report what would change without writing")
+    args = parser.parse_args(argv)
+
+    report = publish(args.src, args.dest, args.dry_run)
+    verb = "Would publish" if args.dry_run else "Published"
+    for name in report["written"]:
+        print(f"✅ {verb}: {os.path.join(args.dest, name)}")
+    print(f"{verb} {len(report['written'])}, unchanged {len(report['unchanged'])}, "
+          f"skipped {len(report['skipped'])}, "
+          f"quarantined {sum(report['quarantined'].values())} record(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# Output sinks for generated weeks
+# - JsonSink:  elyx_weekN_communications.json, pretty-printed (the original format)
+# - JsonlSink: elyx_weekN_communications.jsonl[.gz|.zst], one message per
+#   line, flushed after every day
+# - Shards are written to a temp file and renamed into place on close, so a
+#   reader never sees half a week
+# - Every finished shard appends an entry to elyx_manifest.jsonl (week, day
+#   count, message count, config hash, size): a record of which config
+#   produced each shard, read back with read_manifest(). Append-only, so
+#   several processes can share one output directory; the last entry per file wins.
+
+import io
+import os
+import gzip
+import json
+import time
+import threading
+
+MANIFEST_NAME = "elyx_manifest.jsonl"
+COMPRESSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+# Every extension a week shard may have; writing one format removes the others
+SHARD_SUFFIXES = [".json", ".jsonl", ".jsonl.gz", ".jsonl.zst"]
+
+
+def shard_stem(week: int):
+    return f"elyx_week{week}_communications"
+
+
+def read_manifest(out_dir: str):
+    """Return {file name: latest entry} for shards that still exist."""
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line from a killed writer
+            entries[entry["file"]] = entry
+    return {name: e for name, e in entries.items()
+            if os.path.exists(os.path.join(out_dir, name))}
+
+
+class _WeekWriter:
+    """Collects one week's days; use via Sink.open_week() as a context manager."""
+
+    def __init__(self, sink, week, config_hash):
+        self.sink = sink
+        self.week = week
+        self.config_hash = config_hash
+        self.path = os.path.join(sink.out_dir, shard_stem(week) + sink.suffix)
+        self.tmp = self.path + ".tmp"
+        self.days = 0
+        self.messages = 0
+        self._open()
+
+    def _open(self):
+        pass
+
+    def write_day(self, day: int, items):
+        self.days += 1
+        self.messages += len(items)
+
+    def _finish(self):
+        pass
+
+    def _discard(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._discard()
+            if os.path.exists(self.tmp):
+                os.remove(self.tmp)
+            return False
+        self._finish()
+        os.replace(self.tmp, self.path)
+        self.sink._committed(self)
+        return False
+
+
+class _JsonWriter(_WeekWriter):
+    def _open(self):
+        self.items = []
+
+    def write_day(self, day, items):
+        super().write_day(day, items)
+        self.items.extend(items)
+
+    def _finish(self):
+        with open(self.tmp, "w", encoding="utf-8") as f:
+            json.dump(self.items, f, indent=2, ensure_ascii=False)
+
+
+class _JsonlWriter(_WeekWriter):
+    def _open(self):
+        self._raw = open(self.tmp, "wb")
+        if self.sink.compression == "gzip":
+            # mtime=0 keeps identical weeks byte-identical
+            self._f = gzip.GzipFile(fileobj=self._raw, mode="wb", mtime=0)
+        elif self.sink.compression == "zstd":
+            import zstandard
+            self._f = zstandard.ZstdCompressor(level=self.sink.level or 3).stream_writer(
+                self._raw, closefd=False)
+        else:
+            self._f = self._raw
+
+    def write_day(self, day, items):
+        super().write_day(day, items)
+        self._f.write("".join(
+            json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for item in items).encode("utf-8"))
+        # Sync-flush the compressor too, so a crash keeps every finished day readable
+        self._f.flush()
+        if self._f is not self._raw:
+            self._raw.flush()
+
+    def _finish(self):
+        if self._f is not self._raw:
+            self._f.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+
+    def _discard(self):
+        if self._f is not self._raw:
+            self._f.close()
+        self._raw.close()
+
+
+class JsonSink:
+    format = "json"
+    _writer = _JsonWriter
+
+    def __init__(self, out_dir="."):
+        self.out_dir = out_dir
+        self.compression = None
+        self.suffix = ".json"
+        self._lock = threading.Lock()
+
+    def open_week(self, week: int, config_hash: str = None):
+        os.makedirs(self.out_dir, exist_ok=True)
+        return self._writer(self, week, config_hash)
+
+    def _committed(self, writer):
+        name = os.path.basename(writer.path)
+        for suffix in SHARD_SUFFIXES:
+            other = os.path.join(self.out_dir, shard_stem(writer.week) + suffix)
+            if other != writer.path and os.path.exists(other):
+                os.remove(other)
+        entry = {
+            "file": name,
+            "week": writer.week,
+            "days": writer.days,
+            "messages": writer.messages,
+            "config_hash": writer.config_hash,
+            "format": self.format,
+            "compression": self.compression,
+            "bytes": os.path.getsize(writer.path),
+            "written_at": round(time.time(), 3),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(os.path.join(self.out_dir, MANIFEST_NAME), "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class JsonlSink(JsonSink):
+    format = "jsonl"
+    _writer = _JsonlWriter
+
+    def __init__(self, out_dir=".", compression=None, level=None):
+        super().__init__(out_dir)
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}'; choose gzip or zstd")
+        if compression == "zstd":
+            # Fail now, not after the first week has been generated
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                raise ValueError("zstd compression needs the zstandard package "
+                                 "(pip install zstandard); gzip needs nothing extra")
+        self.compression = compression
+        self.level = level
+        self.suffix = ".jsonl" + COMPRESSIONS[compression]
+
+
+def make_sink(fmt="json", out_dir=".", compression=None, level=None):
+    if fmt == "json":
+        if compression:
+            raise ValueError("Compression needs --format jsonl")
+        return JsonSink(out_dir)
+    if fmt == "jsonl":
+        return JsonlSink(out_dir, compression, level)
+    raise ValueError(f"Unknown output format '{fmt}'; choose json or jsonl")
+
+
+def read_shard(path: str):
+    """Read any shard format back into a list of message dicts."""
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    if path.endswith(".gz"):
+        f = gzip.open(path, "rt", encoding="utf-8")
+    elif path.endswith(".zst"):
+        import zstandard
+        f = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")),
+                             encoding="utf-8")
+    else:
+        f = open(path, encoding="utf-8")
+    with f:
+        return [json.loads(line) for line in f if line.strip()]
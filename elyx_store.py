@@ -0,0 +1,440 @@
+# Embedded SQL store for the dashboard (SQLite, or DuckDB if installed)
+# - sync() writes chats, decisions and hours into an indexed local database.
+#   Shards are tracked like CorpusLoader tracks them (size, mtime_ns, sha256),
+#   so a sync after one new week parses and inserts that week only; rows of
+#   changed or deleted shards are replaced by source_file
+# - The dashboard then asks for what it shows: date/speaker/keyword filters,
+#   daily message counts and per-role hour sums run as queries, and chat rows
+#   come back one page at a time. Nothing holds the whole corpus in memory
+# - A path ending in .duckdb uses DuckDB when it is installed; anything else
+#   (or no duckdb) uses the stdlib sqlite3. The SQL is the same for both
+#
+# Usage:
+#   python elyx_store.py sync . --db .elyx_store.sqlite
+#   python elyx_store.py query --db .elyx_store.sqlite --speaker Ruby --keyword whoop --limit 20
+#   ELYX_STORE=.elyx_store.sqlite streamlit run elyx_1.py
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import threading
+from datetime import date
+
+import pandas as pd
+
+from elyx_corpus import CorpusLoader
+
+try:
+    import duckdb
+except ImportError:  # optional; SQLite serves the same queries
+    duckdb = None
+
+DEFAULT_DB = ".elyx_store.sqlite"
+PAGE_SIZE = 500
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS shards (
+        kind TEXT, name TEXT, size BIGINT, mtime_ns BIGINT, sha256 TEXT,
+        PRIMARY KEY (kind, name))""",
+    # seq keeps file/row order for ties on ts; message_lc backs the keyword
+    # filter (the dashboard's search is case-insensitive)
+    """CREATE TABLE IF NOT EXISTS chats (
+        seq BIGINT, ts TEXT, day TEXT, speaker TEXT, message TEXT, message_lc TEXT,
+        ref_id BIGINT, episode_id TEXT, event TEXT, source_file TEXT)""",
+    """CREATE TABLE IF NOT EXISTS decisions (
+        seq BIGINT, date TEXT, decision TEXT, category TEXT, owner TEXT, episode_id TEXT,
+        reason_refs TEXT, notes TEXT, status TEXT, source_file TEXT)""",
+    """CREATE TABLE IF NOT EXISTS hours (
+        seq BIGINT, date TEXT, role TEXT, hours DOUBLE, type TEXT, source_file TEXT)""",
+    "CREATE INDEX IF NOT EXISTS chats_day ON chats (day)",
+    "CREATE INDEX IF NOT EXISTS chats_speaker_day ON chats (speaker, day)",
+    "CREATE INDEX IF NOT EXISTS chats_ref ON chats (ref_id)",
+    "CREATE INDEX IF NOT EXISTS chats_source ON chats (source_file)",
+    "CREATE INDEX IF NOT EXISTS decisions_date ON decisions (date)",
+    "CREATE INDEX IF NOT EXISTS decisions_source ON decisions (source_file)",
+    "CREATE INDEX IF NOT EXISTS hours_date ON hours (date)",
+    "CREATE INDEX IF NOT EXISTS hours_source ON hours (source_file)",
+]
+
+CHAT_FIELDS = ["ts", "day", "speaker", "message", "message_lc", "ref_id", "episode_id", "event", "source_file"]
+DECISION_FIELDS = ["date", "decision", "category", "owner", "episode_id", "reason_refs", "notes", "status", "source_file"]
+HOUR_FIELDS = ["date", "role", "hours", "type", "source_file"]
+# Stored column -> dashboard column
+CHAT_VIEW = {"ts": "timestamp", "speaker": "speaker", "message": "message", "ref_id": "ref_id",
+             "episode_id": "episode_id", "event": "event", "source_file": "source_file"}
+
+
+def _text(value):
+    return None if value is None or pd.isna(value) else str(value)
+
+
+def _iso(value):
+    return None if value is None or pd.isna(value) else pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def _int(value):
+    try:
+        return None if value is None or pd.isna(value) else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _column(df, name):
+    return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+
+def chat_rows(df):
+    ts = df["timestamp"].dt.strftime(TS_FORMAT)
+    message = df["message"].map(_text)
+    return list(zip(ts, ts.str[:10], df["speaker"].map(_text), message,
+                    message.map(lambda m: m.lower() if m is not None else None),
+                    df["ref_id"].map(_int), _column(df, "episode_id").map(_text),
+                    _column(df, "event").map(_text), df["source_file"]))
+
+
+def decision_rows(df):
+    cols = [df["date"].map(_iso)] + [df[c].map(_text) for c in DECISION_FIELDS[1:]]
+    return list(zip(*cols))
+
+
+def hour_rows(df):
+    hours = pd.to_numeric(df["hours"], errors="coerce")
+    hours = hours.astype(object).where(hours.notna(), None)
+    return list(zip(df["date"].map(_iso), df["role"].map(_text), hours,
+                    df["type"].map(_text), df["source_file"]))
+
+
+KINDS = {
+    "chats": ("chats", CHAT_FIELDS, chat_rows),
+    "decisions": ("decisions", DECISION_FIELDS, decision_rows),
+    "hours": ("hours", HOUR_FIELDS, hour_rows),
+}
+
+
+def connect(path):
+    """(connection, engine) for a database file."""
+    if path.endswith(".duckdb"):
+        if duckdb is not None:
+            return duckdb.connect(path), "duckdb"
+        path = path[:-len(".duckdb")] + ".sqlite"
+        print(f"[WARN] duckdb is not installed; using SQLite at {path}")
+    # Autocommit: transactions are explicit, the same way for both engines
+    return sqlite3.connect(path, check_same_thread=False, isolation_level=None), "sqlite"
+
+
+class AnalyticsStore:
+    """One database file, shared by every dashboard session (queries are
+    serialized on one connection)."""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.conn, self.engine = connect(path)
+        self.path = path
+        self._lock = threading.Lock()
+        for stmt in SCHEMA:
+            self.conn.execute(stmt)
+
+    def close(self):
+        self.conn.close()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            cur = self.conn.execute(sql, list(params))
+            rows = cur.fetchall()
+            return rows, [d[0] for d in cur.description]
+
+    def _frame(self, sql, params=()):
+        rows, cols = self._query(sql, params)
+        return pd.DataFrame(rows, columns=cols)
+
+    def _scalar(self, sql, params=()):
+        return self._query(sql, params)[0][0][0]
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+    def shards(self):
+        """{kind: {name: [size, mtime_ns, sha256]}} as of the last sync."""
+        with self._lock:
+            return self._shards()
+
+    def _shards(self):
+        rows = self.conn.execute("SELECT kind, name, size, mtime_ns, sha256 FROM shards").fetchall()
+        known = {}
+        for kind, name, size, mtime_ns, sha in rows:
+            known.setdefault(kind, {})[name] = [size, mtime_ns, sha]
+        return known
+
+    def sync(self, folder, workers=None, processes=True, validator=None):
+        """Bring the tables up to date with the folder's shards; returns
+        {kind: shards re-ingested}. Only new or changed shards are parsed.
+        validator: chat record checks, as for CorpusLoader.
+
+        Parsing runs outside the lock; the diff against the shards table and
+        every write run in one transaction that re-reads the table first, so
+        concurrent syncs (threads or processes) never ingest a shard twice."""
+        loader = CorpusLoader(folder, workers, processes, snapshot=False, validator=validator)
+        seen = self.shards()
+        for kind, s in loader.sets.items():
+            # The shards table stands in for the parsed frames: unchanged
+            # shards are recognized by stat or checksum and never read
+            s.restore(None, [[name, *sig, None] for name, sig in seen.get(kind, {}).items()])
+        loader.refresh()
+
+        ingested = {}
+        with self._lock:
+            # IMMEDIATE takes SQLite's write lock now, before the re-read
+            self.conn.execute("BEGIN IMMEDIATE" if self.engine == "sqlite" else "BEGIN")
+            try:
+                latest = self._shards()
+                for kind, s in loader.sets.items():
+                    ingested[kind] = self._sync_kind(kind, s, seen.get(kind, {}), latest.get(kind, {}))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return ingested
+
+    def _sync_kind(self, kind, shard_set, seen, latest):
+        """seen: the shards table this sync's loader started from (shards
+        matching it were not parsed); latest: the table as of now."""
+        table, fields, to_rows = KINDS[kind]
+        current = {os.path.basename(p): e for p, e in shard_set.files.items()}
+        gone = [n for n in latest if n not in current]
+        fresh, touched = [], []
+        for path in shard_set.paths():
+            name = os.path.basename(path)
+            e = current[name]
+            if e["sha256"] == latest.get(name, [None] * 3)[2]:
+                if [e["size"], e["mtime_ns"]] != latest[name][:2]:
+                    touched.append(name)
+            elif e["sha256"] != seen.get(name, [None] * 3)[2]:
+                fresh.append(path)
+            # else: another sync rewrote the table after this one hashed the
+            # shard unchanged; its rows stand
+        fresh_names = [os.path.basename(p) for p in fresh]
+        # Delete before insert, so re-ingesting a shard replaces its rows
+        for name in gone + fresh_names:
+            self.conn.execute(f"DELETE FROM {table} WHERE source_file = ?", [name])
+            self.conn.execute("DELETE FROM shards WHERE kind = ? AND name = ?", [kind, name])
+        seq = self.conn.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {table}").fetchone()[0]
+        marks = ", ".join("?" * (len(fields) + 1))
+        for path in fresh:
+            frame = shard_set.files[path]["frame"]
+            if frame is None or frame.empty:
+                continue
+            rows = [(seq + i, *r) for i, r in enumerate(to_rows(frame), 1)]
+            seq += len(rows)
+            self.conn.executemany(f"INSERT INTO {table} (seq, {', '.join(fields)}) VALUES ({marks})", rows)
+        self.conn.executemany(
+            "INSERT INTO shards (kind, name, size, mtime_ns, sha256) VALUES (?, ?, ?, ?, ?)",
+            [(kind, n, current[n]["size"], current[n]["mtime_ns"], current[n]["sha256"])
+             for n in fresh_names])
+        self.conn.executemany(
+            "UPDATE shards SET size = ?, mtime_ns = ? WHERE kind = ? AND name = ?",
+            [(current[n]["size"], current[n]["mtime_ns"], kind, n) for n in touched])
+        return len(fresh)
+
+    # ------------------------------------------------------------------
+    # Chats
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _where(start=None, end=None, speakers=None, keyword=""):
+        """WHERE clause for the dashboard's sidebar filters. An empty speaker
+        list means no speaker filter, as in the pandas path."""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("day >= ?")
+            params.append(_iso(start))
+        if end is not None:
+            clauses.append("day <= ?")
+            params.append(_iso(end))
+        if speakers:
+            clauses.append(f"speaker IN ({', '.join('?' * len(speakers))})")
+            params.extend(speakers)
+        if keyword and keyword.strip():
+            clauses.append("instr(message_lc, ?) > 0")
+            params.append(keyword.strip().lower())
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def date_bounds(self):
+        """(first day, last day) with chats, or (None, None)."""
+        rows, _ = self._query("SELECT MIN(day), MAX(day) FROM chats")
+        first, last = rows[0]
+        return (date.fromisoformat(first), date.fromisoformat(last)) if first else (None, None)
+
+    def speakers(self):
+        rows, _ = self._query("SELECT DISTINCT speaker FROM chats WHERE speaker IS NOT NULL ORDER BY speaker")
+        return [r[0] for r in rows]
+
+    def count_chats(self, **filters):
+        where, params = self._where(**filters)
+        return self._scalar(f"SELECT COUNT(*) FROM chats{where}", params)
+
+    def count_speakers(self, **filters):
+        where, params = self._where(**filters)
+        return self._scalar(f"SELECT COUNT(DISTINCT speaker) FROM chats{where}", params)
+
+    def daily_counts(self, **filters):
+        """Messages per day, columns (timestamp, messages) like the pandas
+        groupby it replaces."""
+        where, params = self._where(**filters)
+        df = self._frame(f"SELECT day AS timestamp, COUNT(*) AS messages FROM chats{where} "
+                         "GROUP BY day ORDER BY day", params)
+        df["timestamp"] = df["timestamp"].map(date.fromisoformat)
+        return df
+
+    def speaker_counts(self, **filters):
+        where, params = self._where(**filters)
+        where += (" AND" if where else " WHERE") + " speaker IS NOT NULL"
+        return self._frame(f"SELECT speaker, COUNT(*) AS messages FROM chats{where} "
+                           "GROUP BY speaker ORDER BY messages DESC, speaker", params)
+
+    def response_times(self, **filters):
+        """The dashboard's reply-time KPI (elyx_1.kpi_response_times) as one
+        window query: for each member message, the first later message from
+        anyone else. Only one row per distinct member timestamp leaves the
+        database."""
+        where, params = self._where(**filters)
+        member = ("CASE WHEN lower(speaker) LIKE '%member%' OR lower(speaker) LIKE '%client%' "
+                  "OR lower(speaker) LIKE '%patient%' THEN 1 ELSE 0 END")
+        df = self._frame(f"""
+            WITH per_ts AS (
+                SELECT ts, SUM({member}) AS members,
+                       SUM(1 - {member}) AS others
+                FROM chats{where} GROUP BY ts),
+            replies AS (
+                SELECT ts, members,
+                       MIN(CASE WHEN others > 0 THEN ts END) OVER (
+                           ORDER BY ts ROWS BETWEEN 1 FOLLOWING AND UNBOUNDED FOLLOWING) AS reply
+                FROM per_ts)
+            SELECT ts, members, reply FROM replies
+            WHERE members > 0 AND reply IS NOT NULL""", params)
+        if df.empty:
+            return {"median_minutes": float("nan"), "avg_minutes": float("nan"), "count": 0}
+        minutes = ((pd.to_datetime(df["reply"], format=TS_FORMAT)
+                    - pd.to_datetime(df["ts"], format=TS_FORMAT)).dt.total_seconds() / 60.0)
+        minutes = minutes.repeat(df["members"].astype(int))
+        return {"median_minutes": float(minutes.median()),
+                "avg_minutes": float(minutes.mean()),
+                "count": len(minutes)}
+
+    def _chats(self, where, params, columns=None, limit=None, offset=0):
+        cols = columns or list(CHAT_VIEW.values())
+        select = ", ".join(f"{src} AS {dst}" for src, dst in CHAT_VIEW.items() if dst in cols)
+        sql = f"SELECT {select} FROM chats{where} ORDER BY ts, seq"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = [*params, int(limit), int(offset)]
+        df = self._frame(sql, params)
+        if "timestamp" in df.columns:
+            df["timestamp"] = pd.to_datetime(df["timestamp"], format=TS_FORMAT)
+        return df
+
+    def chats(self, columns=None, limit=None, offset=0, **filters):
+        """Filtered chat rows in time order; pass limit/offset for one page."""
+        where, params = self._where(**filters)
+        return self._chats(where, params, columns, limit, offset)
+
+    def chats_by_refs(self, refs):
+        refs = sorted({int(r) for r in refs})
+        if not refs:
+            return self._chats(" WHERE 1 = 0", [])
+        return self._chats(f" WHERE ref_id IN ({', '.join('?' * len(refs))})", refs)
+
+    def chats_csv(self, chunk=10_000, **filters) -> bytes:
+        """Filtered chats as CSV, fetched in chunks rather than as one frame."""
+        where, params = self._where(**filters)
+        parts, offset = [], 0
+        while True:
+            df = self._chats(where, params, limit=chunk, offset=offset)
+            parts.append(df.to_csv(index=False, header=not offset))
+            offset += chunk
+            if len(df) < chunk:
+                return "".join(parts).encode("utf-8")
+
+    # ------------------------------------------------------------------
+    # Decisions and hours
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _date_range(start=None, end=None):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(_iso(start))
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(_iso(end))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _dated(self, sql, params):
+        df = self._frame(sql, params)
+        df["date"] = df["date"].map(lambda d: date.fromisoformat(d) if d else None)
+        return df
+
+    def decisions(self, start=None, end=None):
+        where, params = self._date_range(start, end)
+        return self._dated(f"SELECT {', '.join(DECISION_FIELDS)} FROM decisions{where} "
+                           "ORDER BY date NULLS LAST, owner NULLS LAST, decision NULLS LAST, seq", params)
+
+    def count_decisions(self, start=None, end=None):
+        where, params = self._date_range(start, end)
+        return self._scalar(f"SELECT COUNT(*) FROM decisions{where}", params)
+
+    def hours(self, start=None, end=None):
+        where, params = self._date_range(start, end)
+        return self._dated(f"SELECT {', '.join(HOUR_FIELDS)} FROM hours{where} ORDER BY seq", params)
+
+    def count_hours(self):
+        return self._scalar("SELECT COUNT(*) FROM hours")
+
+    def hours_daily(self, start=None, end=None):
+        """Hours summed per (date, role)."""
+        where, params = self._date_range(start, end)
+        return self._dated(f"SELECT date, role, SUM(hours) AS hours FROM hours{where} "
+                           "GROUP BY date, role ORDER BY date, role", params)
+
+    def hours_by_role(self, start=None, end=None):
+        where, params = self._date_range(start, end)
+        return self._frame(f"SELECT role, SUM(hours) AS hours FROM hours{where} "
+                           "GROUP BY role ORDER BY hours DESC", params)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load dashboard shards into a SQL store and query it.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sync = sub.add_parser("sync", help="Ingest new/changed shards of a folder")
+    sync.add_argument("folder", nargs="?", default=".")
+    sync.add_argument("--db", default=DEFAULT_DB)
+    sync.add_argument("--workers", type=int, default=None, help="Parse pool size (1 = serial)")
+    query = sub.add_parser("query", help="Print filtered chats")
+    query.add_argument("--db", default=DEFAULT_DB)
+    query.add_argument("--start", default=None, help="YYYY-MM-DD")
+    query.add_argument("--end", default=None, help="YYYY-MM-DD")
+    query.add_argument("--speaker", action="append", default=[])
+    query.add_argument("--keyword", default="")
+    query.add_argument("--limit", type=int, default=PAGE_SIZE)
+    query.add_argument("--offset", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    store = AnalyticsStore(args.db)
+    if args.cmd == "sync":
+        t0 = time.perf_counter()
+        ingested = store.sync(args.folder, args.workers)
+        print(f"✅ Synced {args.folder} into {store.path} ({store.engine}) in {time.perf_counter() - t0:.2f}s: "
+              + ", ".join(f"{kind} {n} shards" for kind, n in ingested.items()))
+        print(f"{store.count_chats()} chats, {store.count_decisions()} decisions, {store.count_hours()} hours rows")
+        return 0
+    filters = {"start": args.start, "end": args.end, "speakers": args.speaker, "keyword": args.keyword}
+    total = store.count_chats(**filters)
+    page = store.chats(limit=args.limit, offset=args.offset, **filters)
+    with pd.option_context("display.max_colwidth", 80, "display.width", 200):
+        print(page[["timestamp", "speaker", "message"]].to_string(index=False))
+    print(f"rows {args.offset + 1}-{args.offset + len(page)} of {total}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
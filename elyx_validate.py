@@ -0,0 +1,270 @@
+# Schema validation for conversation shards
+# - Records must be {timestamp, sender, message, event}: timestamp
+#   "YYYY-MM-DD HH:MM[:SS]", sender in the allowed senders, event in
+#   ALLOWED_EVENTS, non-empty message
+# - Checks are plain Python, one pass per field over the shard (a set lookup
+#   or one compiled regex per value), so the generator side needs no pandas.
+#   frame_reasons() runs the same checks as column masks on a normalized
+#   DataFrame, for the dashboard's ingest (elyx_corpus)
+# - Bad records go to <dir>/.quarantine/<shard>.rejects.jsonl with their
+#   reasons. Shard status: ok, partial (some records rejected), invalid (none
+#   valid, e.g. another schema) or bad (empty or unparseable file)
+# - Results are kept in <dir>/.elyx_validated.json keyed by file; an unchanged
+#   (size, mtime) or, failing that, unchanged sha256 skips re-validation
+#
+# Usage:
+#   python elyx_validate.py week*_conversation.json
+#   python elyx_validate.py members_out/aarav_shah_0000/ --member data/members_synth/aarav_shah_0000.json
+#   python elyx_validate.py out/ --json --no-quarantine
+
+import os
+import re
+import sys
+import glob
+import json
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from elyx_normalize import ALLOWED_SENDERS
+from elyx_engine import ALLOWED_EVENTS
+from elyx_sink import read_shard
+
+STATE_NAME = ".elyx_validated.json"
+QUARANTINE_DIR = ".quarantine"
+FIELDS = ["timestamp", "sender", "message", "event"]
+TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}(?::\d{2})?")
+SHARD_PATTERNS = ["*conversation*.json", "elyx_week*_communications.json*"]
+
+
+class RecordValidator:
+    def __init__(self, senders=ALLOWED_SENDERS, events=ALLOWED_EVENTS):
+        self.senders = frozenset(senders)
+        self.events = frozenset(events)
+        self._ts = TIMESTAMP_RE.fullmatch
+
+    def reasons(self, records):
+        """Return {index: [reason, ...]} for every bad record."""
+        bad = {}
+
+        def flag(index, reason):
+            bad.setdefault(index, []).append(reason)
+
+        for i, r in enumerate(records):
+            if not isinstance(r, dict):
+                flag(i, "not an object")
+        # Non-objects are already flagged; check only the objects' columns
+        rows = [i for i, r in enumerate(records) if isinstance(r, dict)]
+        dicts = [records[i] for i in rows]
+        col = {f: [r.get(f) for r in dicts] for f in FIELDS}
+
+        ts = [v if isinstance(v, str) else "" for v in col["timestamp"]]
+        for i, ok in zip(rows, map(self._ts, ts)):
+            if not ok:
+                flag(i, "timestamp")
+        for i, v in zip(rows, col["sender"]):
+            if v not in self.senders:
+                flag(i, "sender")
+        for i, v in zip(rows, col["event"]):
+            if v not in self.events:
+                flag(i, "event")
+        for i, v in zip(rows, col["message"]):
+            if not isinstance(v, str) or not v.strip():
+                flag(i, "message")
+        return bad
+
+    def frame_reasons(self, df, sender="sender"):
+        """{reason: boolean mask of failing rows} for a DataFrame that
+        elyx_corpus has normalized: timestamps already parsed (NaT fails),
+        senders canonical, missing events classified. sender: its column."""
+        message = df["message"].astype(object)
+        return {
+            "timestamp": df["timestamp"].isna(),
+            "sender": ~df[sender].isin(list(self.senders)),
+            "event": ~df["event"].isin(list(self.events)),
+            "message": ~message.str.match(r"\s*\S", na=False),
+        }
+
+    def split(self, records):
+        """(valid records, [(index, reasons, record), ...])."""
+        bad = self.reasons(records)
+        valid = [r for i, r in enumerate(records) if i not in bad]
+        return valid, [(i, bad[i], records[i]) for i in sorted(bad)]
+
+
+def write_rejects(directory, name, rejects):
+    """Write <directory>/.quarantine/<name>.rejects.jsonl; a clean shard
+    clears its stale rejects file."""
+    path = os.path.join(directory, QUARANTINE_DIR, name + ".rejects.jsonl")
+    if not rejects:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for index, reasons, record in rejects:
+            f.write(json.dumps({"index": index, "reasons": reasons, "record": record},
+                               ensure_ascii=False) + "\n")
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _signature(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+class ShardValidator:
+    """Validates the shards of one directory and remembers the results.
+
+    Entries: {"status": "ok" | "partial" | "invalid" | "bad", "records", "valid",
+    "rejected", "reasons": {reason: count}, "error", "sig", "sha256"}.
+    """
+
+    def __init__(self, directory, validator=None, quarantine=True):
+        self.directory = directory
+        self.validator = validator or RecordValidator()
+        self.quarantine = quarantine
+        self.state_path = os.path.join(directory, STATE_NAME)
+        self._lock = threading.Lock()
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.state = {}
+
+    def known(self, path, sig=None, sha256=None):
+        """The stored entry if the file is unchanged since it was validated.
+        sig/sha256: the file's [size, mtime_ns] and checksum, if the caller
+        already has them; the file is then never touched."""
+        entry = self.state.get(os.path.basename(path))
+        if not entry:
+            return None
+        sig = sig or _signature(path)
+        if entry["sig"] == sig:
+            return entry
+        # Touched but maybe not changed (copied, re-published): hashing is
+        # still far cheaper than parsing and checking every record
+        if entry["sha256"] == (sha256 or file_sha256(path)):
+            entry["sig"] = sig
+            return entry
+        return None
+
+    def _entry(self, sig, sha256):
+        return {"status": "ok", "records": 0, "valid": 0, "rejected": 0,
+                "reasons": {}, "error": None, "sig": sig, "sha256": sha256}
+
+    def mark_bad(self, path, error, sig, sha256):
+        """Record a shard the caller could not read, so it is skipped until it
+        changes."""
+        entry = self._entry(sig, sha256)
+        entry.update(status="bad", error=str(error))
+        with self._lock:
+            self.state[os.path.basename(path)] = entry
+        return entry
+
+    def validate(self, path, records=None):
+        """Validate one shard (read from disk unless records are given)."""
+        entry = self.known(path)
+        if entry is not None:
+            return entry
+        name = os.path.basename(path)
+        entry = self._entry(_signature(path), file_sha256(path))
+        if records is None:
+            try:
+                if entry["sig"][0] == 0:
+                    raise ValueError("empty file")
+                records = read_shard(path)
+                if not isinstance(records, list):
+                    raise ValueError(f"expected a list of records, got {type(records).__name__}")
+            except Exception as e:
+                return self.mark_bad(path, e, entry["sig"], entry["sha256"])
+        valid, rejects = self.validator.split(records)
+        entry.update(records=len(records), valid=len(valid), rejected=len(rejects),
+                     reasons=dict(Counter(r for _, reasons, _ in rejects for r in reasons)))
+        if rejects:
+            entry["status"] = "partial" if valid else "invalid"
+        if self.quarantine:
+            write_rejects(self.directory, name, rejects)
+        with self._lock:
+            self.state[name] = entry
+        return entry
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self.state, indent=2, sort_keys=True)
+        tmp = self.state_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            # Read-only data dir: validation still worked, it just isn't remembered
+            print(f"[WARN] Could not save {self.state_path}: {e}")
+
+
+def shard_files(spec):
+    """Shard files in a directory, or the given file/glob."""
+    if os.path.isdir(spec):
+        return sorted({p for pat in SHARD_PATTERNS for p in glob.glob(os.path.join(spec, pat))})
+    return sorted(glob.glob(spec)) or ([spec] if os.path.isfile(spec) else [])
+
+
+def summarize(entries):
+    total = Counter()
+    for e in entries.values():
+        total["files"] += 1
+        total[e["status"]] += 1
+        for k in ("records", "valid", "rejected"):
+            total[k] += e[k]
+    return dict(total)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate conversation shards.")
+    parser.add_argument("paths", nargs="*", default=["."], help="Shard files, globs or directories")
+    parser.add_argument("--member", default=None,
+                        help="Member profile whose senders are allowed (default: Rohan's team)")
+    parser.add_argument("--no-quarantine", action="store_true",
+                        help="Report only; do not write .quarantine/ reject files")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    validator = RecordValidator()
+    if args.member:
+        from elyx_members import load_member
+        validator = RecordValidator(load_member(args.member).senders)
+    shard_validators, results = {}, {}
+    for spec in args.paths:
+        for path in shard_files(spec):
+            directory = os.path.dirname(os.path.abspath(path))
+            if directory not in shard_validators:
+                shard_validators[directory] = ShardValidator(directory, validator, not args.no_quarantine)
+            results[path] = shard_validators[directory].validate(path)
+    for sv in shard_validators.values():
+        sv.save()
+
+    totals = summarize(results)
+    if args.json:
+        print(json.dumps({"files": results, "totals": totals}, indent=2))
+    else:
+        for path, e in results.items():
+            if e["status"] == "bad":
+                print(f"[WARN] {path}: {e['error']}")
+            elif e["status"] in ("partial", "invalid"):
+                print(f"[WARN] {path}: {e['rejected']}/{e['records']} records rejected {e['reasons']}")
+        print(f"Validated {totals.get('files', 0)} files: {totals.get('ok', 0)} ok, "
+              f"{totals.get('partial', 0)} partial, {totals.get('invalid', 0)} invalid, "
+              f"{totals.get('bad', 0)} bad; "
+              f"{totals.get('valid', 0)}/{totals.get('records', 0)} records valid")
+    return 1 if totals.get("bad") or totals.get("invalid") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
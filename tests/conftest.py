@@ -0,0 +1,29 @@
+import glob
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+DECISIONS = [
+    {"date": "2025-01-10", "decision": "Start statin trial", "category": "medical", "owner": "Dr. Warren"},
+    {"date": "2025-02-02", "decision": "Swap evening run for mobility", "category": "exercise", "owner": "Rachel"},
+]
+HOURS = "date,role,hours,type\n2025-01-08,Ruby,1.5,ops\n2025-01-09,Dr. Warren,0.75,medical\n2025-01-09,Ruby,0.5,ops\n"
+
+
+@pytest.fixture
+def folder(tmp_path):
+    """The first 12 week shards of the repo plus small decisions/hours files."""
+    data = tmp_path / "data"
+    data.mkdir()
+    for path in sorted(glob.glob(os.path.join(ROOT, "week*_conversation.json")))[:12]:
+        shutil.copy(path, data)
+    (data / "journey_decisions.json").write_text(json.dumps(DECISIONS), encoding="utf-8")
+    (data / "team_hours.csv").write_text(HOURS, encoding="utf-8")
+    return data
@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import pytest
+
+from elyx_backends import FakeBackend, PooledBackend
+
+MESSAGES = [{"role": "user", "content": "Day 1: exactly 3 lines"}]
+
+
+class CountingBackend(FakeBackend):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self.pings = 0
+
+    def ping(self):
+        self.pings += 1
+        super().ping()
+
+    def chat(self, model, messages, **kwargs):
+        self.calls += 1
+        return super().chat(model, messages, **kwargs)
+
+    async def achat(self, model, messages, **kwargs):
+        self.calls += 1
+        return await super().achat(model, messages, **kwargs)
+
+
+def _pool():
+    down, up = CountingBackend(fail_rate=1.0), CountingBackend()
+    return PooledBackend([down, up], retry_after=0.2), down, up
+
+
+def test_pool_fails_over_and_recovers():
+    pool, down, up = _pool()
+    expected = FakeBackend().chat("m", MESSAGES)
+    # The first call tries the dead endpoint, then fails over
+    assert pool.chat("m", MESSAGES) == expected
+    assert (down.calls, up.calls) == (1, 1)
+    for _ in range(5):
+        pool.chat("m", MESSAGES)
+    assert down.calls == 1
+
+    # Window over but still down: a ping finds out, not a request
+    time.sleep(0.25)
+    pool.chat("m", MESSAGES)
+    assert (down.calls, down.pings) == (1, 1)
+    assert not pool.stats()[pool.endpoints[0].label]["healthy"]
+
+    # Back up: the next probe returns it to rotation
+    down.fail_rate = 0.0
+    time.sleep(0.25)
+    for _ in range(4):
+        assert pool.chat("m", MESSAGES) == expected
+    assert down.pings == 2
+    # Fewest requests so far, so it takes all four
+    assert down.calls == 1 + 4
+    assert pool.stats()[pool.endpoints[0].label]["errors"] == 1
+
+
+def test_async_pool_fails_over_and_recovers():
+    pool, down, up = _pool()
+
+    async def run(n):
+        return await asyncio.gather(*(pool.achat("m", MESSAGES) for _ in range(n)))
+
+    asyncio.run(run(4))
+    assert down.calls == 1 and up.calls == 4
+    down.fail_rate = 0.0
+    time.sleep(0.25)
+    asyncio.run(run(4))
+    assert down.pings == 1
+    assert down.calls > 1
+
+
+def test_every_endpoint_down_raises():
+    pool = PooledBackend([FakeBackend(fail_rate=1.0), FakeBackend(fail_rate=1.0)])
+    with pytest.raises(ConnectionError):
+        pool.chat("m", MESSAGES)
+    assert all(s["errors"] == 1 for s in pool.stats().values())
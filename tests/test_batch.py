@@ -0,0 +1,35 @@
+import json
+import os
+
+import elyx_batch
+from conftest import ROOT
+from elyx_cache import ResponseCache
+from elyx_metrics import read_metrics
+
+
+def test_caches_on_one_file_share_the_byte_budget(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    # Two handles stand in for two worker processes
+    a, b = ResponseCache(path, max_bytes=1000), ResponseCache(path, max_bytes=1000)
+    for i in range(10):
+        a.put(f"a{i}", "x" * 100)
+        b.put(f"b{i}", "y" * 100)
+    assert a.size() == b.size() <= 1000
+    assert a.evictions + b.evictions > 0
+    # Re-putting a key replaces its size instead of adding to it
+    a.put("b9", "z" * 10)
+    assert a.size() == sum(len(a.get(k) or "") for k in
+                           [f"{p}{i}" for p in "ab" for i in range(10)])
+
+
+def test_workers_send_metrics_to_the_parent(tmp_path):
+    metrics = tmp_path / "metrics.jsonl"
+    elyx_batch.main([
+        "--members", os.path.join(ROOT, "data", "members"), "--weeks", "1-4",
+        "--processes", "2", "--backend", "fake", "--no-cache",
+        "--out-dir", str(tmp_path / "out"), "--metrics", str(metrics)])
+    records = list(read_metrics(str(metrics)))
+    # One record per day call, every line whole
+    assert len(records) == 4 * 7
+    assert sorted({r["week"] for r in records}) == [1, 2, 3, 4]
+    assert all(json.loads(line) for line in metrics.read_text(encoding="utf-8").splitlines())
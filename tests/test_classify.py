@@ -0,0 +1,68 @@
+import ast
+import glob
+import json
+import os
+import re
+
+import pytest
+
+from conftest import ROOT
+from elyx_classify import CLASSIFIERS, EventClassifier, retag_file
+from elyx_engine import WEEK_CONFIGS
+
+
+def script_classifier(path):
+    """The week script's own classify_event, without running the script:
+    only its imports, constants and that function are executed."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    ns = {}
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.Assign)) or (
+                isinstance(node, ast.FunctionDef) and node.name == "classify_event"):
+            try:
+                exec(compile(ast.Module([node], []), path, "exec"), ns)
+            except Exception:  # e.g. a client constructed at import time
+                pass
+    return ns.get("classify_event")
+
+
+def corpus_messages():
+    messages = set()
+    for path in glob.glob(os.path.join(ROOT, "week*_conversation.json")):
+        if os.path.getsize(path):
+            with open(path, encoding="utf-8") as f:
+                messages.update(r["message"] for r in json.load(f) if isinstance(r.get("message"), str))
+    return sorted(messages)
+
+
+WEEK_SCRIPTS = sorted(glob.glob(os.path.join(ROOT, "[0-9]*_week*.py")))
+
+
+@pytest.mark.parametrize("path", WEEK_SCRIPTS, ids=os.path.basename)
+def test_week_table_matches_script(path):
+    script = script_classifier(path)
+    if script is None:
+        pytest.skip("script has no classify_event")
+    week = int(re.search(r"week(\d+)", os.path.basename(path)).group(1))
+    classifier = CLASSIFIERS[WEEK_CONFIGS[week]["event_rules"]]
+    messages = corpus_messages() + ["Please see the attached PDF report", "Can you confirm?", "random chatter"]
+    mismatches = [m for m in messages if script(m) != classifier.classify(m)]
+    assert not mismatches, f"{len(mismatches)} messages differ, e.g. {mismatches[:3]}"
+
+
+def test_automaton_and_scan_agree(monkeypatch):
+    import elyx_classify
+    messages = corpus_messages()
+    for name, classifier in CLASSIFIERS.items():
+        monkeypatch.setattr(elyx_classify, "ahocorasick", None)
+        scan = EventClassifier(classifier.rules)
+        assert scan.classify_many(messages) == classifier.classify_many(messages), name
+
+
+def test_retag_writes_atomically(tmp_path):
+    path = tmp_path / "week05_conversation.json"
+    path.write_text(json.dumps([{"message": "Flight booked for Monday", "event": "update"}]))
+    assert retag_file(str(path), write=True) == (1, 1)
+    assert json.loads(path.read_text())[0]["event"] == "travel"
+    assert os.listdir(tmp_path) == ["week05_conversation.json"]
@@ -0,0 +1,48 @@
+import re
+
+from elyx_continuity import ContinuityStore, extract_entries
+from elyx_prompt import estimate_tokens
+
+
+def transcript(week):
+    return [
+        {"sender": "Ruby", "message": "Noted.", "event": "plan_change"},
+        {"sender": "Dr. Warren", "message": f"Swap the week {week} evening run for mobility work.", "event": "plan_change"},
+        {"sender": "Rachel", "message": "Swap runs.", "event": "plan_change"},
+        {"sender": "Ruby", "message": f"Lipid panel booked for week {week + 1}.", "event": "test"},
+        {"sender": "Rohan", "message": f"Flying to Seoul in week {week}.", "event": "travel"},
+        {"sender": "Neel", "message": "I'll send the quarterly summary tomorrow.", "event": "update"},
+    ]
+
+
+def test_extract_entries_keeps_the_longest_line_per_kind():
+    entries = extract_entries(4, transcript(4))
+    assert [(e["kind"], e["text"]) for e in entries] == [
+        ("plan", "Dr. Warren: Swap the week 4 evening run for mobility work."),
+        ("test", "Ruby: Lipid panel booked for week 5."),
+        ("commitment", "Neel: I'll send the quarterly summary tomorrow."),
+        ("travel", "Rohan: Flying to Seoul in week 4."),
+    ]
+    assert all(e["week"] == 4 for e in entries)
+
+
+def test_render_sees_only_earlier_weeks_within_budget(tmp_path):
+    store = ContinuityStore(str(tmp_path), budget_tokens=10_000)
+    # Out of order, and week 3 regenerated: its entries are replaced
+    for week in (5, 1, 3, 2, 4, 3):
+        store.update("rohan", week, transcript(week))
+    assert store.render("rohan", 1) == ""
+    for week in (2, 4, 6):
+        shown = {int(w) for w in re.findall(r"^- Week (\d+) ", store.render("rohan", week), re.M)}
+        assert shown and max(shown) == week - 1
+    # travel keeps one week, the other kinds three
+    assert "Week 3 travel" in store.render("rohan", 4)
+    assert "Week 2 travel" not in store.render("rohan", 4)
+    assert "Week 1 plan" in store.render("rohan", 4)
+
+    full = store.render("rohan", 6)
+    tight = ContinuityStore(str(tmp_path), budget_tokens=estimate_tokens(full) // 2)
+    text = tight.render("rohan", 6)
+    assert 0 < estimate_tokens(text) <= tight.budget_tokens
+    # The oldest lines go first
+    assert full.endswith(text)
@@ -0,0 +1,147 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+import elyx_corpus
+import elyx_validate
+from elyx_corpus import CorpusLoader, _naive, parse_datetime_col, parse_dt
+
+CHATS = [
+    {"timestamp": "2025-01-08 09:00", "sender": "Rohan", "message": "Morning!", "event": "update"},
+    {"timestamp": "2025-01-08 09:05", "sender": "Ruby", "message": "Booked your panel.", "event": "logistics"},
+]
+
+
+def _no_io(*args, **kwargs):
+    raise AssertionError("the validator hook reopened a shard")
+
+
+def test_bad_shards_are_skipped_without_reopening(tmp_path, monkeypatch):
+    (tmp_path / "week01_conversation.json").write_text(json.dumps(CHATS), encoding="utf-8")
+    (tmp_path / "week02_conversation.json").write_text("", encoding="utf-8")
+    monkeypatch.setattr(elyx_validate, "read_shard", _no_io)
+    monkeypatch.setattr(elyx_validate, "file_sha256", _no_io)
+
+    first = CorpusLoader(str(tmp_path), workers=1, snapshot=False)
+    assert len(first.conversations()) == 2
+    assert first.sets["chats"].parsed == 2
+    entry = first.validator.state["week02_conversation.json"]
+    assert entry["status"] == "bad"
+
+    # A fresh loader knows the empty shard from the saved state: only the
+    # good one is parsed
+    again = CorpusLoader(str(tmp_path), workers=1, snapshot=False)
+    assert len(again.conversations()) == 2
+    assert again.sets["chats"].parsed == 1
+
+
+def test_unlabelled_chats_are_classified(tmp_path):
+    records = [{k: v for k, v in r.items() if k != "event"} for r in CHATS]
+    (tmp_path / "week01_conversation.json").write_text(json.dumps(records), encoding="utf-8")
+    df = CorpusLoader(str(tmp_path), workers=1, snapshot=False).conversations()
+    assert list(df["event"]) == ["update", "test"]
+
+
+TIMESTAMPS = [
+    "2025-01-08 09:00:00", "2025-01-08 09:05", " 08/01/2025 10:00 ", "08-01-2025 10:15",
+    "[01/08/25, 08:15 AM] Rohan: Morning!", "01/08/25 01:05 PM", "2025-01-08T09:00:00+02:00",
+    "Jan 9 2025", None, float("nan"), "", "not a date",
+]
+
+
+def test_parse_datetime_col_matches_parse_dt():
+    # Mostly one format, so the sample reorders the formats it tries
+    values = TIMESTAMPS + ["08/01/2025 11:00"] * 20
+    series = pd.Series(values, index=range(100, 100 + len(values)))
+    got = parse_datetime_col(series)
+    expected = [_naive(parse_dt(v)) for v in values]
+    assert list(got.index) == list(series.index)
+    assert [None if pd.isna(t) else t for t in got] == [None if pd.isna(t) else t for t in expected]
+    assert got.iloc[4] == pd.Timestamp("2025-01-08 08:15")
+    assert got.iloc[6] == pd.Timestamp("2025-01-08 07:00")
+
+
+def test_parse_datetime_col_drops_timezones():
+    series = pd.Series(pd.to_datetime(["2025-01-08 09:00+02:00", None], utc=True))
+    got = parse_datetime_col(series)
+    assert got.dt.tz is None
+    assert got.iloc[0] == pd.Timestamp("2025-01-08 07:00")
+
+
+def test_snapshot_restores_the_parsed_frames(tmp_path):
+    pytest.importorskip("pyarrow")
+    (tmp_path / "week01_conversation.json").write_text(json.dumps(CHATS), encoding="utf-8")
+    (tmp_path / "week02_conversation.json").write_text(json.dumps(CHATS[:1]), encoding="utf-8")
+    (tmp_path / "team_hours.csv").write_text(
+        "date,role,hours,type\n2025-01-08,Ruby,1.5,ops\n", encoding="utf-8")
+    first = CorpusLoader(str(tmp_path), workers=1)
+    parsed = {kind: first.frame(kind) for kind in first.sets}
+
+    again = CorpusLoader(str(tmp_path), workers=1)
+    for kind, frame in parsed.items():
+        pd.testing.assert_frame_equal(again.frame(kind), frame)
+    # Everything came from the snapshot, nothing from JSON/CSV
+    assert all(s.parsed == 0 for s in again.sets.values())
+
+
+def test_invalid_chat_records_are_dropped_and_quarantined(tmp_path):
+    records = CHATS + [
+        {"timestamp": "yesterday-ish", "sender": "Ruby", "message": "When?", "event": "update"},
+        {"timestamp": "2025-01-08 10:00", "sender": "Stranger", "message": "Hi", "event": "update"},
+        {"timestamp": "2025-01-08 10:05", "sender": "Ruby", "message": "  ", "event": "update"},
+        {"timestamp": "2025-01-08 10:10", "sender": "Ruby", "message": "Ok", "event": "gossip"},
+    ]
+    shard = tmp_path / "week01_conversation.json"
+    shard.write_text(json.dumps(records), encoding="utf-8")
+    df = CorpusLoader(str(tmp_path), workers=1, snapshot=False).conversations()
+    assert list(df["message"]) == ["Morning!", "Booked your panel."]
+    rejects = tmp_path / ".quarantine" / "week01_conversation.json.rejects.jsonl"
+    lines = [json.loads(line) for line in rejects.read_text(encoding="utf-8").splitlines()]
+    assert [(r["index"], r["reasons"]) for r in lines] == [
+        (2, ["timestamp"]), (3, ["sender"]), (4, ["message"]), (5, ["event"])]
+    assert lines[1]["record"] == records[3]
+
+    # Fixing the shard clears its rejects
+    shard.write_text(json.dumps(CHATS), encoding="utf-8")
+    assert len(CorpusLoader(str(tmp_path), workers=1, snapshot=False).conversations()) == 2
+    assert not rejects.exists()
+
+
+def _frames(loader):
+    return {kind: loader.frame(kind) for kind in loader.sets}
+
+
+def test_incremental_refresh_matches_a_full_load(folder):
+    loader = CorpusLoader(str(folder), workers=1, snapshot=False)
+    _frames(loader)
+    shard = sorted(folder.glob("week*_conversation.json"))[3]
+    records = json.loads(shard.read_text(encoding="utf-8"))
+    shard.write_text(json.dumps(records[::2]), encoding="utf-8")
+    (folder / "team_hours.csv").write_text(
+        "date,role,hours,type\n2025-01-08,Ruby,2.0,ops\n", encoding="utf-8")
+
+    before = {kind: s.parsed for kind, s in loader.sets.items()}
+    assert loader.refresh() == {"chats": True, "decisions": False, "hours": True}
+    assert {kind: s.parsed - before[kind] for kind, s in loader.sets.items()} == {
+        "chats": 1, "decisions": 0, "hours": 1}
+    full = _frames(CorpusLoader(str(folder), workers=1, snapshot=False))
+    for kind, frame in _frames(loader).items():
+        pd.testing.assert_frame_equal(frame, full[kind])
+
+
+def test_process_pool_parse_matches_serial(folder, monkeypatch):
+    pools = []
+
+    class Pool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(elyx_corpus, "ProcessPoolExecutor", Pool)
+    pooled = _frames(CorpusLoader(str(folder), workers=4, processes=True, snapshot=False))
+    assert len(pools) == 1  # the 12 chat shards; decisions/hours are too few
+    serial = _frames(CorpusLoader(str(folder), workers=1, snapshot=False))
+    for kind, frame in pooled.items():
+        pd.testing.assert_frame_equal(frame, serial[kind])
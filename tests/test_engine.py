@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from elyx_backends import FakeBackend
+from elyx_cache import ResponseCache
+from elyx_engine import WeekGenerator, main, split_days
+
+
+class CountingBackend(FakeBackend):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    def chat(self, model, messages, **kwargs):
+        self.calls += 1
+        return super().chat(model, messages, **kwargs)
+
+    def stream_chat(self, model, messages, **kwargs):
+        self.calls += 1
+        return super().stream_chat(model, messages, **kwargs)
+
+
+def test_streamed_week_replays_from_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    runs = []
+    for _ in range(2):
+        backend = CountingBackend(malformed_rate=0.3)
+        gen = WeekGenerator(backend, cache=cache, stream=True, topup=2)
+        runs.append((gen.generate_week(1), backend.calls))
+    (first, calls), (again, replay_calls) = runs
+    assert calls > 7
+    assert replay_calls == 0
+    assert again == first
+
+
+def _run(tmp_path, resume=False, **kwargs):
+    backend = CountingBackend()
+    gen = WeekGenerator(backend, checkpoint_dir=str(tmp_path / "ck"), resume=resume, **kwargs)
+    return gen.generate_week(1), backend.calls
+
+
+def test_resume_skips_checkpointed_days(tmp_path):
+    first, calls = _run(tmp_path)
+    path = tmp_path / "ck" / "week1.jsonl"
+    records = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    assert len(records) == 7
+    # A crash after day 3, halfway through writing day 4
+    path.write_text("".join(records[:3]) + records[3][:20], encoding="utf-8")
+
+    resumed, resumed_calls = _run(tmp_path, resume=True)
+    assert resumed == first
+    assert 0 < resumed_calls < calls
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 7
+
+
+def test_resume_ignores_checkpoints_from_another_config(tmp_path):
+    _, calls = _run(tmp_path)
+    _, resumed_calls = _run(tmp_path, resume=True, model="another-model")
+    assert resumed_calls == calls
+
+
+def _write_weeks(out_dir, *flags):
+    main(["--backend", "fake", "--no-cache", "--no-checkpoint", "--weeks", "1-3",
+          "--out-dir", str(out_dir), *flags])
+    shards = {p.name: p.read_bytes() for p in out_dir.glob("elyx_week*_communications.json")}
+    manifest = (out_dir / "elyx_manifest.jsonl").read_text(encoding="utf-8").splitlines()
+    # Everything but the write time, in week order
+    entries = sorted(({k: v for k, v in json.loads(line).items() if k != "written_at"}
+                      for line in manifest), key=lambda e: e["week"])
+    return shards, entries
+
+
+@pytest.mark.parametrize("flags", [
+    ["--workers", "8"],
+    ["--async"],
+    ["--async", "--stream"],
+    ["--stream", "--workers", "8"],
+], ids=["threads", "async", "async-stream", "stream-threads"])
+def test_modes_write_identical_bytes(tmp_path, flags):
+    shards, entries = _write_weeks(tmp_path / "serial", "--workers", "1")
+    assert sorted(shards) == [f"elyx_week{w}_communications.json" for w in (1, 2, 3)]
+    assert _write_weeks(tmp_path / "run", *flags) == (shards, entries)
+
+
+def test_split_days_at_headers():
+    raw = (
+        "Sure, here are the chats.\n"
+        "=== DAY 2 (2025-01-16) ===\nRuby: Panel booked.\n"
+        "**Day 1 (2025-01-15)**\nRohan: Morning!\nRuby: Hi Rohan.\n"
+        "=== DAY 2 ===\nRohan: Thanks.\n"
+        "day 4\nRuby: Reminder: fast tonight.")
+    blocks = split_days(raw)
+    # Preamble dropped; out-of-order and markdown headers kept; a repeated
+    # header continues its day; day 3 never appears
+    assert sorted(blocks) == [1, 2, 4]
+    lines = {day: [ln for ln in block.splitlines() if ln.strip()] for day, block in blocks.items()}
+    assert lines[1] == ["Rohan: Morning!", "Ruby: Hi Rohan."]
+    assert lines[2] == ["Ruby: Panel booked.", "Rohan: Thanks."]
+    assert lines[4] == ["Ruby: Reminder: fast tonight."]
+    assert split_days("Rohan: no headers at all") == {}
+
+
+class ScriptedBackend(CountingBackend):
+    def __init__(self, reply):
+        super().__init__()
+        self.reply = reply
+
+    def chat(self, model, messages, **kwargs):
+        self.calls += 1
+        return {"message": {"content": self.reply}}
+
+
+def test_run_batch_maps_reply_to_days():
+    days = WeekGenerator(FakeBackend()).plan_week(1)[:3]
+    full = "\n".join(f"Ruby: Day 3 line {i}." for i in range(days[2]["n_turns"]))
+    reply = (f"=== DAY 3 ===\n{full}\n"
+             "=== DAY 1 ===\nRohan: Only one line today, sorry.\n")
+    backend = ScriptedBackend(reply)
+    out = WeekGenerator(backend, batch_days=3).run_batch(days)
+    assert backend.calls == 1
+    short, missing, whole = out
+    # A short day is padded to n_turns; a day with no header stays empty
+    assert len(short) == days[0]["n_turns"]
+    assert short[0]["message"] == "Only one line today, sorry."
+    assert {it["message"] for it in short[1:]} <= {"Noted.", "Okay."}
+    assert [it["timestamp"] for it in short] == days[0]["timestamps"][:len(short)]
+    assert missing == []
+    assert [it["message"] for it in whole] == [f"Day 3 line {i}." for i in range(days[2]["n_turns"])]
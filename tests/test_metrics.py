@@ -0,0 +1,40 @@
+from elyx_backends import FakeBackend
+from elyx_engine import WeekGenerator
+from elyx_metrics import MetricsLog, read_metrics, summarize
+
+
+def rec(week, day, n_turns, valid, member=None, **extra):
+    r = {"week": week, "day": day, "n_turns": n_turns, "raw_lines": valid, "valid_lines": valid,
+         "filler": max(0, n_turns - valid) if valid else 0, "raw_chars": 0, "kept_chars": 0,
+         "system_chars": 0, "prompt_chars": 1, "prompt_tokens_est": 1, "member": member,
+         "prompt_eval_count": None, "prompt_eval_duration": None, "eval_count": None,
+         "eval_duration": None, "load_duration": None, "total_duration": None}
+    r.update(extra)
+    return r
+
+
+def test_topups_offset_their_batch_per_member():
+    records = [
+        # Member a: one 7-day call 5 lines short, topped up on days 2 and 5
+        rec(1, "1-7", 70, 65, member="a", days=7),
+        rec(1, 2, 3, 3, member="a", topup=1, batch="1-7"),
+        rec(1, 5, 2, 2, member="a", topup=1, batch="1-7"),
+        # Member b: same week, single-day calls; day 2 stays 4 short
+        rec(1, 2, 10, 6, member="b"),
+        rec(1, 3, 10, 10, member="b"),
+    ]
+    assert summarize(records)[1]["filler"] == 4
+
+
+def test_engine_tags_batch_topups(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    gen = WeekGenerator(FakeBackend(seed=1, malformed_rate=0.3, drift=6), batch_days=7, topup=2,
+                        metrics=MetricsLog(str(path)))
+    gen.generate_week(1)
+    records = list(read_metrics(str(path)))
+    topups = [r for r in records if r.get("topup")]
+    assert topups, "fake backend produced no short days"
+    assert {r["batch"] for r in topups} == {"1-7"}
+    batch = next(r for r in records if not r.get("topup"))
+    added = sum(min(r["valid_lines"], r["n_turns"]) for r in topups)
+    assert summarize(records)[1]["filler"] == max(0, batch["filler"] - added)
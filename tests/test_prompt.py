@@ -0,0 +1,38 @@
+from elyx_engine import (WEEK_CONFIGS, WeekGenerator, build_system_prompt,
+                         build_user_prompt, plan_week)
+from elyx_backends import FakeBackend
+from elyx_prompt import LEVELS, PromptBudget, messages_tokens
+
+DEDUPE = LEVELS.index("dedupe")
+
+
+def test_dedupe_says_the_constraints_once():
+    system = build_system_prompt(5, level=DEDUPE)
+    user = build_user_prompt(5, 7, "2025-02-05", 16, level=DEDUPE)
+    assert "Constraints:" not in user
+    assert "Allowed speakers only" not in user
+    # The one speaker list and the folded format rule stay in the system prompt
+    assert system.count("Use only these speakers:") == 1
+    assert "timestamps, JSON" in system
+    # Already said by the focus line "Rohan asks up to 5 curiosity questions ..."
+    assert "curiosity questions per week" not in system
+    assert "curiosity questions per week" in build_system_prompt(5)
+
+
+def test_documented_budget_fits_every_week():
+    budget = PromptBudget(900)
+    for week in WEEK_CONFIGS:
+        for day in plan_week(week, prompt=budget):
+            assert messages_tokens(day["messages"]) <= 900
+    assert budget.over_budget == 0
+
+
+def test_over_budget_counts_each_week_once():
+    budget = PromptBudget(100)
+    gen = WeekGenerator(FakeBackend(), prompt=budget)
+    for week in (1, 2):
+        gen.plan_week(week)
+        gen.config_hash(week)
+    assert budget.over_budget == 2
+    assert "2 prompt(s)" in budget.report()
+    assert PromptBudget(5000).report() is None
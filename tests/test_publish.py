@@ -0,0 +1,34 @@
+import json
+
+from elyx_publish import publish, read_txt_chats
+
+# Lines exactly as 22_week2.py writes them: strftime("[%m/%d/%y, %I:%M %p]") + " Speaker: msg"
+WEEK2_TXT = """[01/08/25, 08:15 AM] Rohan: Morning, when is the blood draw?
+[01/08/25, 01:05 PM] Ruby: 9am tomorrow, fasting from midnight please.
+
+[01/09/25, 09:40 AM] Dr. Warren: Panel results are in, all clear.
+not a chat line
+"""
+
+
+def test_reads_22_week2_lines(tmp_path):
+    path = tmp_path / "elyx_week2_chats.txt"
+    path.write_text(WEEK2_TXT, encoding="utf-8")
+    items = read_txt_chats(str(path))
+    assert [it["timestamp"] for it in items] == [
+        "2025-01-08 08:15", "2025-01-08 13:05", "2025-01-09 09:40"]
+    assert items[0]["message"] == "Morning, when is the blood draw?"
+    assert items[2]["sender"] == "Dr. Warren"
+
+
+def test_publishes_text_chats(tmp_path):
+    src, dest = tmp_path / "out", tmp_path / "data"
+    src.mkdir()
+    dest.mkdir()
+    (src / "elyx_week2_chats.txt").write_text(WEEK2_TXT, encoding="utf-8")
+    report = publish([str(src)], str(dest))
+    assert report["written"] == ["week02_conversation.json"]
+    assert not report["quarantined"]
+    data = json.loads((dest / "week02_conversation.json").read_text(encoding="utf-8"))
+    assert len(data) == 3
+    assert data[1]["timestamp"] == "2025-01-08 13:05"
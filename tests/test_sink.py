@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from elyx_sink import make_sink, read_manifest, read_shard
+
+DAYS = {
+    1: [{"timestamp": "2025-01-15 08:17", "sender": "Ruby", "message": "Welcome, Rohan!", "event": "update"}],
+    2: [{"timestamp": "2025-01-16 09:00", "sender": "Rohan", "message": "Panel at 9? ✅", "event": "question"},
+        {"timestamp": "2025-01-16 09:05", "sender": "Ruby", "message": "Yes, fasting.", "event": "logistics"}],
+}
+FORMATS = [("json", None), ("jsonl", None), ("jsonl", "gzip"), ("jsonl", "zstd")]
+
+
+def _sink(tmp_path, fmt, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    return make_sink(fmt, str(tmp_path), compression)
+
+
+@pytest.mark.parametrize("fmt,compression", FORMATS, ids=["json", "jsonl", "gzip", "zstd"])
+def test_round_trip(tmp_path, fmt, compression):
+    sink = _sink(tmp_path, fmt, compression)
+    with sink.open_week(3, "abc123") as writer:
+        for day, items in DAYS.items():
+            writer.write_day(day, items)
+        # Readers only ever see the finished shard
+        assert not os.path.exists(writer.path)
+    assert not os.path.exists(writer.tmp)
+    assert read_shard(writer.path) == DAYS[1] + DAYS[2]
+
+    name = os.path.basename(writer.path)
+    assert name == "elyx_week3_communications" + sink.suffix
+    entry = read_manifest(str(tmp_path))[name]
+    assert {k: entry[k] for k in ("week", "days", "messages", "config_hash", "format", "compression")} == {
+        "week": 3, "days": 2, "messages": 3, "config_hash": "abc123",
+        "format": fmt, "compression": compression}
+    assert entry["bytes"] == os.path.getsize(writer.path)
+
+
+@pytest.mark.parametrize("fmt,compression", FORMATS, ids=["json", "jsonl", "gzip", "zstd"])
+def test_identical_weeks_are_byte_identical(tmp_path, fmt, compression):
+    blobs = []
+    for run in ("a", "b"):
+        with _sink(tmp_path / run, fmt, compression).open_week(1) as writer:
+            writer.write_day(1, DAYS[1])
+        with open(writer.path, "rb") as f:
+            blobs.append(f.read())
+    assert blobs[0] == blobs[1]
+
+
+def test_failed_week_leaves_nothing(tmp_path):
+    sink = make_sink("jsonl", str(tmp_path), "gzip")
+    with pytest.raises(RuntimeError):
+        with sink.open_week(1) as writer:
+            writer.write_day(1, DAYS[1])
+            raise RuntimeError("model went away")
+    assert os.listdir(tmp_path) == []
+
+
+def test_new_format_replaces_the_old_shard(tmp_path):
+    with make_sink("json", str(tmp_path)).open_week(1, "old") as old:
+        old.write_day(1, DAYS[1])
+    with make_sink("jsonl", str(tmp_path), "gzip").open_week(1, "new") as new:
+        new.write_day(1, DAYS[1])
+    assert not os.path.exists(old.path)
+    # The old shard's entry is gone with it; the last entry per file wins
+    assert {name: e["config_hash"] for name, e in read_manifest(str(tmp_path)).items()} == {
+        os.path.basename(new.path): "new"}
@@ -0,0 +1,126 @@
+import json
+import os
+import re
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from elyx_corpus import CorpusLoader
+from elyx_store import AnalyticsStore
+from elyx_validate import RecordValidator
+
+
+def _pandas(folder):
+    loader = CorpusLoader(str(folder), workers=1, snapshot=False)
+    return loader.conversations(), loader.decisions(), loader.hours()
+
+
+def assert_matches_pandas(store, folder):
+    chats, decisions, hours = _pandas(folder)
+    assert store.count_chats() == len(chats)
+    assert store.count_decisions() == len(decisions)
+    assert store.count_hours() == len(hours)
+    by_speaker = store.speaker_counts().set_index("speaker")["messages"].to_dict()
+    assert by_speaker == chats["speaker"].value_counts().to_dict()
+    daily = store.daily_counts()
+    expected = chats.groupby(chats["timestamp"].dt.date).size()
+    assert daily.set_index("timestamp")["messages"].to_dict() == expected.to_dict()
+    roles = store.hours_by_role().set_index("role")["hours"].to_dict()
+    assert roles == pytest.approx(hours.groupby("role")["hours"].sum().to_dict())
+
+
+def test_sync_matches_pandas_path(folder, tmp_path):
+    store = AnalyticsStore(str(tmp_path / "store.sqlite"))
+    first = store.sync(str(folder), workers=1, processes=False)
+    assert first["chats"] == 12
+    assert_matches_pandas(store, folder)
+
+    # One shard changes, one disappears: only the changed one is re-ingested
+    shards = sorted(folder.glob("week*_conversation.json"))
+    records = json.loads(shards[0].read_text(encoding="utf-8"))
+    shards[0].write_text(json.dumps(records[:5]), encoding="utf-8")
+    shards[1].unlink()
+    again = store.sync(str(folder), workers=1, processes=False)
+    assert again == {"chats": 1, "decisions": 0, "hours": 0}
+    assert_matches_pandas(store, folder)
+
+
+@pytest.mark.parametrize("shared", [True, False], ids=["one-store", "two-connections"])
+def test_concurrent_syncs_ingest_once(folder, tmp_path, shared):
+    db = str(tmp_path / "store.sqlite")
+    stores = [AnalyticsStore(db)] * 2 if shared else [AnalyticsStore(db), AnalyticsStore(db)]
+    start = threading.Barrier(2)
+    errors = []
+
+    def run(store):
+        try:
+            start.wait()
+            store.sync(str(folder), workers=1, processes=False)
+        except Exception as e:  # surfaced below; a thread can't fail the test
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(s,)) for s in stores]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert_matches_pandas(stores[0], folder)
+
+
+def dashboard_function(name):
+    # elyx_1.py runs Streamlit at import time (and needs Python 3.12 to
+    # parse), so exec just the function's source
+    with open(os.path.join(ROOT, "elyx_1.py"), encoding="utf-8") as f:
+        src = f.read()
+    start = src.index(f"def {name}(")
+    end = src.index("\ndef ", start + 1)
+    namespace = {"np": np, "pd": pd, "re": re}
+    exec(src[start:end], namespace)
+    return namespace[name]
+
+
+def test_response_times_match_dashboard_kpi(tmp_path):
+    chats = [
+        {"timestamp": "2025-01-08 09:00", "sender": "Member", "message": "Morning"},
+        {"timestamp": "2025-01-08 09:00", "sender": "Client Rohan", "message": "Same minute"},
+        {"timestamp": "2025-01-08 09:00", "sender": "Ruby", "message": "Not a reply: same minute"},
+        {"timestamp": "2025-01-08 09:12", "sender": "Member", "message": "Still there?"},
+        {"timestamp": "2025-01-08 09:30", "sender": "Ruby", "message": "Yes!"},
+        {"timestamp": "2025-01-08 11:00", "sender": None, "message": "Unknown sender"},
+        {"timestamp": "2025-01-09 08:00", "sender": "Patient", "message": "Quick question"},
+        {"timestamp": "2025-01-09 10:45", "sender": "Dr. Warren", "message": "Answered"},
+        {"timestamp": "2025-01-10 18:00", "sender": "Member", "message": "No reply to this"},
+    ]
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "week01_conversation.json").write_text(json.dumps(chats), encoding="utf-8")
+    # The KPI looks for member/client/patient speakers, none of them on
+    # Rohan's team; the unknown (None) sender is still rejected
+    validator = RecordValidator(["Member", "Client Rohan", "Patient", "Ruby", "Dr. Warren"])
+    store = AnalyticsStore(str(tmp_path / "store.sqlite"))
+    store.sync(str(data), workers=1, processes=False, validator=validator)
+    kpi = dashboard_function("kpi_response_times")
+    frame = CorpusLoader(str(data), workers=1, snapshot=False, validator=validator).conversations()
+    assert len(frame) == len(chats) - 1
+    for filters in ({}, {"start": date(2025, 1, 9)}, {"speakers": ["Ruby"]}):
+        expected = kpi(frame[_mask(frame, **filters)])
+        got = store.response_times(**filters)
+        assert got["count"] == expected["count"]
+        if expected["count"]:
+            assert got["median_minutes"] == pytest.approx(expected["median_minutes"])
+            assert got["avg_minutes"] == pytest.approx(expected["avg_minutes"])
+    assert store.response_times()["count"] == 4
+
+
+def _mask(frame, start=None, speakers=None):
+    mask = pd.Series(True, index=frame.index)
+    if start is not None:
+        mask &= frame["timestamp"].dt.date >= start
+    if speakers:
+        mask &= frame["speaker"].isin(speakers)
+    return mask